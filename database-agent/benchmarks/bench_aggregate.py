@@ -0,0 +1,58 @@
+"""Server-side aggregation vs pulling raw rows through query_db_table.
+
+The "raw rows" case pages through every matching expense with
+query_db_table and sums per month and category in Python, which is the
+best case for what the agent used to do in the LLM. Payload size is the
+JSON the MCP client would receive.
+
+Usage:
+    python benchmarks/bench_aggregate.py [--rows 500000] [--iterations 5]
+"""
+import argparse
+import json
+from collections import defaultdict
+
+from common import load_server, make_temp_database, measure, print_table
+
+
+def aggregate_from_raw_rows(server) -> tuple[dict, int]:
+    totals = defaultdict(float)
+    payload_bytes = 0
+    cursor = ""
+    while True:
+        page = server.query_db_table(
+            "expenses", "category, amount, date", "user_id = 1",
+            limit=server.QUERY_MAX_LIMIT, cursor=cursor,
+        )
+        payload_bytes += len(json.dumps(page, indent=2))
+        for row in page["rows"]:
+            totals[(row["date"][:7], row["category"])] += row["amount"]
+        if not page["has_more"]:
+            return totals, payload_bytes
+        cursor = page["next_cursor"]
+
+
+def aggregate_in_sqlite(server) -> tuple[dict, int]:
+    response = server.aggregate_table("expenses", "SUM(amount)", "category", "month", "user_id = 1")
+    return response, len(json.dumps(response, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+
+    server = load_server(make_temp_database(args.rows))
+
+    results = {
+        "aggregate_table (SQLite)": measure(lambda: aggregate_in_sqlite(server), args.iterations, warmup=1),
+        "query_db_table + Python": measure(lambda: aggregate_from_raw_rows(server), args.iterations, warmup=1),
+    }
+    print_table(f"Monthly spend per category for one user, {args.rows} expense rows", results)
+
+    _, sqlite_bytes = aggregate_in_sqlite(server)
+    _, raw_bytes = aggregate_from_raw_rows(server)
+    print(f"\n{'payload, aggregate_table':<40}{sqlite_bytes:>12,} bytes")
+    print(f"{'payload, query_db_table pages':<40}{raw_bytes:>12,} bytes")
+    server.DB.close()
@@ -0,0 +1,85 @@
+"""Benchmark: keeping a client view current with changes_since vs re-reading tables.
+
+A client that mirrors expenses and workouts (a dashboard, a caching agent)
+either re-reads both tables after every batch of writes or pulls the delta
+with changes_since. The re-read is timed as bare `SELECT *` on a reader
+connection, which is a lower bound on what query_db_table pages would cost.
+The cost of the change-log triggers on writes is measured by bulk inserting
+into a copy of the database at schema version 4 (no change log) and 5.
+
+Usage:
+    python benchmarks/bench_changes.py [--rows 200000] [--iterations 20]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from bench_rollups import insert_cost
+from common import load_create_db, load_server, measure, print_table
+from generate_data import populate, volumes_for
+
+load_create_db()  # puts db-agent on sys.path
+from migrations import migrate  # noqa: E402
+
+MIRRORED = ("expenses", "workouts")
+BATCH_SIZES = (1, 10, 100)
+
+
+def reread(conn: sqlite3.Connection) -> int:
+    return sum(len(conn.execute(f"SELECT * FROM {table};").fetchall()) for table in MIRRORED)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    volumes = volumes_for(args.rows)
+    path = os.path.join(tempfile.mkdtemp(prefix="life_tracker_changes_"), "life_tracker.db")
+    conn = sqlite3.connect(path)
+    migrate(conn, target=4)
+    conn.close()
+    populate(path, **volumes)
+    without_log = path + ".v4"
+    shutil.copy(path, without_log)
+    conn = sqlite3.connect(path)
+    migrate(conn)
+    conn.close()
+
+    server = load_server(path)
+    reader = sqlite3.connect(path)
+    tables = ",".join(MIRRORED)
+    results = {"re-read both tables": measure(lambda: reread(reader), args.iterations, warmup=1)}
+    next_id = 1
+    for batch in BATCH_SIZES:
+        samples = []
+        for _ in range(args.iterations):
+            # Only the pull is timed, not the writes it reports
+            version = server.changes_since(0)["version"]
+            ids = list(range(next_id, next_id + batch))
+            next_id += batch
+            server.update_data_in_table("expenses", {"description": "synced"}, filters=[{"column": "id", "op": "in", "value": ids}])
+            start = time.perf_counter()
+            response = server.changes_since(version, tables=tables)
+            samples.append((time.perf_counter() - start) * 1e6)
+            if len(response["changes"]) != batch:
+                print(f"warning: expected {batch} changes, got {len(response['changes'])}")
+        samples.sort()
+        results[f"changes_since after {batch} updates"] = {
+            "mean_us": statistics.fmean(samples),
+            "p50_us": samples[len(samples) // 2],
+            "p95_us": samples[int(len(samples) * 0.95) - 1],
+        }
+    server.DB.close()
+    reader.close()
+
+    print(f"\n{volumes['expenses']:,} expenses and {volumes['workouts']:,} workouts for {volumes['users']:,} users")
+    print_table("Bringing a mirror of expenses and workouts up to date", results)
+    print("\nbulk insert into expenses, us per row:")
+    print(f"  {'without change log':<20}{insert_cost(without_log):>8.1f}")
+    print(f"  {'with change log':<20}{insert_cost(path):>8.1f}")
@@ -0,0 +1,62 @@
+"""Per-call latency of the DB tools with pooled vs per-call connections.
+
+Usage:
+    python benchmarks/bench_connections.py [--rows 10000] [--iterations 2000]
+"""
+import argparse
+import sqlite3
+from contextlib import contextmanager
+
+from common import load_server, make_temp_database, measure, print_table
+
+
+class PerCallConnections:
+    """Reproduces the original behaviour: connect and close on every tool call."""
+
+    def __init__(self, database_path: str):
+        self.database_path = database_path
+
+    @contextmanager
+    def _connection(self):
+        conn = sqlite3.connect(self.database_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    reader = _connection
+    writer = _connection
+
+
+def run(server, label: str) -> dict:
+    return {
+        f"{label} list_db_tables": measure(lambda: server.list_db_tables("bench"), ITERATIONS),
+        f"{label} get_table_schema": measure(lambda: server.get_table_schema("expenses"), ITERATIONS),
+        f"{label} query_db_table (1 row)": measure(
+            lambda: server.query_db_table("expenses", "*", "id = 42"), ITERATIONS
+        ),
+        f"{label} update_data_in_table": measure(
+            lambda: server.update_data_in_table("expenses", {"amount": 10.0}, "id = 42"), ITERATIONS
+        ),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--iterations", type=int, default=2_000)
+    args = parser.parse_args()
+    ITERATIONS = args.iterations
+
+    database_path = make_temp_database(args.rows)
+    server = load_server(database_path)
+
+    pooled = server.DB
+    results = run(server, "pooled")
+    server.DB = PerCallConnections(database_path)
+    results.update(run(server, "per-call"))
+    server.DB = pooled
+    pooled.close()
+
+    print_table(f"Tool latency, {args.rows} expense rows", results)
@@ -0,0 +1,136 @@
+"""Benchmark: date ranges and time buckets on text dates vs the integer `date_day` column.
+
+Two databases with the same synthetic data are compared: "text" is at
+schema version 2 (only the text `date` column and its indexes, as before
+migration 3) and "date_day" at the latest version, where `date_range`
+arguments become range scans on `date_day` and day/week buckets group on
+integers. The SQL is what query_db_table and aggregate_table run in each
+case. The cost of the extra indexes on writes is reported as well.
+
+Usage:
+    python benchmarks/bench_dates.py [--rows 500000] [--iterations 20]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+
+from common import load_create_db, measure, print_table
+from generate_data import populate, volumes_for
+
+load_create_db()  # puts db-agent on sys.path
+from date_ranges import date_range_condition  # noqa: E402
+from migrations import migrate  # noqa: E402
+
+
+def make_database(version: int | None, volumes: dict) -> str:
+    path = os.path.join(tempfile.mkdtemp(prefix="life_tracker_dates_"), "life_tracker.db")
+    conn = sqlite3.connect(path)
+    migrate(conn, target=version)
+    conn.close()
+    populate(path, **volumes)
+    conn = sqlite3.connect(path)
+    conn.execute("ANALYZE;")
+    conn.close()
+    return path
+
+
+def cases(day_column: str | None) -> dict:
+    """Label -> (sql, params) in the form the tools generate for this schema version."""
+    today = date.today()
+    month = (today.replace(day=1) - timedelta(days=1)).strftime("%Y-%m")
+    month_sql, month_params = date_range_condition(month, day_column=day_column)
+    quarter_sql, quarter_params = date_range_condition("last 90 days", day_column=day_column)
+    year_sql, year_params = date_range_condition("last 365 days", day_column=day_column)
+    if day_column:
+        week_key = "date_day - ((date_day + 3) % 7 + 7) % 7"
+        week_label = f"date(({week_key}) * 86400, 'unixepoch')"
+        day_key, day_label = "date_day", "date(date_day * 86400, 'unixepoch')"
+        order, newest = "date_day, rowid", "date_day DESC, rowid DESC"
+    else:
+        week_key = week_label = "date(date, 'weekday 0', '-6 days')"
+        day_key = day_label = "date(date)"
+        order, newest = "date, rowid", "date DESC, rowid DESC"
+    return {
+        "user month, first page": (
+            f"SELECT * FROM expenses WHERE (user_id = 1) AND {month_sql} ORDER BY {order} LIMIT 101;",
+            month_params,
+        ),
+        "user month, SUM by category": (
+            f"SELECT category, SUM(amount) FROM expenses WHERE (user_id = 1) AND {month_sql} GROUP BY category;",
+            month_params,
+        ),
+        "90 days, COUNT": (
+            f"SELECT COUNT(*) FROM expenses WHERE {quarter_sql};",
+            quarter_params,
+        ),
+        "90 days, newest page": (
+            f"SELECT * FROM expenses WHERE {quarter_sql} ORDER BY {newest} LIMIT 101;",
+            quarter_params,
+        ),
+        "user year, weekly SUM": (
+            f"SELECT {week_label} AS period, SUM(amount) FROM expenses WHERE (user_id = 1) AND {year_sql} "
+            f"GROUP BY {week_key} ORDER BY {week_key};",
+            year_params,
+        ),
+        "all rows, daily COUNT": (
+            f"SELECT {day_label} AS period, COUNT(*) FROM expenses GROUP BY {day_key} ORDER BY {day_key};",
+            [],
+        ),
+    }
+
+
+def insert_cost(path: str, rows: int = 20_000) -> float:
+    """Microseconds per row to bulk insert expenses into a copy of the database."""
+    copy = path + ".insert"
+    shutil.copy(path, copy)
+    conn = sqlite3.connect(copy)
+    values = [
+        (1, 12.5, "food", "benchmark row", (date(2024, 1, 1) + timedelta(days=i % 700)).isoformat(), "2024-01-01", "2024-01-01")
+        for i in range(rows)
+    ]
+    start = time.perf_counter()
+    conn.executemany(
+        "INSERT INTO expenses (user_id, amount, category, description, date, created_at, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?);",
+        values,
+    )
+    conn.commit()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    os.remove(copy)
+    return elapsed / rows * 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    volumes = volumes_for(args.rows)
+    databases = {"text": make_database(2, volumes), "date_day": make_database(None, volumes)}
+
+    results = {}
+    answers = {}
+    for label, path in databases.items():
+        conn = sqlite3.connect(path)
+        day_column = None if label == "text" else "date_day"
+        for case, (sql, params) in cases(day_column).items():
+            answers.setdefault(case, []).append(conn.execute(sql, params).fetchall())
+            results[f"{case} [{label}]"] = measure(lambda: conn.execute(sql, params).fetchall(), args.iterations, warmup=2)
+        conn.close()
+
+    for case, (text_rows, day_rows) in answers.items():
+        if case.endswith("page"):
+            continue  # the pages differ only in the extra date_day column
+        if text_rows != day_rows:
+            print(f"warning: '{case}' returned different results")
+
+    print_table(f"Date filters and buckets, {volumes['expenses']:,} expense rows", results)
+    print("\nbulk insert, us per row:")
+    for label, path in databases.items():
+        print(f"  {label:<12}{insert_cost(path):>8.1f}")
@@ -0,0 +1,78 @@
+"""Per-call logging overhead: synchronous full-payload logging vs the queue-backed logger.
+
+"before" reproduces the original server: a synchronous FileHandler and the
+full arguments and response formatted into every INFO record. "after" is
+the current setup: QueueHandler + background RotatingFileHandler with
+truncated payloads, at 100% and 10% sampling. Only the two log statements
+around a tool call are timed, against a real query_db_table response; the
+background writer's own work is reported separately as drain time.
+
+Usage:
+    python benchmarks/bench_logging.py [--rows 5000] [--iterations 500]
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+from common import load_server, make_temp_database, measure, print_table
+
+
+def reset_root_logger():
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5_000)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    server = load_server(make_temp_database(args.rows))
+    server.LOG_LISTENER.stop()
+    from server_logging import ToolLogSampler, configure_logging, truncate_payload
+
+    log_dir = tempfile.mkdtemp(prefix="life_tracker_logs_")
+    results = {}
+    drain = {}
+    for page_size in (10, 1000):
+        arguments = {"table_name": "expenses", "columns": "*", "conditions": "", "limit": page_size}
+        response = server.query_db_table(**arguments)
+
+        def before():
+            logging.info(f"MCP Server: Received call_tool request for 'query_db_table' with arguments: {arguments}")
+            logging.info(f"MCP Server: Tool 'query_db_table' executed. Response: {response}")
+
+        def after(sampler):
+            if sampler.should_log("query_db_table"):
+                logging.info(
+                    f"MCP Server: Received call_tool request for 'query_db_table' with arguments: {truncate_payload(arguments)}"
+                )
+                logging.info(f"MCP Server: Tool 'query_db_table' executed. Response: {truncate_payload(response)}")
+
+        reset_root_logger()
+        logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s",
+            handlers=[logging.FileHandler(os.path.join(log_dir, "before.log"), mode="w")],
+            force=True,
+        )
+        results[f"{page_size} rows, before (sync, full payload)"] = measure(before, args.iterations)
+
+        for label, sampler in (("100%", ToolLogSampler()), ("10%", ToolLogSampler({"query_db_table": 0.1}))):
+            reset_root_logger()
+            listener = configure_logging(os.path.join(log_dir, "after.log"))
+            results[f"{page_size} rows, after (queue, {label})"] = measure(lambda: after(sampler), args.iterations)
+            start = time.perf_counter()
+            listener.stop()
+            drain[f"{page_size} rows, after (queue, {label})"] = (time.perf_counter() - start) * 1000
+
+    print_table("Caller-side logging overhead per tool call", results)
+    print(f"\n{'background writer drain after the run':<40}")
+    for label, milliseconds in drain.items():
+        print(f"{label:<40}{milliseconds:>12.1f} ms")
+    server.DB.close()
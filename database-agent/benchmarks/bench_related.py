@@ -0,0 +1,106 @@
+"""Benchmark: N+1 lookups vs one query_with_related call.
+
+To answer "which habits did I skip in the last 30 days" an agent used to
+call query_db_table on habits and then once more on habit_logs for every
+habit; query_with_related returns the habits with their matching logs from
+one SQL statement. The same is timed for a user's habits with their recent
+logs. Each case runs through a spawned stdio server, so the timings include
+the MCP round trips the agent pays.
+
+Usage:
+    python benchmarks/bench_related.py [--rows 1000000] [--iterations 50]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from common import DB_AGENT_DIR
+from generate_data import create_database, volumes_for
+
+USER = [{"column": "user_id", "op": "=", "value": 1}]
+SKIPPED = [{"column": "status", "op": "=", "value": 0}]
+
+
+async def call(session: ClientSession, tool: str, arguments: dict) -> dict:
+    response = await session.call_tool(tool, arguments)
+    payload = json.loads(response.content[0].text)
+    if not payload.get("success", True):
+        raise SystemExit(f"{tool} failed: {payload['message']}")
+    return payload
+
+
+async def per_habit_lookups(session: ClientSession, log_filters: list[dict]) -> int:
+    habits = await call(session, "query_db_table", {"table_name": "habits", "columns": "*", "filters": USER})
+    calls = 1
+    for habit in habits["rows"]:
+        await call(session, "query_db_table", {
+            "table_name": "habit_logs", "columns": "*", "order_by": "date desc", "limit": 20,
+            "filters": [{"column": "habit_id", "op": "=", "value": habit["id"]}, *log_filters],
+            "date_range": "last 30 days",
+        })
+        calls += 1
+    return calls
+
+
+async def one_related_query(session: ClientSession, log_filters: list[dict]) -> int:
+    await call(session, "query_with_related", {
+        "table_name": "habits", "include": "habit_logs", "filters": USER,
+        "related_filters": {"habit_logs": log_filters}, "related_date_range": "last 30 days",
+    })
+    return 1
+
+
+CASES = {
+    "skipped habits, per-habit lookups": (per_habit_lookups, SKIPPED),
+    "skipped habits, query_with_related": (one_related_query, SKIPPED),
+    "recent logs, per-habit lookups": (per_habit_lookups, []),
+    "recent logs, query_with_related": (one_related_query, []),
+}
+
+
+async def run_cases(database_path: str, iterations: int) -> dict:
+    # The cache would answer every repeat; the point is the cost of the calls
+    env = {**os.environ, "LIFE_TRACKER_DB_PATH": database_path, "DB_QUERY_CACHE_ENTRIES": "0"}
+    params = StdioServerParameters(command=sys.executable, args=[str(DB_AGENT_DIR / "server.py")], env=env)
+    results = {}
+    async with stdio_client(params) as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            for label, (case, log_filters) in CASES.items():
+                await case(session, log_filters)
+                samples = []
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    calls = await case(session, log_filters)
+                    samples.append((time.perf_counter() - start) * 1000)
+                samples.sort()
+                results[label] = {
+                    "calls": calls,
+                    "p50_ms": statistics.median(samples),
+                    "p95_ms": samples[int(len(samples) * 0.95) - 1],
+                }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    volumes = volumes_for(args.rows)
+    database_path = os.path.join(tempfile.mkdtemp(prefix="life_tracker_related_"), "life_tracker.db")
+    create_database(database_path, **volumes)
+    results = asyncio.run(run_cases(database_path, args.iterations))
+    print(f"\n{volumes['habit_logs']:,} habit logs for {volumes['users']:,} users, over MCP stdio")
+    print(f"{'case':<38}{'calls':>7}{'p50 (ms)':>11}{'p95 (ms)':>11}")
+    for label, stats in results.items():
+        print(f"{label:<38}{stats['calls']:>7}{stats['p50_ms']:>11.2f}{stats['p95_ms']:>11.2f}")
@@ -0,0 +1,52 @@
+"""Payload size and serialization time: default vs compact tool responses.
+
+"default" is what the server has always sent: one dict per row, serialized
+with json.dumps(indent=2). "compact" is the columnar format with no
+whitespace, using orjson when installed and the standard library otherwise.
+
+Usage:
+    python benchmarks/bench_response_encoding.py [--rows 20000] [--iterations 200]
+"""
+import argparse
+import json
+
+from common import load_server, make_temp_database, measure, print_table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    server = load_server(make_temp_database(args.rows))
+    from response_encoding import dumps_response, orjson
+
+    results = {}
+    sizes = {}
+    for page_size in (10, 100, 1000):
+        default = server.query_db_table("expenses", "*", "", limit=page_size)
+        compact = server.query_db_table("expenses", "*", "", limit=page_size, compact=True)
+        stdlib_compact = lambda: json.dumps(compact, separators=(",", ":"), ensure_ascii=False)
+
+        results[f"{page_size} rows, default encode"] = measure(lambda: json.dumps(default, indent=2), args.iterations)
+        results[f"{page_size} rows, compact encode (stdlib)"] = measure(stdlib_compact, args.iterations)
+        if orjson is not None:
+            results[f"{page_size} rows, compact encode (orjson)"] = measure(
+                lambda: dumps_response(compact, compact=True), args.iterations
+            )
+        results[f"{page_size} rows, default tool + encode"] = measure(
+            lambda: json.dumps(server.query_db_table("expenses", "*", "", limit=page_size), indent=2),
+            args.iterations,
+        )
+        results[f"{page_size} rows, compact tool + encode"] = measure(
+            lambda: dumps_response(server.query_db_table("expenses", "*", "", limit=page_size, compact=True), True),
+            args.iterations,
+        )
+        sizes[page_size] = (len(json.dumps(default, indent=2)), len(dumps_response(compact, compact=True)))
+
+    print_table(f"query_db_table on expenses (orjson {'installed' if orjson else 'not installed'})", results)
+    print(f"\n{'page size':<12}{'default bytes':>16}{'compact bytes':>16}{'ratio':>10}")
+    for page_size, (default_bytes, compact_bytes) in sizes.items():
+        print(f"{page_size:<12}{default_bytes:>16,}{compact_bytes:>16,}{default_bytes / compact_bytes:>10.2f}")
+    server.DB.close()
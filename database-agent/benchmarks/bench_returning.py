@@ -0,0 +1,107 @@
+"""Benchmark: write-then-read round trips vs writes that return their rows.
+
+An agent that wants to see what a write changed used to follow
+update_data_in_table with a query_db_table call for the same rows (and to
+look rows up before deleting them). With `returning`, the write sends the
+rows back from the same statement. Each case runs through a spawned stdio
+server, so the timings include the MCP round trips the agent pays.
+
+Usage:
+    python benchmarks/bench_returning.py [--rows 100000] [--iterations 200]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from common import DB_AGENT_DIR, make_temp_database
+
+
+def id_filter(row_id: int) -> list[dict]:
+    return [{"column": "id", "op": "=", "value": row_id}]
+
+
+def update_then_query(row_id: int) -> list[tuple[str, dict]]:
+    return [
+        ("update_data_in_table", {
+            "table_name": "expenses", "data": {"description": f"edited {row_id}"}, "filters": id_filter(row_id),
+        }),
+        ("query_db_table", {"table_name": "expenses", "columns": "*", "filters": id_filter(row_id)}),
+    ]
+
+
+def update_returning(row_id: int) -> list[tuple[str, dict]]:
+    return [
+        ("update_data_in_table", {
+            "table_name": "expenses", "data": {"description": f"edited {row_id}"}, "filters": id_filter(row_id), "returning": "*",
+        }),
+    ]
+
+
+def query_then_delete(row_id: int) -> list[tuple[str, dict]]:
+    return [
+        ("query_db_table", {"table_name": "expenses", "columns": "*", "filters": id_filter(row_id)}),
+        ("delete_data_from_table", {"table_name": "expenses", "filters": id_filter(row_id)}),
+    ]
+
+
+def delete_returning(row_id: int) -> list[tuple[str, dict]]:
+    return [("delete_data_from_table", {"table_name": "expenses", "filters": id_filter(row_id), "returning": "*"})]
+
+
+CASES = {
+    "update + query": update_then_query,
+    "update returning": update_returning,
+    "query + delete": query_then_delete,
+    "delete returning": delete_returning,
+}
+
+
+async def run_cases(database_path: str, iterations: int) -> dict:
+    env = {**os.environ, "LIFE_TRACKER_DB_PATH": database_path, "DB_QUERY_CACHE_ENTRIES": "0"}
+    params = StdioServerParameters(command=sys.executable, args=[str(DB_AGENT_DIR / "server.py")], env=env)
+    results = {}
+    async with stdio_client(params) as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            # Each case works on its own id range, so deletes never hit a row twice
+            for index, (label, calls_for) in enumerate(CASES.items()):
+                samples, payload = [], 0
+                for i in range(iterations):
+                    row_id = index * iterations + i + 1
+                    start = time.perf_counter()
+                    for tool, arguments in calls_for(row_id):
+                        response = await session.call_tool(tool, arguments)
+                        text = response.content[0].text
+                        if not json.loads(text).get("success", True):
+                            raise SystemExit(f"{label}: {tool} failed: {text}")
+                        payload += len(text)
+                    samples.append((time.perf_counter() - start) * 1000)
+                samples.sort()
+                results[label] = {
+                    "calls": len(calls_for(1)),
+                    "p50_ms": statistics.median(samples),
+                    "p95_ms": samples[int(len(samples) * 0.95) - 1],
+                    "bytes": payload / iterations,
+                }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    database_path = make_temp_database(args.rows)
+    results = asyncio.run(run_cases(database_path, args.iterations))
+    print(f"\n{args.iterations} single-row changes per case on {args.rows:,} expenses, over MCP stdio")
+    print(f"{'case':<20}{'calls':>7}{'p50 (ms)':>11}{'p95 (ms)':>11}{'bytes':>9}")
+    for label, stats in results.items():
+        print(f"{label:<20}{stats['calls']:>7}{stats['p50_ms']:>11.2f}{stats['p95_ms']:>11.2f}{stats['bytes']:>9.0f}")
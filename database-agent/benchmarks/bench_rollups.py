@@ -0,0 +1,132 @@
+"""Benchmark: dashboard totals from the rollup tables vs aggregating raw rows.
+
+A database is generated at schema version 3 (no rollups) and then migrated,
+which times the one-off rollup backfill. The dashboard questions are then
+answered by aggregate_table (raw rows, through the covering indexes) and by
+summarize_totals (rollups), for the heaviest user and across all users, and
+the answers are checked to agree. The cost of the rollup triggers on writes
+is measured by bulk inserting into a copy of the database at each version.
+
+Usage:
+    python benchmarks/bench_rollups.py [--rows 4000000] [--iterations 10]
+"""
+import argparse
+import math
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+
+from common import load_create_db, load_server, measure, print_table
+from generate_data import populate, volumes_for
+
+load_create_db()  # puts db-agent on sys.path
+from migrations import migrate  # noqa: E402
+
+HEAVY_USER = [{"column": "user_id", "op": "=", "value": 1}]
+
+# label -> aggregate_table / summarize_totals arguments
+CASES = {
+    "user: monthly by category, 12mo": ("expenses", "SUM(amount)", "category", "month", "last 12 months", HEAVY_USER),
+    "user: spend this month": ("expenses", "SUM(amount), COUNT(*)", "", "", "this month", HEAVY_USER),
+    "user: daily spend, 30d": ("expenses", "SUM(amount)", "", "day", "last 30 days", HEAVY_USER),
+    "user: weekly workouts by type, 90d": (
+        "workouts", "SUM(duration_minutes), SUM(calories_burned)", "type", "week", "last 90 days", HEAVY_USER,
+    ),
+    "all: monthly spend, this year": ("expenses", "SUM(amount)", "", "month", "this year", None),
+    "all: spend by category, all time": ("expenses", "SUM(amount), AVG(amount)", "category", "", "", None),
+    "all: yearly workouts by type, 2y": (
+        "workouts", "SUM(duration_minutes), COUNT(*)", "type", "year", "last 2 years", None,
+    ),
+}
+
+
+def insert_cost(path: str, rows: int = 20_000) -> float:
+    """Microseconds per row to bulk insert expenses into a copy of the database."""
+    copy = path + ".insert"
+    shutil.copy(path, copy)
+    conn = sqlite3.connect(copy)
+    values = [
+        (1 + i % 50, 12.5, "food", "benchmark row", (date(2024, 1, 1) + timedelta(days=i % 700)).isoformat(), "2024-01-01", "2024-01-01")
+        for i in range(rows)
+    ]
+    start = time.perf_counter()
+    conn.executemany(
+        "INSERT INTO expenses (user_id, amount, category, description, date, created_at, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?);",
+        values,
+    )
+    conn.commit()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    os.remove(copy)
+    return elapsed / rows * 1e6
+
+
+def same_rows(left: list[dict], right: list[dict]) -> bool:
+    if len(left) != len(right):
+        return False
+    for a, b in zip(left, right):
+        for key in a.keys() | b.keys():
+            x, y = a.get(key), b.get(key)
+            if isinstance(x, float) or isinstance(y, float):
+                if x is None or y is None or not math.isclose(x, y, rel_tol=1e-9):
+                    return False
+            elif x != y:
+                return False
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=4_000_000)
+    parser.add_argument("--iterations", type=int, default=10)
+    args = parser.parse_args()
+
+    volumes = volumes_for(args.rows)
+    path = os.path.join(tempfile.mkdtemp(prefix="life_tracker_rollups_"), "life_tracker.db")
+    conn = sqlite3.connect(path)
+    migrate(conn, target=3)
+    conn.close()
+    populate(path, **volumes)
+    without_rollups = path + ".v3"
+    shutil.copy(path, without_rollups)
+
+    conn = sqlite3.connect(path)
+    start = time.perf_counter()
+    migrate(conn)
+    backfill = time.perf_counter() - start
+    rollup_rows = {
+        table: conn.execute(f"SELECT COUNT(*) FROM {table};").fetchone()[0]
+        for table in ("expense_rollups", "workout_rollups")
+    }
+    conn.close()
+
+    server = load_server(path)
+    results = {}
+    for label, (table, metrics, group_by, bucket, date_range, filters) in CASES.items():
+        raw = server.aggregate_table(table, metrics, group_by, bucket, date_range=date_range, filters=filters)
+        rolled = server.summarize_totals(table, metrics, group_by, bucket, date_range, filters)
+        if rolled.get("source") != "rollup" or not same_rows(raw["rows"], rolled["rows"]):
+            print(f"warning: '{label}' was not answered from the rollups or returned different results")
+        results[f"{label} [raw]"] = measure(
+            lambda: server.aggregate_table(table, metrics, group_by, bucket, date_range=date_range, filters=filters),
+            args.iterations, warmup=1,
+        )
+        results[f"{label} [rollup]"] = measure(
+            lambda: server.summarize_totals(table, metrics, group_by, bucket, date_range, filters),
+            args.iterations, warmup=1,
+        )
+    server.DB.close()
+
+    print(
+        f"\n{volumes['expenses']:,} expenses and {volumes['workouts']:,} workouts for {volumes['users']:,} users; "
+        f"rollup rows: {rollup_rows['expense_rollups']:,} expense, {rollup_rows['workout_rollups']:,} workout; "
+        f"backfill (migration 4) took {backfill:.1f}s"
+    )
+    print_table("Dashboard totals, aggregate_table vs summarize_totals", results)
+    print("\nbulk insert into expenses, us per row:")
+    print(f"  {'without rollups':<18}{insert_cost(without_rollups):>8.1f}")
+    print(f"  {'with rollups':<18}{insert_cost(path):>8.1f}")
@@ -0,0 +1,59 @@
+"""Benchmark: search_entries (FTS5) vs LIKE '%...%' conditions in query_db_table.
+
+A LIKE condition with a leading wildcard cannot use an index, so finding a
+rare word scans the whole table, and there is no relevance order. The FTS5
+index looks matches up directly and ranks them with bm25.
+
+Usage:
+    python benchmarks/bench_search.py [--rows 500000] [--iterations 20]
+"""
+import argparse
+import sqlite3
+
+from common import load_server, make_temp_database, measure, print_table
+from generate_data import volumes_for
+
+RARE_WORD = "sushi"
+RARE_ROWS = 20
+
+
+def add_rare_rows(database_path: str):
+    # A word the generator never uses, spread over the table
+    conn = sqlite3.connect(database_path)
+    count = conn.execute("SELECT MAX(id) FROM expenses;").fetchone()[0]
+    conn.executemany(
+        "UPDATE expenses SET description = ? WHERE id = ?;",
+        [(f"{RARE_WORD} dinner", count * (i + 1) // (RARE_ROWS + 1)) for i in range(RARE_ROWS)],
+    )
+    conn.commit()
+    conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    volumes = volumes_for(args.rows)
+    database_path = make_temp_database(volumes["expenses"], volumes["workouts"], volumes["habit_logs"], volumes["users"])
+    add_rare_rows(database_path)
+    server = load_server(database_path)
+
+    results = {}
+    for word in ("coffee", RARE_WORD):
+        like = f"description LIKE '%{word}%'"
+        results[f"'{word}' LIKE first page"] = measure(
+            lambda: server.query_db_table("expenses", "id, description", like, limit=20), args.iterations, warmup=2
+        )
+        results[f"'{word}' LIKE count all"] = measure(
+            lambda: server.aggregate_table("expenses", "COUNT(*)", conditions=like), args.iterations, warmup=2
+        )
+        results[f"'{word}' FTS top 20 ranked"] = measure(
+            lambda: server.search_entries(word, "expenses", limit=20), args.iterations, warmup=2
+        )
+        results[f"'{word}' FTS all tables"] = measure(
+            lambda: server.search_entries(word, limit=20), args.iterations, warmup=2
+        )
+
+    print_table(f"Searching expense descriptions, {volumes['expenses']:,} expense rows", results)
@@ -0,0 +1,96 @@
+"""Benchmark: time until a freshly spawned stdio server answers its first tool call.
+
+Each run spawns `server.py`, then times initialize, list_tools and one
+tool call. "cold schema cache" starts without a tool schema cache file, so
+the server imports google-adk and generates the schemas (the cost every
+spawn paid before the cache existed); "warm schema cache" reuses the file
+written by an earlier run. The import time of `server.py` alone is
+reported as well.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from common import DB_AGENT_DIR, make_temp_database
+
+IMPORT_SCRIPT = (
+    "import sys, time; start = time.perf_counter(); import server; "
+    "print((time.perf_counter() - start) * 1000, 'google.adk' in sys.modules)"
+)
+
+
+async def first_response(env: dict) -> dict:
+    """Spawns a server and returns milliseconds until each startup milestone."""
+    params = StdioServerParameters(command=sys.executable, args=[str(DB_AGENT_DIR / "server.py")], env=env)
+    start = time.perf_counter()
+    async with stdio_client(params) as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            initialized = time.perf_counter()
+            tools = await session.list_tools()
+            listed = time.perf_counter()
+            await session.call_tool("list_db_tables", {"dummy_param": "x"})
+            called = time.perf_counter()
+    return {
+        "initialize": (initialized - start) * 1000,
+        "list_tools": (listed - start) * 1000,
+        "first call": (called - start) * 1000,
+        "tools": len(tools.tools),
+    }
+
+
+def import_time(env: dict) -> tuple[float, bool]:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT], cwd=DB_AGENT_DIR, env=env,
+        capture_output=True, text=True, check=True,
+    ).stdout.split()
+    return float(output[0]), output[1] == "True"
+
+
+async def main(runs: int):
+    database_path = make_temp_database(1_000)
+    work_dir = tempfile.mkdtemp(prefix="life_tracker_startup_")
+    schema_cache = os.path.join(work_dir, "tool_schemas.json")
+    env = {
+        **os.environ,
+        "LIFE_TRACKER_DB_PATH": database_path,
+        "DB_STATS_FILE": os.path.join(work_dir, "server_stats.json"),
+        "DB_TOOL_SCHEMA_CACHE": schema_cache,
+    }
+
+    results = {"cold schema cache": [], "warm schema cache": []}
+    for _ in range(runs):
+        if os.path.exists(schema_cache):
+            os.remove(schema_cache)
+        results["cold schema cache"].append(await first_response(env))
+        results["warm schema cache"].append(await first_response(env))
+
+    imports = [import_time(env) for _ in range(runs)]
+
+    print(f"\nmedian ms since spawn over {runs} runs, {results['warm schema cache'][0]['tools']} tools")
+    print(f"{'case':<22}{'initialize':>12}{'list_tools':>12}{'first call':>12}")
+    for label, samples in results.items():
+        medians = [statistics.median(sample[key] for sample in samples) for key in ("initialize", "list_tools", "first call")]
+        print(f"{label:<22}" + "".join(f"{value:>12.0f}" for value in medians))
+    print(
+        f"\nimport server.py: {statistics.median(t for t, _ in imports):.0f} ms "
+        f"(google.adk imported: {any(loaded for _, loaded in imports)})"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.runs))
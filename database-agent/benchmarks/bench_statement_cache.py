@@ -0,0 +1,158 @@
+"""Benchmark: statement-cache hit rates and latency, raw conditions vs structured filters.
+
+The same agent-like workload (per-user queries, aggregates, updates and
+deletes with varying values) is run twice through the server tools: once
+with values spliced into `conditions` strings, once with `filters`. Every
+SQL text the tools execute is recorded and replayed through an LRU of the
+connection's `cached_statements` size, which is how Python's sqlite3 module
+decides whether it can reuse a prepared statement. Latency is measured on
+the real calls.
+
+Usage:
+    python benchmarks/bench_statement_cache.py [--rows 200000] [--calls 2000]
+"""
+import argparse
+import random
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from common import load_server, make_temp_database
+
+CATEGORIES = ["food", "transport", "entertainment", "utilities", "health", "shopping", "travel"]
+
+
+class RecordingCursor:
+    def __init__(self, cursor, log: list):
+        self._cursor = cursor
+        self._log = log
+
+    def execute(self, sql, *args):
+        self._log.append(sql)
+        return self._cursor.execute(sql, *args)
+
+    def executemany(self, sql, *args):
+        self._log.append(sql)
+        return self._cursor.executemany(sql, *args)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class RecordingConnection(RecordingCursor):
+    def cursor(self):
+        return RecordingCursor(self._cursor.cursor(), self._log)
+
+
+def record_sql(db, log: list):
+    """Makes `db` hand out connections that append every executed SQL text to `log`."""
+    reader, writer = db.reader, db.writer
+
+    @contextmanager
+    def recording_reader():
+        with reader() as conn:
+            yield RecordingConnection(conn, log)
+
+    @contextmanager
+    def recording_writer():
+        with writer() as conn:
+            yield RecordingConnection(conn, log)
+
+    db.reader, db.writer = recording_reader, recording_writer
+
+
+def cache_hit_rate(statements: list[str], size: int) -> float:
+    cache = OrderedDict()
+    hits = 0
+    for sql in statements:
+        if sql in cache:
+            hits += 1
+            cache.move_to_end(sql)
+        else:
+            cache[sql] = None
+            if len(cache) > size:
+                cache.popitem(last=False)
+    return hits / len(statements) if statements else 0.0
+
+
+def workload(server, structured: bool, calls: int, max_id: int, seed: int = 7):
+    """Yields (label, zero-argument call) pairs with randomized values."""
+    rng = random.Random(seed)
+    for i in range(calls):
+        user_id = rng.randint(1, 20)
+        category = rng.choice(CATEGORIES)
+        amount = round(rng.uniform(5, 200), 2)
+        row_id = rng.randint(1, max_id)
+        kind = i % 4
+        if kind == 0:
+            if structured:
+                filters = [
+                    {"column": "user_id", "op": "=", "value": user_id},
+                    {"column": "category", "op": "=", "value": category},
+                    {"column": "amount", "op": ">", "value": amount},
+                ]
+                yield "query", lambda f=filters: server.query_db_table("expenses", "id, amount, date", limit=20, filters=f)
+            else:
+                condition = f"user_id = {user_id} AND category = '{category}' AND amount > {amount}"
+                yield "query", lambda c=condition: server.query_db_table("expenses", "id, amount, date", c, limit=20)
+        elif kind == 1:
+            if structured:
+                filters = [{"column": "user_id", "op": "=", "value": user_id}]
+                yield "aggregate", lambda f=filters: server.aggregate_table("expenses", "SUM(amount)", "category", filters=f)
+            else:
+                yield "aggregate", lambda c=f"user_id = {user_id}": server.aggregate_table("expenses", "SUM(amount)", "category", conditions=c)
+        elif kind == 2:
+            data = {"description": f"note {i}"}
+            if structured:
+                filters = [{"column": "id", "op": "=", "value": row_id}]
+                yield "update", lambda f=filters, d=data: server.update_data_in_table("expenses", d, filters=f)
+            else:
+                yield "update", lambda c=f"id = {row_id}", d=data: server.update_data_in_table("expenses", d, c)
+        else:
+            # Ids past the end of the table: exercises the delete path without removing rows
+            ids = [max_id + rng.randint(1, 10_000) for _ in range(rng.randint(1, 5))]
+            if structured:
+                filters = [{"column": "id", "op": "in", "value": ids}]
+                yield "delete", lambda f=filters: server.delete_data_from_table("expenses", filters=f)
+            else:
+                yield "delete", lambda c=f"id IN ({', '.join(map(str, ids))})": server.delete_data_from_table("expenses", c)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    database_path = make_temp_database(args.rows, users=20)
+    server = load_server(database_path)
+    log = []
+    record_sql(server.DB, log)
+
+    print(f"\n{args.calls} calls on {args.rows:,} expenses, statement cache size {server.DB.statement_cache_size}")
+    print(f"{'workload':<14}{'tool':<12}{'calls':>7}{'distinct SQL':>14}{'hit rate':>10}{'mean (us)':>12}")
+    for structured in (False, True):
+        label = "filters" if structured else "raw strings"
+        per_tool = {}
+        for tool, call in workload(server, structured, args.calls, args.rows):
+            start = len(log)
+            began = time.perf_counter()
+            response = call()
+            elapsed = (time.perf_counter() - began) * 1e6
+            if not response.get("success", True):
+                raise SystemExit(f"{tool} failed: {response['message']}")
+            stats = per_tool.setdefault(tool, {"sql": [], "us": []})
+            stats["sql"].extend(log[start:])
+            stats["us"].append(elapsed)
+        everything = []
+        for tool, stats in per_tool.items():
+            everything.extend(stats["sql"])
+            print(
+                f"{label:<14}{tool:<12}{len(stats['us']):>7}{len(set(stats['sql'])):>14}"
+                f"{cache_hit_rate(stats['sql'], server.DB.statement_cache_size):>10.1%}"
+                f"{sum(stats['us']) / len(stats['us']):>12.1f}"
+            )
+        print(
+            f"{label:<14}{'all':<12}{args.calls:>7}{len(set(everything)):>14}"
+            f"{cache_hit_rate(everything, server.DB.statement_cache_size):>10.1%}"
+        )
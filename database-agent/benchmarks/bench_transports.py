@@ -0,0 +1,117 @@
+"""Benchmark: a spawned stdio server per session vs one shared HTTP server.
+
+Cold start is the time a new agent session waits from connecting until its
+first tool response: over stdio that includes spawning the interpreter,
+importing the server and opening the database; over HTTP the server is
+already running and warm. Per-call latency is then measured inside one
+session for each transport.
+
+Usage:
+    python benchmarks/bench_transports.py [--sessions 5] [--calls 200] [--port 8765]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+
+from common import DB_AGENT_DIR, make_temp_database
+
+FIRST_CALL = ("list_db_tables", {"dummy_param": "x"})
+CALLS = [
+    ("get_table_schema", {"table_name": "expenses"}),
+    ("query_db_table", {"table_name": "expenses", "columns": "*", "conditions": "user_id = 1", "limit": 20}),
+]
+
+
+def server_env(database_path: str) -> dict:
+    # Disable the query cache so every call does the same work on both transports
+    return {**os.environ, "LIFE_TRACKER_DB_PATH": database_path, "DB_QUERY_CACHE_ENTRIES": "0"}
+
+
+async def session_timings(connect, calls: int) -> tuple[float, list[float]]:
+    """Opens one session; returns its cold start and per-call latencies in ms."""
+    start = time.perf_counter()
+    async with connect() as streams:
+        async with ClientSession(streams[0], streams[1]) as session:
+            await session.initialize()
+            await session.call_tool(*FIRST_CALL)
+            cold_start = (time.perf_counter() - start) * 1000
+            samples = []
+            for i in range(calls):
+                call_start = time.perf_counter()
+                await session.call_tool(*CALLS[i % len(CALLS)])
+                samples.append((time.perf_counter() - call_start) * 1000)
+    return cold_start, samples
+
+
+def wait_for_port(port: int, timeout: float = 30.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.05)
+    raise TimeoutError(f"HTTP server did not start on port {port}")
+
+
+def summarize(label: str, cold_starts: list[float], samples: list[float]):
+    samples = sorted(samples)
+    print(
+        f"{label:<10}{statistics.median(cold_starts):>16.1f}{max(cold_starts):>14.1f}"
+        f"{samples[len(samples) // 2]:>12.2f}{samples[int(len(samples) * 0.95) - 1]:>12.2f}"
+    )
+
+
+async def main(sessions: int, calls: int, port: int):
+    database_path = make_temp_database(10_000)
+    env = server_env(database_path)
+    server_script = str(DB_AGENT_DIR / "server.py")
+
+    stdio_params = StdioServerParameters(command=sys.executable, args=[server_script], env=env)
+    stdio_cold, stdio_samples = [], []
+    for _ in range(sessions):
+        cold_start, samples = await session_timings(lambda: stdio_client(stdio_params), calls)
+        stdio_cold.append(cold_start)
+        stdio_samples.extend(samples)
+
+    server_start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, server_script, "--transport", "http", "--port", str(port)],
+        env=env, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(port)
+        server_ready = (time.perf_counter() - server_start) * 1000
+        http_cold, http_samples = [], []
+        for _ in range(sessions):
+            cold_start, samples = await session_timings(
+                lambda: streamablehttp_client(f"http://127.0.0.1:{port}/mcp"), calls
+            )
+            http_cold.append(cold_start)
+            http_samples.extend(samples)
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"\n{sessions} sessions x {calls} calls, {os.cpu_count()} CPU(s)")
+    print(f"{'transport':<10}{'cold start p50':>16}{'cold max':>14}{'call p50':>12}{'call p95':>12}   (ms)")
+    summarize("stdio", stdio_cold, stdio_samples)
+    summarize("http", http_cold, http_samples)
+    print(f"\nshared HTTP server startup (paid once): {server_ready:.0f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=5)
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    asyncio.run(main(args.sessions, args.calls, args.port))
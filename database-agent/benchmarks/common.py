@@ -0,0 +1,70 @@
+import contextlib
+import importlib.util
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from generate_data import populate
+
+DB_AGENT_DIR = Path(__file__).resolve().parent.parent / "db-agent"
+
+
+def load_create_db():
+    """Imports `create-db.py`, whose file name is not a valid module name."""
+    if str(DB_AGENT_DIR) not in sys.path:
+        sys.path.insert(0, str(DB_AGENT_DIR))
+    spec = importlib.util.spec_from_file_location("create_db", DB_AGENT_DIR / "create-db.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_temp_database(expense_rows: int = 10_000, workout_rows: int = 0, habit_log_rows: int = 0, users: int = 3) -> str:
+    """Creates a life-tracker database in a temp dir and fills it with synthetic data.
+
+    Returns:
+        str: Path to the new database file.
+    """
+    database_path = os.path.join(tempfile.mkdtemp(prefix="life_tracker_bench_"), "life_tracker.db")
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_create_db().create_db(database_path)
+    populate(database_path, expenses=expense_rows, workouts=workout_rows, habit_logs=habit_log_rows, users=users)
+    return database_path
+
+
+def load_server(database_path: str):
+    """Imports `server.py` pointed at `database_path`."""
+    os.environ["LIFE_TRACKER_DB_PATH"] = database_path
+    if str(DB_AGENT_DIR) not in sys.path:
+        sys.path.insert(0, str(DB_AGENT_DIR))
+    import server
+    return server
+
+
+def measure(func, iterations: int, warmup: int = 10) -> dict:
+    """Calls `func` repeatedly and returns latency percentiles in microseconds."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {
+        "mean_us": statistics.fmean(samples),
+        "p50_us": samples[len(samples) // 2],
+        "p95_us": samples[int(len(samples) * 0.95) - 1],
+    }
+
+
+def print_table(title: str, results: dict):
+    """Prints `{label: measure(...)}` results as an aligned table."""
+    print(f"\n{title}")
+    print(f"{'case':<40}{'mean (us)':>12}{'p50 (us)':>12}{'p95 (us)':>12}")
+    for label, stats in results.items():
+        print(f"{label:<40}{stats['mean_us']:>12.1f}{stats['p50_us']:>12.1f}{stats['p95_us']:>12.1f}")
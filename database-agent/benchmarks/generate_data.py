@@ -0,0 +1,284 @@
+"""Synthetic data generator for the life-tracker database.
+
+Fills `users`, `expenses`, `workouts`, `habits` and `habit_logs` with
+realistic distributions: a few heavy users and a long tail of light ones,
+log-normal amounts per expense category, workout calories driven by type
+and duration, and streaky (Markov) habit completion.
+
+Usage:
+    python benchmarks/generate_data.py --rows 1000000 --output /tmp/life_tracker.db
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import math
+import os
+import random
+import sqlite3
+import time
+from datetime import date, timedelta
+
+# category -> (weight, log-normal mu, sigma, descriptions)
+EXPENSE_CATEGORIES = {
+    "food": (0.35, 2.7, 0.6, ["groceries", "lunch", "coffee", "dinner out", "takeaway", "bakery"]),
+    "transport": (0.15, 2.5, 0.7, ["bus ticket", "taxi", "fuel", "train", "parking"]),
+    "shopping": (0.12, 3.5, 0.9, ["clothes", "electronics", "books", "home goods", "gift"]),
+    "entertainment": (0.10, 3.0, 0.7, ["cinema", "concert", "streaming subscription", "games", "museum"]),
+    "utilities": (0.08, 4.3, 0.3, ["electricity bill", "water bill", "internet", "phone plan"]),
+    "health": (0.07, 3.6, 0.8, ["pharmacy", "doctor visit", "gym membership", "dentist"]),
+    "travel": (0.05, 5.0, 0.9, ["flight", "hotel", "car rental", "tour"]),
+    "rent": (0.03, 7.0, 0.1, ["monthly rent"]),
+    "other": (0.05, 3.0, 1.0, ["donation", "fees", "miscellaneous"]),
+}
+
+# type -> (weight, mean minutes, calories per minute)
+WORKOUT_TYPES = {
+    "running": (0.25, 40, 10.5),
+    "strength": (0.20, 50, 6.0),
+    "cycling": (0.15, 60, 8.0),
+    "walking": (0.15, 45, 4.0),
+    "yoga": (0.10, 45, 3.0),
+    "swimming": (0.08, 40, 9.0),
+    "hiit": (0.07, 25, 12.0),
+}
+WORKOUT_NOTES = ["felt great", "tired today", "new personal best", "easy recovery session", "with a friend"]
+
+# name -> (frequency, description)
+HABITS = {
+    "meditation": ("daily", "10 minutes of mindfulness"),
+    "reading": ("daily", "read at least 20 pages"),
+    "exercise": ("daily", "move for 30 minutes"),
+    "journaling": ("daily", "write down three thoughts"),
+    "drink water": ("daily", "8 glasses of water"),
+    "no sugar": ("daily", "skip sweets and soda"),
+    "weekly review": ("weekly", "plan the next week"),
+    "call family": ("weekly", "catch up with family"),
+    "deep clean": ("weekly", "clean the apartment"),
+}
+
+# Share of --rows going to each table
+ROW_SPLIT = {"expenses": 0.50, "workouts": 0.15, "habit_logs": 0.35}
+BATCH_SIZE = 50_000
+
+
+def user_weights(user_ids: list[int]) -> list[float]:
+    """Cumulative Zipf-like activity: a few heavy users and a long tail of light ones."""
+    return list(itertools.accumulate(1 / (rank + 1) ** 0.8 for rank in range(len(user_ids))))
+
+
+def random_day(rng: random.Random, start: date, span_days: int) -> date:
+    # Skewed towards recent dates, as usage tends to grow over time
+    return start + timedelta(days=int(span_days * rng.random() ** 0.8))
+
+
+def timestamp(rng: random.Random, day: date) -> str:
+    return f"{day.isoformat()} {rng.randrange(7, 23):02d}:{rng.randrange(60):02d}:{rng.randrange(60):02d}"
+
+
+def generate_users(rng: random.Random, first_id: int, count: int, start: date, span_days: int):
+    for user_id in range(first_id, first_id + count):
+        yield (f"user{user_id}", f"user{user_id}@example.com", timestamp(rng, random_day(rng, start, span_days)))
+
+
+def generate_expenses(rng: random.Random, count: int, user_ids: list[int], start: date, span_days: int):
+    categories = list(EXPENSE_CATEGORIES)
+    category_weights = list(itertools.accumulate(EXPENSE_CATEGORIES[c][0] for c in categories))
+    weights = user_weights(user_ids)
+    for _ in range(count):
+        category = rng.choices(categories, cum_weights=category_weights)[0]
+        _, mu, sigma, descriptions = EXPENSE_CATEGORIES[category]
+        day = random_day(rng, start, span_days)
+        created = timestamp(rng, day)
+        yield (
+            rng.choices(user_ids, cum_weights=weights)[0],
+            round(rng.lognormvariate(mu, sigma), 2),
+            category,
+            rng.choice(descriptions),
+            day.isoformat(),
+            created,
+            created,
+        )
+
+
+def generate_workouts(rng: random.Random, count: int, user_ids: list[int], start: date, span_days: int):
+    types = list(WORKOUT_TYPES)
+    type_weights = list(itertools.accumulate(WORKOUT_TYPES[t][0] for t in types))
+    weights = user_weights(user_ids)
+    for _ in range(count):
+        workout_type = rng.choices(types, cum_weights=type_weights)[0]
+        _, mean_minutes, calories_per_minute = WORKOUT_TYPES[workout_type]
+        minutes = int(min(max(rng.gauss(mean_minutes, mean_minutes * 0.3), 10), 180))
+        day = random_day(rng, start, span_days)
+        created = timestamp(rng, day)
+        yield (
+            rng.choices(user_ids, cum_weights=weights)[0],
+            workout_type,
+            minutes,
+            int(minutes * calories_per_minute * rng.uniform(0.8, 1.2)),
+            day.isoformat(),
+            rng.choice(WORKOUT_NOTES) if rng.random() < 0.3 else None,
+            created,
+            created,
+        )
+
+
+def generate_habits(rng: random.Random, user_ids: list[int], habits_per_user: int, start: date, span_days: int):
+    names = list(HABITS)
+    for user_id in user_ids:
+        for name in rng.sample(names, min(habits_per_user, len(names))):
+            frequency, description = HABITS[name]
+            created = timestamp(rng, start)
+            target = 1 if frequency == "daily" else rng.randint(1, 3)
+            yield (user_id, name, description, frequency, target, created, created)
+
+
+def generate_habit_logs(rng: random.Random, habits: list[tuple[int, str]], count: int, end: date):
+    """Logs each habit backwards from `end`, one entry per period.
+
+    Completion follows a two-state Markov chain so logs come in streaks;
+    each habit gets its own consistency level.
+    """
+    per_habit = max(1, math.ceil(count / max(len(habits), 1)))
+    produced = 0
+    for habit_id, frequency in habits:
+        step = 7 if frequency == "weekly" else 1
+        consistency = rng.uniform(0.5, 0.95)
+        completed = rng.random() < consistency
+        for period in range(per_habit):
+            if produced >= count:
+                return
+            stay = consistency if completed else 1 - consistency
+            completed = completed if rng.random() < stay else not completed
+            day = end - timedelta(days=period * step)
+            note = "done" if completed and rng.random() < 0.1 else None
+            yield (habit_id, day.isoformat(), int(completed), note)
+            produced += 1
+
+
+def insert_batches(conn: sqlite3.Connection, statement: str, rows) -> int:
+    inserted = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            conn.executemany(statement, batch)
+            inserted += len(batch)
+            batch.clear()
+    if batch:
+        conn.executemany(statement, batch)
+        inserted += len(batch)
+    conn.commit()
+    return inserted
+
+
+def populate(
+    database_path: str,
+    expenses: int = 0,
+    workouts: int = 0,
+    habit_logs: int = 0,
+    users: int = 3,
+    habits_per_user: int = 5,
+    years: int = 3,
+    seed: int = 42,
+) -> dict:
+    """Adds synthetic rows to an existing life-tracker database.
+
+    Args:
+        database_path (str): Database created by `create-db.py`.
+        expenses, workouts, habit_logs (int): Rows to generate per table.
+        users (int): Total number of users wanted, including existing ones.
+        habits_per_user (int): Habits created per user when habit_logs > 0.
+        years (int): How far back the generated dates go.
+        seed (int): Random seed, for reproducible datasets.
+
+    Returns:
+        dict: Rows inserted per table.
+    """
+    rng = random.Random(seed)
+    end = date.today()
+    start = end - timedelta(days=365 * years)
+    span_days = (end - start).days
+
+    conn = sqlite3.connect(database_path)
+    conn.execute("PRAGMA synchronous=OFF;")
+    inserted = {}
+    try:
+        existing_users = conn.execute("SELECT COUNT(*), COALESCE(MAX(id), 0) FROM users;").fetchone()
+        inserted["users"] = insert_batches(
+            conn,
+            "INSERT INTO users (username, email, created_at) VALUES (?, ?, ?)",
+            generate_users(rng, existing_users[1] + 1, max(users - existing_users[0], 0), start, span_days),
+        )
+        user_ids = [row[0] for row in conn.execute("SELECT id FROM users ORDER BY id;")]
+
+        inserted["expenses"] = insert_batches(
+            conn,
+            "INSERT INTO expenses (user_id, amount, category, description, date, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            generate_expenses(rng, expenses, user_ids, start, span_days),
+        )
+        inserted["workouts"] = insert_batches(
+            conn,
+            "INSERT INTO workouts (user_id, type, duration_minutes, calories_burned, date, notes, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            generate_workouts(rng, workouts, user_ids, start, span_days),
+        )
+        if habit_logs:
+            inserted["habits"] = insert_batches(
+                conn,
+                "INSERT INTO habits (user_id, name, description, frequency, target, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                generate_habits(rng, user_ids, habits_per_user, start, span_days),
+            )
+            habits = conn.execute("SELECT id, frequency FROM habits ORDER BY id;").fetchall()
+            inserted["habit_logs"] = insert_batches(
+                conn,
+                "INSERT INTO habit_logs (habit_id, date, status, notes) VALUES (?, ?, ?, ?)",
+                generate_habit_logs(rng, habits, habit_logs, end),
+            )
+        conn.execute("ANALYZE;")
+        conn.commit()
+    finally:
+        conn.close()
+    return inserted
+
+
+def volumes_for(rows: int) -> dict:
+    """Splits a total row count across tables, with one user per ~2000 rows."""
+    volumes = {table: int(rows * share) for table, share in ROW_SPLIT.items()}
+    volumes["users"] = max(3, rows // 2000)
+    return volumes
+
+
+def create_database(database_path: str, **volumes) -> dict:
+    """Creates a fresh database with `create-db.py` and populates it."""
+    from common import load_create_db
+
+    if os.path.exists(database_path):
+        raise FileExistsError(f"{database_path} already exists")
+    with contextlib.redirect_stdout(io.StringIO()):
+        load_create_db().create_db(database_path)
+    return populate(database_path, **volumes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", required=True, help="Path of the new database file")
+    parser.add_argument("--rows", type=int, default=10_000, help="Total rows across expenses, workouts and habit_logs")
+    parser.add_argument("--users", type=int, help="Number of users (default: one per 2000 rows)")
+    parser.add_argument("--habits-per-user", type=int, default=5)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    volumes = volumes_for(args.rows)
+    if args.users:
+        volumes["users"] = args.users
+    started = time.perf_counter()
+    inserted = create_database(
+        args.output, habits_per_user=args.habits_per_user, years=args.years, seed=args.seed, **volumes
+    )
+    print(f"Created {args.output} in {time.perf_counter() - started:.1f}s")
+    for table, count in inserted.items():
+        print(f"  {table:<12}{count:>12,}")
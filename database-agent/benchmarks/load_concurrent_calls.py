@@ -0,0 +1,91 @@
+"""Load test: do concurrent MCP tool calls overlap over the stdio transport?
+
+Spawns `server.py` as an MCP stdio server, then issues N slow read calls one
+after another and again all at once. With tools dispatched to worker threads
+the concurrent batch should take roughly (N / read pool size) slow calls on a
+multi-core machine, and `list_tools` and cheap queries should answer
+immediately while the slow calls are in flight. On a single core the slow
+calls still run interleaved (they finish together rather than one by one).
+Calls beyond the read pool size wait for a free worker by design.
+
+Usage:
+    python benchmarks/load_concurrent_calls.py [--calls 3] [--loop-size 3000000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from common import DB_AGENT_DIR, make_temp_database
+
+
+def slow_query_arguments(loop_size: int) -> dict:
+    # A recursive CTE evaluated once per call keeps SQLite busy for a while
+    condition = (
+        f"(WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < {loop_size}) "
+        "SELECT COUNT(*) FROM c) > 0 AND id = 1"
+    )
+    return {"table_name": "expenses", "columns": "id, amount", "conditions": condition}
+
+
+async def timed(coro) -> float:
+    start = time.perf_counter()
+    await coro
+    return time.perf_counter() - start
+
+
+async def main(calls: int, loop_size: int):
+    database_path = make_temp_database(1_000)
+    params = StdioServerParameters(
+        command=sys.executable,
+        args=[str(DB_AGENT_DIR / "server.py")],
+        # Every call is identical, so the query cache would answer all but the first
+        env={**os.environ, "LIFE_TRACKER_DB_PATH": database_path, "DB_QUERY_CACHE_ENTRIES": "0"},
+    )
+    arguments = slow_query_arguments(loop_size)
+
+    async with stdio_client(params) as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            await session.list_tools()
+
+            single = await timed(session.call_tool("query_db_table", arguments))
+
+            sequential = 0.0
+            for _ in range(calls):
+                sequential += await timed(session.call_tool("query_db_table", arguments))
+
+            batch_start = time.perf_counter()
+            finished_at = []
+
+            async def slow_call():
+                await session.call_tool("query_db_table", arguments)
+                finished_at.append(time.perf_counter() - batch_start)
+
+            batch = asyncio.gather(*[slow_call() for _ in range(calls)])
+            await asyncio.sleep(single / 4)
+            list_tools_latency = await timed(session.list_tools())
+            fast_query_latency = await timed(
+                session.call_tool("query_db_table", {"table_name": "users", "columns": "*", "conditions": ""})
+            )
+            await batch
+            concurrent = time.perf_counter() - batch_start
+
+    print(f"\n{calls} x slow query_db_table, single call {single * 1000:.0f} ms, {os.cpu_count()} CPU(s)")
+    print(f"{'sequential total':<40}{sequential * 1000:>10.0f} ms")
+    print(f"{'concurrent total':<40}{concurrent * 1000:>10.0f} ms")
+    print(f"{'overlap speed-up':<40}{sequential / concurrent:>10.2f} x")
+    print(f"{'concurrent completion times':<40}{', '.join(f'{t * 1000:.0f}' for t in sorted(finished_at))} ms")
+    print(f"{'list_tools during slow calls':<40}{list_tools_latency * 1000:>10.1f} ms")
+    print(f"{'fast query during slow calls':<40}{fast_query_latency * 1000:>10.1f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=3)
+    parser.add_argument("--loop-size", type=int, default=3_000_000)
+    args = parser.parse_args()
+    asyncio.run(main(args.calls, args.loop_size))
@@ -0,0 +1,195 @@
+"""Benchmark harness: every server.py tool, called directly and over MCP stdio.
+
+Generates a synthetic database (see generate_data.py), then for each
+scenario reports latency percentiles and throughput when the tool function
+is called in-process, the peak Python memory allocated by one call, and the
+same latency/throughput through a spawned `server.py` over stdio, plus the
+server's peak RSS. The server's query cache is disabled unless --cache is
+given, so repeated calls measure the real work.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--rows 100000] [--iterations 50] [--database PATH] [--cache]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+from common import DB_AGENT_DIR, load_server, make_temp_database, measure
+from generate_data import volumes_for
+
+BENCHMARK_EXPENSE = {
+    "user_id": 1, "amount": 9.99, "category": "food", "description": "benchmark row", "date": "2025-01-01",
+    "created_at": "2025-01-01 12:00:00", "updated_at": "2025-01-01 12:00:00",
+}
+
+# (label, tool name, arguments)
+SCENARIOS = [
+    ("list_db_tables", "list_db_tables", {"dummy_param": "x"}),
+    ("get_table_schema", "get_table_schema", {"table_name": "expenses"}),
+    ("describe_database", "describe_database", {"dummy_param": "x"}),
+    ("query first page", "query_db_table", {"table_name": "expenses", "columns": "*", "conditions": ""}),
+    (
+        "query 1000 rows of one user",
+        "query_db_table",
+        {"table_name": "expenses", "columns": "*", "conditions": "user_id = 2", "limit": 1000},
+    ),
+    (
+        "query latest workouts",
+        "query_db_table",
+        {"table_name": "workouts", "columns": "*", "conditions": "user_id = 1", "order_by": "date desc"},
+    ),
+    (
+        "aggregate spend per month/category",
+        "aggregate_table",
+        {"table_name": "expenses", "metrics": "SUM(amount), COUNT(*)", "group_by": "category",
+         "time_bucket": "month", "conditions": "user_id = 1"},
+    ),
+    (
+        "aggregate workouts per type",
+        "aggregate_table",
+        {"table_name": "workouts", "metrics": "AVG(duration_minutes), SUM(calories_burned)", "group_by": "type"},
+    ),
+    (
+        "aggregate weekly spend, last 90 days",
+        "aggregate_table",
+        {"table_name": "expenses", "metrics": "SUM(amount)", "time_bucket": "week",
+         "conditions": "user_id = 1", "date_range": "last 90 days"},
+    ),
+    (
+        "explain_query",
+        "explain_query",
+        {"table_name": "expenses", "columns": "*", "conditions": "user_id = 1 AND date >= '2024-01-01'"},
+    ),
+    ("get_habit_streaks one user", "get_habit_streaks", {"user_id": 1}),
+    ("search_entries rare word", "search_entries", {"query": "museum", "limit": 20}),
+    (
+        "insert expense",
+        "insert_data_into_table",
+        {"table_name": "expenses", "data": BENCHMARK_EXPENSE},
+    ),
+    (
+        "insert 100 expenses",
+        "insert_rows_into_table",
+        {"table_name": "expenses", "rows": [BENCHMARK_EXPENSE] * 100},
+    ),
+    (
+        "update expense by id",
+        "update_data_in_table",
+        {"table_name": "expenses", "data": {"amount": 12.5}, "condition": "id = 1"},
+    ),
+    (
+        "delete benchmark rows",
+        "delete_data_from_table",
+        {"table_name": "expenses", "condition": "id > 0 AND description = 'benchmark row'"},
+    ),
+    ("get_query_cache_stats", "get_query_cache_stats", {"dummy_param": "x"}),
+    ("server_stats", "server_stats", {"dummy_param": "x"}),
+]
+
+
+def direct_results(server, iterations: int) -> dict:
+    """Latency, throughput and peak traced memory of in-process tool calls."""
+    server.QUERY_CACHE.clear()
+    results = {}
+    for label, tool_name, arguments in SCENARIOS:
+        func = getattr(server, tool_name)
+        stats = measure(lambda: func(**arguments), iterations, warmup=3)
+
+        tracemalloc.start()
+        response = func(**arguments)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        stats["calls_per_second"] = 1e6 / stats["mean_us"]
+        stats["peak_kib"] = peak / 1024
+        stats["payload_bytes"] = len(server.dumps_response(response))
+        stats["success"] = bool(response.get("success", True))
+        results[label] = stats
+    return results
+
+
+async def stdio_results(database_path: str, iterations: int, cache: bool) -> tuple[dict, dict]:
+    """Latency and throughput of tool calls through a spawned stdio server."""
+    env = {
+        **os.environ,
+        "LIFE_TRACKER_DB_PATH": database_path,
+        "DB_STATS_FILE": os.path.join(tempfile.mkdtemp(prefix="life_tracker_stats_"), "server_stats.json"),
+    }
+    if not cache:
+        env["DB_QUERY_CACHE_ENTRIES"] = "0"
+    params = StdioServerParameters(command=sys.executable, args=[str(DB_AGENT_DIR / "server.py")], env=env)
+
+    results = {}
+    async with stdio_client(params) as (read_stream, write_stream):
+        async with ClientSession(read_stream, write_stream) as session:
+            await session.initialize()
+            await session.list_tools()
+            for label, tool_name, arguments in SCENARIOS:
+                for _ in range(3):
+                    await session.call_tool(tool_name, arguments)
+                samples = []
+                batch_start = time.perf_counter()
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    await session.call_tool(tool_name, arguments)
+                    samples.append((time.perf_counter() - start) * 1e6)
+                elapsed = time.perf_counter() - batch_start
+                samples.sort()
+                results[label] = {
+                    "p50_us": samples[len(samples) // 2],
+                    "p95_us": samples[int(len(samples) * 0.95) - 1],
+                    "calls_per_second": iterations / elapsed,
+                }
+            stats = await session.call_tool("server_stats", {"dummy_param": "x"})
+    return results, json.loads(stats.content[0].text)
+
+
+def print_results(direct: dict, stdio: dict):
+    print(
+        f"\n{'scenario':<36}{'p50 (us)':>10}{'p95 (us)':>10}{'calls/s':>10}{'peak KiB':>10}{'bytes':>10}"
+        f"{'stdio p50':>11}{'stdio p95':>11}{'stdio/s':>9}"
+    )
+    for label, stats in direct.items():
+        remote = stdio.get(label, {})
+        flag = "" if stats["success"] else " (failed)"
+        print(
+            f"{label + flag:<36}{stats['p50_us']:>10.0f}{stats['p95_us']:>10.0f}{stats['calls_per_second']:>10.0f}"
+            f"{stats['peak_kib']:>10.0f}{stats['payload_bytes']:>10}"
+            f"{remote.get('p50_us', 0):>11.0f}{remote.get('p95_us', 0):>11.0f}{remote.get('calls_per_second', 0):>9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000, help="Total synthetic rows to generate")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--database", help="Use an existing database instead of generating one")
+    parser.add_argument("--cache", action="store_true", help="Keep the server's query cache enabled")
+    parser.add_argument("--skip-stdio", action="store_true")
+    args = parser.parse_args()
+
+    if args.database:
+        database_path = args.database
+    else:
+        volumes = volumes_for(args.rows)
+        started = time.perf_counter()
+        database_path = make_temp_database(
+            volumes["expenses"], volumes["workouts"], volumes["habit_logs"], volumes["users"]
+        )
+        print(f"Generated {args.rows:,} rows in {time.perf_counter() - started:.1f}s: {database_path}")
+
+    direct = direct_results(load_server(database_path), args.iterations)
+    stdio, server_stats = ({}, {}) if args.skip_stdio else asyncio.run(
+        stdio_results(database_path, args.iterations, args.cache)
+    )
+    print_results(direct, stdio)
+    if server_stats:
+        print(f"\nserver peak RSS: {server_stats['max_rss_kb'] / 1024:.1f} MiB")
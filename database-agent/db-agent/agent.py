@@ -1,23 +1,35 @@
+import os
 from pathlib import Path
 
 from google.adk.agents import LlmAgent
 from google.adk.tools.mcp_tool.mcp_toolset import MCPToolset, StdioServerParameters
+from google.adk.tools.mcp_tool import StreamableHTTPConnectionParams
 from google.adk.tools import google_search
 
 from .prompt import SYSTEM_PROMPT 
 
 PATH_TO_SERVER = str((Path(__file__).parent / "server.py").resolve())
 
+# URL of a shared server started with `python3 server.py --transport http`,
+# e.g. http://127.0.0.1:8765/mcp. When unset each toolset spawns its own
+# server over stdio.
+MCP_SERVER_URL = os.getenv("LIFE_TRACKER_MCP_URL")
+
+if MCP_SERVER_URL:
+    connection_params = StreamableHTTPConnectionParams(url=MCP_SERVER_URL)
+else:
+    connection_params = StdioServerParameters(
+        command="python3",
+        args=[PATH_TO_SERVER],
+    )
+
 root_agent = LlmAgent(
     model="gemini-2.5-flash",
     name="life_tracker_agent",
     instruction=SYSTEM_PROMPT,
     tools=[
         MCPToolset(
-            connection_params=StdioServerParameters(
-                command="python3",
-                args=[PATH_TO_SERVER],
-            )
+            connection_params=connection_params
         )
     ]
 )
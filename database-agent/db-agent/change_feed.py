@@ -0,0 +1,93 @@
+import json
+import sqlite3
+
+
+def read_changes(conn: sqlite3.Connection, version: int, tables: list[str], limit: int) -> dict:
+    """Reads one page of row changes logged after `version`.
+
+    Log entries are read in version order, at most `limit` of them, and
+    collapsed per row: each changed row appears once with its current
+    values, as 'insert' (first logged as inserted in this page), 'update' or
+    'delete' (no longer exists, 'row' is None). Rows inserted and deleted
+    within the page are left out. Applying the changes as upserts and deletes
+    keyed on table and id brings a client from `version` to the returned one.
+
+    Args:
+        conn: A read connection.
+        version (int): Last version the client has applied; 0 for none.
+        tables (list[str]): Tables to report.
+        limit (int): Maximum log entries to read.
+
+    Returns:
+        dict: 'changes', 'version' (resume point), 'latest_version', 'has_more'
+              and 'resync_required' (entries after `version` were pruned or
+              predate the log, so the client must re-read the tables).
+    """
+    # One snapshot for the log and the rows, so a concurrent write or prune
+    # cannot make the page inconsistent
+    conn.execute("BEGIN;")
+    try:
+        return _read_changes(conn, version, tables, limit)
+    finally:
+        conn.rollback()
+
+
+def _read_changes(conn: sqlite3.Connection, version: int, tables: list[str], limit: int) -> dict:
+    oldest, latest = conn.execute("SELECT MIN(version), MAX(version) FROM change_log;").fetchone()
+    # A client at `oldest - 1` still finds every entry it needs, unless the
+    # oldest entry is the baseline: nothing before it was ever logged
+    baseline = oldest is not None and conn.execute(
+        "SELECT operation = 'baseline' FROM change_log WHERE version = ?;", (oldest,)
+    ).fetchone()[0]
+    if oldest is None or version < oldest - 1 or (baseline and version < oldest):
+        return {
+            "changes": [],
+            "version": latest or 0,
+            "latest_version": latest or 0,
+            "has_more": False,
+            "resync_required": True,
+        }
+
+    entries = conn.execute(
+        "SELECT version, table_name, row_id, operation FROM change_log WHERE version > ? ORDER BY version LIMIT ?;",
+        (version, limit + 1),
+    ).fetchall()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    reported = set(tables)
+
+    # (table, id) -> [first operation, last version], in order of last change
+    touched = {}
+    for entry_version, table_name, row_id, operation in entries:
+        if table_name not in reported:
+            continue
+        key = (table_name, row_id)
+        first = touched.pop(key, [operation, entry_version])[0]
+        touched[key] = [first, entry_version]
+
+    current = {}
+    for table_name in {table for table, _ in touched}:
+        ids = [row_id for table, row_id in touched if table == table_name]
+        result = conn.execute(
+            f"SELECT * FROM {table_name} WHERE id IN (SELECT value FROM json_each(?));", (json.dumps(ids),)
+        )
+        names = [description[0] for description in result.description]
+        for row in result:
+            values = dict(zip(names, row))
+            current[(table_name, values["id"])] = values
+
+    changes = []
+    for (table_name, row_id), (first, last_version) in touched.items():
+        row = current.get((table_name, row_id))
+        if row is None and first == "insert":
+            continue
+        operation = "delete" if row is None else "insert" if first == "insert" else "update"
+        changes.append({"version": last_version, "table": table_name, "id": row_id, "operation": operation, "row": row})
+
+    return {
+        "changes": changes,
+        "version": entries[-1][0] if entries else version,
+        "latest_version": latest,
+        "has_more": has_more,
+        "resync_required": False,
+    }
@@ -0,0 +1,191 @@
+import logging
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager, nullcontext
+
+from query_budget import current_budget
+
+
+# PRAGMAs applied once to every connection the manager opens
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL;",
+    "PRAGMA mmap_size=268435456;",  # 256 MiB
+    "PRAGMA cache_size=-16384;",    # 16 MiB per connection
+    "PRAGMA temp_store=MEMORY;",
+    "PRAGMA busy_timeout=5000;",
+)
+
+# Keeps planner statistics (sqlite_stat1) in step with the data without a
+# full ANALYZE: `PRAGMA optimize` only re-analyzes tables whose statistics
+# are missing or far off, reading at most `analysis_limit` rows per index.
+# SQLite before 3.46 only considers tables the connection has queried, so
+# every connection runs it before closing; 0x10002 checks all tables on open.
+ANALYSIS_LIMIT = 400
+OPTIMIZE_ON_OPEN = "PRAGMA optimize=0x10002;"
+OPTIMIZE_ON_CLOSE = "PRAGMA optimize;"
+# Shutdown does not wait long for another process's write lock
+OPTIMIZE_BUSY_TIMEOUT_MS = 200
+
+STATEMENT_CACHE_SIZE = 256
+READ_POOL_SIZE = 4
+
+
+class ConnectionManager:
+    """Owns the long-lived SQLite connections used by the MCP server.
+
+    A single writer connection serializes every write behind a lock, while a
+    small pool of read-only connections serves concurrent reads. All
+    connections are opened lazily, configured once (WAL, PRAGMAs, statement
+    cache) and reused for the lifetime of the process.
+
+    `version()` combines a write counter bumped on every use of the writer
+    with `PRAGMA data_version` from a dedicated monitor connection, which
+    changes whenever any other connection (in this process or another one)
+    commits. Anything derived from the data can be tagged with it and
+    discarded once it changes.
+
+    Args:
+        database_path (str): Path to the SQLite database file.
+        read_pool_size (int): Maximum number of read connections kept open.
+        statement_cache_size (int): Size of each connection's prepared
+                                    statement cache.
+    """
+
+    def __init__(
+        self,
+        database_path: str,
+        read_pool_size: int = READ_POOL_SIZE,
+        statement_cache_size: int = STATEMENT_CACHE_SIZE,
+    ):
+        self.database_path = database_path
+        self.read_pool_size = read_pool_size
+        self.statement_cache_size = statement_cache_size
+
+        self._writer = None
+        self._writer_lock = threading.RLock()
+        self._readers = queue.LifoQueue(maxsize=read_pool_size)
+        self._readers_opened = 0
+        self._readers_lock = threading.Lock()
+        self._monitor = None
+        self._monitor_lock = threading.Lock()
+        self._all_connections = []
+        self.write_counter = 0
+
+    def _connect(self, read_only: bool) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.database_path,
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size,
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        if read_only:
+            conn.execute("PRAGMA query_only=ON;")
+        self._all_connections.append(conn)
+        return conn
+
+    def _optimize(self, conn: sqlite3.Connection, pragma: str):
+        try:
+            conn.execute(f"PRAGMA analysis_limit={ANALYSIS_LIMIT};")
+            conn.execute(pragma)
+        except sqlite3.Error as e:
+            logging.info(f"Skipped {pragma} on {self.database_path}: {e}")
+
+    def _get_writer(self) -> sqlite3.Connection:
+        if self._writer is None:
+            self._writer = self._connect(read_only=False)
+            mode = self._writer.execute("PRAGMA journal_mode=WAL;").fetchone()[0]
+            logging.info(f"Opened writer connection to {self.database_path} (journal_mode={mode})")
+            self._optimize(self._writer, OPTIMIZE_ON_OPEN)
+        return self._writer
+
+    @contextmanager
+    def writer(self):
+        """Yields the single writer connection, holding the write lock.
+
+        Any transaction left open by the caller is rolled back on exit so the
+        shared connection is never handed out mid-transaction. The thread's
+        active QueryBudget, if any, is enforced while it is held. The write
+        counter only moves when rows were changed, so callers that end up
+        writing nothing (a streak refresh with an empty queue, a rejected
+        write) leave cached reads valid.
+        """
+        with self._writer_lock:
+            conn = self._get_writer()
+            changes = conn.total_changes
+            budget = current_budget()
+            try:
+                with budget.watching(conn) if budget else nullcontext():
+                    yield conn
+            finally:
+                if conn.in_transaction:
+                    conn.rollback()
+                if conn.total_changes != changes:
+                    self.write_counter += 1
+
+    def version(self) -> tuple[int, int]:
+        """Returns a token that changes whenever the database may have changed.
+
+        Returns:
+            tuple[int, int]: (write counter, monitor connection's data_version).
+        """
+        with self._monitor_lock:
+            if self._monitor is None:
+                with self._writer_lock:
+                    self._get_writer()
+                self._monitor = self._connect(read_only=True)
+            data_version = self._monitor.execute("PRAGMA data_version;").fetchone()[0]
+        return self.write_counter, data_version
+
+    @contextmanager
+    def reader(self):
+        """Yields a read-only connection from the pool and returns it afterwards.
+
+        The thread's active QueryBudget, if any, is enforced while it is held.
+        """
+        # The writer must exist first so the database is switched to WAL
+        # before any reader opens it.
+        if self._writer is None:
+            with self._writer_lock:
+                self._get_writer()
+
+        conn = None
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            with self._readers_lock:
+                if self._readers_opened < self.read_pool_size:
+                    self._readers_opened += 1
+                    conn = self._connect(read_only=True)
+            if conn is None:
+                conn = self._readers.get()
+
+        budget = current_budget()
+        try:
+            with budget.watching(conn) if budget else nullcontext():
+                yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._readers.put(conn)
+
+    def close(self):
+        """Refreshes stale planner statistics and closes every connection opened by the manager."""
+        with self._writer_lock, self._readers_lock:
+            for conn in self._all_connections:
+                try:
+                    # Readers are the connections that ran the queries, so
+                    # they know which tables' statistics were used
+                    conn.execute("PRAGMA query_only=OFF;")
+                    conn.execute(f"PRAGMA busy_timeout={OPTIMIZE_BUSY_TIMEOUT_MS};")
+                    self._optimize(conn, OPTIMIZE_ON_CLOSE)
+                    conn.close()
+                except sqlite3.Error as e:
+                    logging.error(f"Error closing connection: {e}")
+            self._all_connections.clear()
+            self._writer = None
+            self._monitor = None
+            self._readers = queue.LifoQueue(maxsize=self.read_pool_size)
+            self._readers_opened = 0
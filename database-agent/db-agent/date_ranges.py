@@ -0,0 +1,134 @@
+import re
+from datetime import date, timedelta
+
+# Day 0 of the integer `date_day` columns (see migration 3)
+EPOCH = date(1970, 1, 1)
+
+RELATIVE_PATTERN = re.compile(r"^(?:last|past)\s+(\d+)\s+(day|week|month|year)s?$")
+RANGE_SEPARATOR_PATTERN = re.compile(r"\s*(?:\.\.|\bto\b)\s*")
+
+
+def epoch_day(value: date) -> int:
+    """Days since 1970-01-01, the value stored in the `date_day` columns."""
+    return (value - EPOCH).days
+
+
+def from_epoch_day(day: int) -> date:
+    return EPOCH + timedelta(days=day)
+
+
+def add_months(value: date, months: int) -> date:
+    """First day of the month `months` after (or before) the month of `value`."""
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def parse_period(text: str, today: date) -> tuple[date, date]:
+    """Parses a single period into its first and last day (both inclusive)."""
+    text = text.strip().lower()
+    if text == "today":
+        return today, today
+    if text == "yesterday":
+        return today - timedelta(days=1), today - timedelta(days=1)
+
+    words = text.split()
+    if len(words) == 2 and words[0] in ("this", "last") and words[1] in ("week", "month", "year"):
+        offset = 0 if words[0] == "this" else -1
+        if words[1] == "week":
+            start = today - timedelta(days=today.weekday()) + timedelta(weeks=offset)
+            return start, start + timedelta(days=6)
+        if words[1] == "month":
+            start = add_months(today, offset)
+            return start, add_months(start, 1) - timedelta(days=1)
+        return date(today.year + offset, 1, 1), date(today.year + offset, 12, 31)
+
+    match = RELATIVE_PATTERN.match(text)
+    if match:
+        count, unit = int(match.group(1)), match.group(2)
+        if count < 1:
+            raise ValueError(f"Invalid date range '{text}': the count must be at least 1.")
+        # The last N units up to and including today
+        if unit == "day":
+            start = today - timedelta(days=count - 1)
+        elif unit == "week":
+            start = today - timedelta(weeks=count) + timedelta(days=1)
+        else:
+            # The day after the same day N months (or years) ago, clamped to short months
+            month = add_months(today, -count * (12 if unit == "year" else 1))
+            month_end = add_months(month, 1) - timedelta(days=1)
+            start = month.replace(day=min(today.day, month_end.day)) + timedelta(days=1)
+        return start, today
+
+    try:
+        if re.fullmatch(r"\d{4}", text):
+            return date(int(text), 1, 1), date(int(text), 12, 31)
+        if re.fullmatch(r"\d{4}-\d{2}", text):
+            start = date.fromisoformat(f"{text}-01")
+            return start, add_months(start, 1) - timedelta(days=1)
+        day = date.fromisoformat(text[:10])
+        return day, day
+    except ValueError:
+        raise ValueError(
+            f"Invalid date range '{text}'. Use e.g. '2025-03', '2025-01-01..2025-03-31', "
+            "'this month', 'last week' or 'last 30 days'."
+        ) from None
+
+
+def parse_date_range(text: str, today: date | None = None) -> tuple[int | None, int | None]:
+    """Turns a human date range into inclusive epoch-day bounds.
+
+    Accepts a single period ("2025", "2025-03", "2025-03-14", "today",
+    "yesterday", "this week", "last month", "last 30 days", ...) or two
+    periods joined by ".." or "to", which covers everything from the start of
+    the first to the end of the second. Either side may be left empty for an
+    open range ("2025-01-01.."). Weeks start on Monday.
+
+    Args:
+        text (str): The range to parse.
+        today (date): Reference day for relative ranges; defaults to today.
+
+    Returns:
+        tuple: (first_day, last_day) as epoch days; None for an open end.
+    """
+    today = today or date.today()
+    parts = RANGE_SEPARATOR_PATTERN.split(text.strip(), maxsplit=1)
+    if len(parts) == 1:
+        start, end = parse_period(parts[0], today)
+        return epoch_day(start), epoch_day(end)
+    first, last = parts
+    if not first and not last:
+        raise ValueError(f"Invalid date range '{text}': give at least one end.")
+    start = epoch_day(parse_period(first, today)[0]) if first else None
+    end = epoch_day(parse_period(last, today)[1]) if last else None
+    if start is not None and end is not None and start > end:
+        raise ValueError(f"Invalid date range '{text}': it ends before it starts.")
+    return start, end
+
+
+def date_range_condition(text: str, day_column: str | None = "date_day", date_column: str = "date") -> tuple[str, list]:
+    """Builds a parameterized WHERE condition selecting the rows in a date range.
+
+    Uses the indexed integer `day_column` when the table has one, so the range
+    becomes an index range scan; otherwise it compares `date_column` with ISO
+    text bounds (exclusive end, so values with a time part match too).
+
+    Returns:
+        tuple: (sql, params) for the condition.
+    """
+    start, end = parse_date_range(text)
+    terms, params = [], []
+    if day_column:
+        if start is not None:
+            terms.append(f"{day_column} >= ?")
+            params.append(start)
+        if end is not None:
+            terms.append(f"{day_column} <= ?")
+            params.append(end)
+    else:
+        if start is not None:
+            terms.append(f"{date_column} >= ?")
+            params.append(from_epoch_day(start).isoformat())
+        if end is not None:
+            terms.append(f"{date_column} < ?")
+            params.append(from_epoch_day(end + 1).isoformat())
+    return " AND ".join(terms), params
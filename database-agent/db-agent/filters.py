@@ -0,0 +1,101 @@
+import json
+
+# Operator -> SQL template over a validated column name. Values are always
+# bound: list values go in as one JSON array, so the SQL text (and with it
+# the prepared statement) does not change with the number of values.
+FILTER_OPERATORS = {
+    "=": "{column} = ?",
+    "!=": "{column} != ?",
+    "<": "{column} < ?",
+    "<=": "{column} <= ?",
+    ">": "{column} > ?",
+    ">=": "{column} >= ?",
+    "like": "{column} LIKE ?",
+    "not like": "{column} NOT LIKE ?",
+    "in": "{column} IN (SELECT value FROM json_each(?))",
+    "not in": "{column} NOT IN (SELECT value FROM json_each(?))",
+    "between": "{column} BETWEEN ? AND ?",
+    "is null": "{column} IS NULL",
+    "is not null": "{column} IS NOT NULL",
+}
+FILTER_OPERATOR_ALIASES = {"==": "=", "<>": "!=", "eq": "=", "ne": "!=", "lt": "<", "le": "<=", "gt": ">", "ge": ">="}
+FILTER_MAX_DEPTH = 4
+
+
+class FilterError(ValueError):
+    """A structured filter that cannot be compiled."""
+
+
+def compile_filter(item, columns: list[str], depth: int = 0) -> tuple[str, list]:
+    if not isinstance(item, dict):
+        raise FilterError(f"each filter must be an object like {{'column': 'user_id', 'op': '=', 'value': 1}}, got {item!r}")
+    if "any" in item:
+        if depth >= FILTER_MAX_DEPTH:
+            raise FilterError(f"'any' filters can be nested at most {FILTER_MAX_DEPTH} levels deep")
+        alternatives = item["any"]
+        if not isinstance(alternatives, list) or not alternatives:
+            raise FilterError("'any' must be a non-empty list of filters")
+        parts, params = [], []
+        for alternative in alternatives:
+            sql, values = compile_filter(alternative, columns, depth + 1)
+            parts.append(sql)
+            params.extend(values)
+        return "(" + " OR ".join(parts) + ")", params
+
+    column = item.get("column")
+    if column not in columns:
+        raise FilterError(f"unknown filter column {column!r}; use one of: {', '.join(columns)}")
+    op = str(item.get("op", "=")).strip().lower()
+    op = FILTER_OPERATOR_ALIASES.get(op, op)
+    if op not in FILTER_OPERATORS:
+        raise FilterError(f"unsupported filter op {item.get('op')!r}; use one of: {', '.join(FILTER_OPERATORS)}")
+    sql = FILTER_OPERATORS[op].format(column=column)
+
+    if op in ("is null", "is not null"):
+        return sql, []
+    if "value" not in item:
+        raise FilterError(f"filter on {column!r} with op {op!r} needs a 'value'")
+    value = item["value"]
+    if op in ("in", "not in"):
+        if not isinstance(value, list):
+            raise FilterError(f"op {op!r} needs a list 'value'")
+        return sql, [json.dumps(value)]
+    if op == "between":
+        if not isinstance(value, list) or len(value) != 2:
+            raise FilterError("op 'between' needs a 'value' list of [low, high]")
+        return sql, list(value)
+    if isinstance(value, (list, dict)):
+        raise FilterError(f"op {op!r} needs a single 'value', not a list or object")
+    return sql, [value]
+
+
+def compile_filters(filters: list[dict], columns: list[str]) -> tuple[str, list]:
+    """Compiles structured filters into a parameterized WHERE condition.
+
+    Filters are objects like {"column": "user_id", "op": "=", "value": 1}, all
+    of which must hold; {"any": [filter, ...]} holds when one of its filters
+    does. Ops: =, !=, <, <=, >, >=, like, not like, in, not in (list value),
+    between ([low, high]) and is null / is not null (no value). Columns are
+    checked against `columns` and every value is bound, so calls that only
+    differ in values share one SQL text and one prepared statement.
+
+    Args:
+        filters (list[dict]): The filters.
+        columns (list[str]): Columns the filters may use.
+
+    Returns:
+        tuple: (sql, params); sql is empty when there are no filters.
+
+    Raises:
+        FilterError: If a filter is malformed or uses an unknown column or op.
+    """
+    if not filters:
+        return "", []
+    if not isinstance(filters, list):
+        raise FilterError("filters must be a list of filter objects")
+    parts, params = [], []
+    for item in filters:
+        sql, values = compile_filter(item, columns)
+        parts.append(sql)
+        params.extend(values)
+    return " AND ".join(parts), params
@@ -0,0 +1,674 @@
+"""Versioned schema migrations for the life tracker database.
+
+`PRAGMA user_version` records the last applied migration. `migrate()` applies
+every newer entry of MIGRATIONS in order, each in its own transaction, so a
+failed migration leaves the database at the previous version.
+
+Run it directly to bring an existing database up to date:
+    python db-agent/migrations.py [path/to/life_tracker.db]
+"""
+import logging
+import os
+import re
+import sqlite3
+import sys
+import time
+
+from search import SEARCH_SOURCES, search_schema
+from streaks import STREAK_SCHEMA, backfill_streaks
+
+DATABASE_PATH = os.path.join(os.path.dirname(__file__), "life_tracker.db")
+
+# Online table rebuilds copy this many rows per transaction, then pause so
+# waiting writers (whose busy handler sleeps between retries) get the lock
+REBUILD_BATCH_SIZE = 5_000
+REBUILD_PAUSE_SECONDS = 0.05
+
+BASE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        email TEXT NOT NULL,
+        created_at DATETIME NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS expenses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        amount REAL NOT NULL,
+        category TEXT NOT NULL,
+        description TEXT,
+        date DATE NOT NULL,
+        created_at DATETIME NOT NULL,
+        updated_at DATETIME NOT NULL,
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS workouts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        type TEXT NOT NULL,
+        duration_minutes INTEGER NOT NULL,
+        calories_burned INTEGER NOT NULL,
+        date DATE NOT NULL,
+        notes TEXT,
+        created_at DATETIME NOT NULL,
+        updated_at DATETIME NOT NULL,
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS habits (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        description TEXT,
+        frequency TEXT NOT NULL,
+        target INTEGER,
+        created_at DATETIME NOT NULL,
+        updated_at DATETIME NOT NULL,
+        FOREIGN KEY (user_id) REFERENCES users(id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS habit_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        habit_id INTEGER NOT NULL,
+        date DATE NOT NULL,
+        status INTEGER NOT NULL,  -- 1 = completed, 0 = skipped
+        notes TEXT,
+        FOREIGN KEY (habit_id) REFERENCES habits(id)
+    )
+    """,
+]
+
+# Secondary indexes for the per-user / per-date lookups the agent generates.
+# The trailing columns make them covering for the common aggregates.
+INDEX_STATEMENTS = [
+    "CREATE INDEX IF NOT EXISTS idx_expenses_user_date ON expenses (user_id, date, category, amount)",
+    "CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses (date)",
+    "CREATE INDEX IF NOT EXISTS idx_workouts_user_date ON workouts (user_id, date, type, duration_minutes, calories_burned)",
+    "CREATE INDEX IF NOT EXISTS idx_workouts_date ON workouts (date)",
+    "CREATE INDEX IF NOT EXISTS idx_habits_user ON habits (user_id, name)",
+    "CREATE INDEX IF NOT EXISTS idx_habit_logs_habit_date ON habit_logs (habit_id, date, status)",
+    "CREATE INDEX IF NOT EXISTS idx_habit_logs_date ON habit_logs (date)",
+]
+
+# Canonical integer day (days since 1970-01-01) of each `date` column, so
+# ranges and buckets compare integers instead of parsing text per row. The
+# columns are VIRTUAL: computed on read and stored only in the indexes
+# (migration 9 rebuilds the tables to store them).
+# Values with a time part map to their day; non-dates map to NULL.
+DATE_DAY_EXPRESSION = "CAST(julianday(date, 'start of day') - 2440587.5 AS INTEGER)"
+DATE_DAY_TABLES = ("expenses", "workouts", "habit_logs")
+DATE_DAY_STATEMENTS = [
+    f"ALTER TABLE {table} ADD COLUMN date_day INTEGER GENERATED ALWAYS AS ({DATE_DAY_EXPRESSION}) VIRTUAL"
+    for table in DATE_DAY_TABLES
+] + [
+    # The per-user/per-habit text date indexes stay for hand-written `date`
+    # conditions; the plain date indexes are replaced by day indexes.
+    "DROP INDEX IF EXISTS idx_expenses_date",
+    "DROP INDEX IF EXISTS idx_workouts_date",
+    "DROP INDEX IF EXISTS idx_habit_logs_date",
+    "CREATE INDEX IF NOT EXISTS idx_expenses_user_day ON expenses (user_id, date_day, category, amount)",
+    "CREATE INDEX IF NOT EXISTS idx_expenses_day ON expenses (date_day)",
+    "CREATE INDEX IF NOT EXISTS idx_workouts_user_day ON workouts (user_id, date_day, type, duration_minutes, calories_burned)",
+    "CREATE INDEX IF NOT EXISTS idx_workouts_day ON workouts (date_day)",
+    "CREATE INDEX IF NOT EXISTS idx_habit_logs_habit_day ON habit_logs (habit_id, date_day, status)",
+    "CREATE INDEX IF NOT EXISTS idx_habit_logs_day ON habit_logs (date_day)",
+    "ANALYZE",
+]
+
+# First day (as an epoch day) of the day, week and month of a row, for the
+# rollup tables. Weeks start on Monday; day 0 (1970-01-01) was a Thursday.
+ROLLUP_PERIODS = {
+    "day": "{row}.date_day",
+    "week": "{row}.date_day - (({row}.date_day + 3) % 7 + 7) % 7",
+    "month": "CAST(julianday({row}.date, 'start of month') - 2440587.5 AS INTEGER)",
+}
+
+
+def rollup_schema(table: str, rollup: str, dimensions: dict, measures: dict) -> list[str]:
+    """Rollup table of per-period totals of `table`, maintained by triggers.
+
+    Every dated row of `table` is counted in one 'day', one 'week' and one
+    'month' row of `rollup` per combination of `dimensions` (the first one
+    leads the key after the grain, so per-user reads are range scans).
+    Inserts add to the totals, deletes subtract and drop rows whose count
+    reaches zero, and updates of the dimensions, measures or date do both.
+    Rows whose `date` is not a valid date (NULL `date_day`) are not counted.
+
+    Args:
+        table (str): Source table; needs `date` and `date_day` columns.
+        rollup (str): Name of the rollup table.
+        dimensions (dict): Source column -> SQL type, kept as-is in the rollup.
+        measures (dict): Source column -> (total column, SQL type), summed in the rollup.
+    """
+    names = list(dimensions)
+    totals = [total for total, _ in measures.values()]
+    key = ", ".join(["grain", names[0], "period", *names[1:]])
+    columns = ", ".join(["grain", "period", *names, *totals, "entry_count"])
+    definitions = ",\n            ".join(
+        [f"{name} {kind} NOT NULL" for name, kind in dimensions.items()]
+        + [f"{total} {kind} NOT NULL" for total, kind in measures.values()]
+    )
+
+    def add(row: str) -> str:
+        values = ",\n".join(
+            f"('{grain}', {period.format(row=row)}, "
+            + ", ".join([f"{row}.{name}" for name in names] + [f"{row}.{source}" for source in measures])
+            + ", 1)"
+            for grain, period in ROLLUP_PERIODS.items()
+        )
+        updates = ", ".join([f"{total} = {total} + excluded.{total}" for total in totals] + ["entry_count = entry_count + 1"])
+        return f"INSERT INTO {rollup} ({columns}) VALUES {values} ON CONFLICT ({key}) DO UPDATE SET {updates};"
+
+    def remove(row: str) -> str:
+        updates = ", ".join(
+            [f"{total} = {total} - {row}.{source}" for source, (total, _) in measures.items()]
+            + ["entry_count = entry_count - 1"]
+        )
+        statements = []
+        for grain, period in ROLLUP_PERIODS.items():
+            match = " AND ".join(
+                [f"grain = '{grain}'", f"period = {period.format(row=row)}"] + [f"{name} = {row}.{name}" for name in names]
+            )
+            statements.append(f"UPDATE {rollup} SET {updates} WHERE {match};")
+            statements.append(f"DELETE FROM {rollup} WHERE {match} AND entry_count <= 0;")
+        return "\n".join(statements)
+
+    watched = ", ".join([*names, *measures, "date"])
+    return [
+        f"""
+        CREATE TABLE IF NOT EXISTS {rollup} (
+            grain TEXT NOT NULL,  -- 'day', 'week' or 'month'
+            period INTEGER NOT NULL,  -- epoch day of the period's first day
+            {definitions},
+            entry_count INTEGER NOT NULL,
+            PRIMARY KEY ({key})
+        ) WITHOUT ROWID
+        """,
+        f"CREATE TRIGGER IF NOT EXISTS {table}_rollup_insert AFTER INSERT ON {table} "
+        f"WHEN NEW.date_day IS NOT NULL BEGIN {add('NEW')} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_rollup_delete AFTER DELETE ON {table} "
+        f"WHEN OLD.date_day IS NOT NULL BEGIN {remove('OLD')} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_rollup_update_remove AFTER UPDATE OF {watched} ON {table} "
+        f"WHEN OLD.date_day IS NOT NULL BEGIN {remove('OLD')} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_rollup_update_add AFTER UPDATE OF {watched} ON {table} "
+        f"WHEN NEW.date_day IS NOT NULL BEGIN {add('NEW')} END",
+        *rollup_backfill(table, rollup, dimensions, measures),
+    ]
+
+
+def rollup_backfill(table: str, rollup: str, dimensions: dict, measures: dict) -> list[str]:
+    """Statements filling an empty rollup table (see `rollup_schema`) from `table`."""
+    names = list(dimensions)
+    columns = ", ".join(["grain", "period", *names, *(total for total, _ in measures.values()), "entry_count"])
+    return [
+        f"INSERT INTO {rollup} ({columns}) "
+        f"SELECT '{grain}', {period.format(row=table)}, {', '.join(names)}, "
+        + ", ".join(f"SUM({source})" for source in measures)
+        + f", COUNT(*) FROM {table} WHERE date_day IS NOT NULL GROUP BY 2, {', '.join(names)}"
+        for grain, period in ROLLUP_PERIODS.items()
+    ]
+
+
+# Per user and day/week/month totals behind the dashboard questions
+# (spend per category, workout minutes and calories per type):
+# source table -> (rollup table, dimensions, measures)
+ROLLUPS = {
+    "expenses": ("expense_rollups", {"user_id": "INTEGER", "category": "TEXT"}, {"amount": ("amount_total", "REAL")}),
+    "workouts": (
+        "workout_rollups",
+        {"user_id": "INTEGER", "type": "TEXT"},
+        {"duration_minutes": ("duration_minutes_total", "INTEGER"), "calories_burned": ("calories_burned_total", "INTEGER")},
+    ),
+}
+ROLLUP_STATEMENTS = [statement for table, spec in ROLLUPS.items() for statement in rollup_schema(table, *spec)]
+
+# Change log entries kept; older ones are pruned in steps of
+# CHANGE_LOG_PRUNE_EVERY, and clients behind the oldest entry must resync
+CHANGE_LOG_RETENTION = 1_000_000
+CHANGE_LOG_PRUNE_EVERY = 10_000
+
+
+def change_log_schema(tables: tuple[str, ...]) -> list[str]:
+    """Append-only log of row changes to `tables`, written by triggers.
+
+    `version` is an AUTOINCREMENT key, so it only ever grows, even after
+    pruning. The first entry is a 'baseline' marker: changes made before the
+    log existed are not in it.
+    """
+    statements = [
+        """
+        CREATE TABLE IF NOT EXISTS change_log (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            operation TEXT NOT NULL  -- 'insert', 'update', 'delete' or 'baseline'
+        )
+        """,
+        "INSERT INTO change_log (table_name, row_id, operation) VALUES ('', 0, 'baseline')",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS change_log_prune AFTER INSERT ON change_log
+        WHEN NEW.version % {CHANGE_LOG_PRUNE_EVERY} = 0
+        BEGIN
+            DELETE FROM change_log WHERE version <= NEW.version - {CHANGE_LOG_RETENTION};
+        END
+        """,
+    ]
+    for table in tables:
+        for event, row in (("insert", "NEW"), ("update", "NEW"), ("delete", "OLD")):
+            statements.append(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_change_{event} AFTER {event.upper()} ON {table} "
+                f"BEGIN INSERT INTO change_log (table_name, row_id, operation) VALUES ('{table}', {row}.id, '{event}'); END"
+            )
+    return statements
+
+
+CHANGE_LOG_TABLES = ("users", "expenses", "workouts", "habits", "habit_logs")
+CHANGE_LOG_STATEMENTS = change_log_schema(CHANGE_LOG_TABLES)
+
+# Migrations 2 and 3 end with ANALYZE, which recorded the row counts of the
+# (often tiny) database at startup; the planner kept trusting them as the
+# tables grew and scanned instead of using the per-user indexes. Without
+# statistics it assumes indexes are selective, and ConnectionManager's
+# `PRAGMA optimize` gathers real ones once tables are queried.
+STALE_STATISTICS_STATEMENTS = ["DROP TABLE IF EXISTS sqlite_stat1"]
+
+
+def build_search_indexes(conn: sqlite3.Connection):
+    """FTS5 indexes over the free-text columns, filled from the existing rows.
+
+    Servers before this migration created them on the first search; indexes
+    that already exist are kept as they are.
+    """
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table';")}
+    for table in SEARCH_SOURCES:
+        for statement in search_schema(table):
+            conn.execute(statement)
+        if f"{table}_fts" not in existing:
+            conn.execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild');")
+
+
+def build_streak_state(conn: sqlite3.Connection):
+    """Habit streak side tables and triggers, with every habit's state computed.
+
+    State kept by servers that created the tables on first use is left for
+    the streak engine to bring up to date from its queue.
+    """
+    existing = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'habit_streaks';").fetchone()
+    for statement in STREAK_SCHEMA:
+        conn.execute(statement)
+    if not existing:
+        backfill_streaks(conn)
+
+
+def stored_date_day_table(table: str) -> str:
+    """CREATE TABLE statement for `{table}_rebuild`: the base table plus a STORED `date_day`."""
+    base = next(sql for sql in BASE_SCHEMA if f"CREATE TABLE IF NOT EXISTS {table} (" in sql)
+    sql = base.replace(f"CREATE TABLE IF NOT EXISTS {table} (", f"CREATE TABLE {table}_rebuild (", 1)
+    return re.sub(
+        r",(\s*)FOREIGN KEY",
+        lambda match: f",{match.group(1)}date_day INTEGER GENERATED ALWAYS AS ({DATE_DAY_EXPRESSION}) STORED,{match.group(1)}FOREIGN KEY",
+        sql,
+        count=1,
+    )
+
+
+# Migration 3 could only add `date_day` as a VIRTUAL column (ALTER TABLE
+# cannot add STORED ones), so scans that filter or group on it parsed the
+# text date of every row they read; rebuilding the tables stores it.
+STORED_DATE_DAY_TABLES = {table: stored_date_day_table(table) for table in DATE_DAY_TABLES}
+
+# Ordered (version, description, statements) entries. Never edit or reorder an
+# applied entry; append a new one instead. `statements` is a list of SQL
+# strings run in one transaction, a function taking the connection, or a
+# dict of tables to rebuild with `rebuild_table` (table -> CREATE TABLE
+# statement for `{table}_rebuild`).
+MIGRATIONS = [
+    (1, "base tables", BASE_SCHEMA),
+    (2, "per-user and per-date indexes", INDEX_STATEMENTS + ["ANALYZE"]),
+    (3, "integer date_day columns and day indexes", DATE_DAY_STATEMENTS),
+    (4, "trigger-maintained expense and workout rollups", ROLLUP_STATEMENTS),
+    (5, "trigger-fed change log", CHANGE_LOG_STATEMENTS),
+    (6, "drop planner statistics gathered at migration time", STALE_STATISTICS_STATEMENTS),
+    (7, "full-text search indexes", build_search_indexes),
+    (8, "habit streak state", build_streak_state),
+    (9, "stored date_day columns", STORED_DATE_DAY_TABLES),
+]
+
+# Tables each migration reads in full (index builds and backfills). While
+# they are large, such a migration is left to an offline run of this script
+# instead of holding the write lock through a server's startup.
+MIGRATION_SCANS = {
+    2: ("expenses", "workouts", "habits", "habit_logs"),
+    3: ("expenses", "workouts", "habit_logs"),
+    4: ("expenses", "workouts"),
+    7: tuple(SEARCH_SOURCES),
+    8: ("habit_logs",),
+    9: DATE_DAY_TABLES,
+}
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version;").fetchone()[0]
+
+
+def scan_rows(conn: sqlite3.Connection, tables: tuple[str, ...]) -> int:
+    """Upper bound on the rows in `tables` (their largest rowids); missing tables count 0."""
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table';")}
+    return sum(
+        conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {table};").fetchone()[0]
+        for table in tables if table in existing
+    )
+
+
+def migrate(
+    conn: sqlite3.Connection,
+    target: int | None = None,
+    max_rows: int | None = None,
+    online: bool = False,
+) -> list[int]:
+    """Applies every pending migration up to `target` (default: the latest).
+
+    Each migration and its `user_version` bump commit together; on error the
+    migration is rolled back and the exception re-raised.
+
+    Args:
+        conn (sqlite3.Connection): A connection that may write to the database.
+        target (int): Highest version to apply.
+        max_rows (int): Stop before a migration that would read more rows than
+                        this (see MIGRATION_SCANS); None applies everything.
+        online (bool): Rebuild the tables of rebuild migrations batch by batch
+                       while other connections keep writing, rather than in
+                       the migration's transaction.
+
+    Returns:
+        list[int]: Versions applied by this call.
+    """
+    applied = []
+    current = schema_version(conn)
+    for version, description, statements in MIGRATIONS:
+        if version <= current or (target is not None and version > target):
+            continue
+        if max_rows is not None:
+            rows = scan_rows(conn, MIGRATION_SCANS.get(version, ()))
+            if rows > max_rows:
+                logging.warning(
+                    f"Migration {version} ({description}) reads up to {rows} rows, so it was not applied now; "
+                    f"database left at version {current}. Apply it with: python db-agent/migrations.py <database>"
+                )
+                break
+        started = time.perf_counter()
+        rebuilds = statements if isinstance(statements, dict) else {}
+        if online:
+            # Only the version bump below holds the write lock throughout
+            for table, create_sql in rebuilds.items():
+                rebuild_table(conn, table, create_sql)
+        if conn.in_transaction:
+            conn.commit()
+        conn.execute("BEGIN IMMEDIATE;")
+        # Another process (servers start one per session) may have applied it
+        # while this one waited for the write lock
+        current = schema_version(conn)
+        if version <= current:
+            conn.commit()
+            continue
+        try:
+            if rebuilds:
+                if not online:
+                    for table, create_sql in rebuilds.items():
+                        rebuild_table(conn, table, create_sql, online=False)
+            elif callable(statements):
+                statements(conn)
+            else:
+                for statement in statements:
+                    conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {int(version)};")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logging.error(f"Migration {version} ({description}) failed, database left at version {current}")
+            raise
+        current = version
+        applied.append(version)
+        logging.info(f"Applied migration {version} ({description}) in {time.perf_counter() - started:.2f}s")
+    return applied
+
+
+# Head of a CREATE INDEX statement as stored in sqlite_master: name and table
+INDEX_HEAD = re.compile(
+    r"""^\s*CREATE\s+(UNIQUE\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?["'`\[]?\w+["'`\]]?\s+ON\s+["'`\[]?\w+["'`\]]?\s*\(""",
+    re.IGNORECASE,
+)
+
+
+def index_sql(sql: str, name: str, table: str, if_not_exists: bool = False) -> str:
+    """`sql` (a CREATE INDEX statement) changed to create index `name` on `table`."""
+    exists = "IF NOT EXISTS " if if_not_exists else ""
+    return INDEX_HEAD.sub(lambda match: f"CREATE {match.group(1) or ''}INDEX {exists}{name} ON {table} (", sql, count=1)
+
+
+def restore_index_names(conn: sqlite3.Connection, table: str):
+    """Gives the `_rebuild` indexes that a rebuild swapped in on `table` their original names.
+
+    Each index is recreated under its name and the copy dropped in a
+    transaction of its own (or in the caller's), so queries always have one
+    of the two and writers wait for one index build at a time.
+    """
+    copies = [
+        (name, sql) for name, sql in conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL;", (table,)
+        ).fetchall()
+        if name.endswith("_rebuild")
+    ]
+    for name, sql in copies:
+        own_transaction = not conn.in_transaction
+        if own_transaction:
+            conn.execute("BEGIN IMMEDIATE;")
+        conn.execute(index_sql(sql, name.removesuffix("_rebuild"), table, if_not_exists=True))
+        conn.execute(f"DROP INDEX {name};")
+        if own_transaction:
+            conn.commit()
+
+
+def refresh_derived_state(conn: sqlite3.Connection, table: str):
+    """Recomputes the rollups, full-text index and habit streaks kept from `table`'s rows."""
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table';")}
+    if table in ROLLUPS and ROLLUPS[table][0] in existing:
+        conn.execute(f"DELETE FROM {ROLLUPS[table][0]};")
+        for statement in rollup_backfill(table, *ROLLUPS[table]):
+            conn.execute(statement)
+    if f"{table}_fts" in existing:
+        conn.execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild');")
+    if table in ("habits", "habit_logs") and "habit_streaks" in existing:
+        conn.execute("DELETE FROM habit_streak_changes;")
+        conn.execute("DELETE FROM habit_streaks;")
+        backfill_streaks(conn)
+
+
+def rebuild_table(
+    conn: sqlite3.Connection,
+    table: str,
+    create_sql: str,
+    select_columns: str = "",
+    batch_size: int = REBUILD_BATCH_SIZE,
+    pause: float = REBUILD_PAUSE_SECONDS,
+    online: bool = True,
+) -> int:
+    """Rebuilds `table` with a new definition without blocking other writers for long.
+
+    The old table's secondary indexes are first created on an empty
+    `{table}_rebuild` under a `_rebuild` suffix, so they are built
+    incrementally during the copy, while the old table keeps its own for the
+    queries that run meanwhile. Rows are then copied in rowid batches, each in
+    its own short transaction, while temporary triggers mirror concurrent
+    inserts, updates and deletes on the old table (computed with
+    `select_columns` like the copied rows). A final short transaction swaps
+    the tables and recreates the old table's triggers, and each index then
+    gets its name back (see `restore_index_names`). An interrupted rebuild is
+    restarted from scratch on the next call.
+
+    When `select_columns` converts values, the swap also recomputes what is
+    derived from the rows (rollups, full-text index, habit streaks) and logs
+    the changed rows in the change log, which holds the write lock for a full
+    read of the table.
+
+    Run it outside a transaction, then record the change with a quick
+    migration; `migrate(online=True)` does both for a migration that maps
+    tables to their new definitions.
+
+    Args:
+        conn (sqlite3.Connection): A connection that may write to the database.
+        table (str): Table to rebuild; must have an integer `id` primary key.
+        create_sql (str): CREATE TABLE statement for `{table}_rebuild`; it must
+                          have every column of the old table (and may add more).
+        select_columns (str): Expressions computing the old table's stored columns,
+                              in order, from its rows (e.g. to convert types).
+                              Defaults to the columns themselves.
+        batch_size (int): Rows copied per transaction.
+        pause (float): Seconds to sleep between batches, leaving room for other writers.
+        online (bool): False to run every step in the caller's transaction
+                       instead (for a small table, inside a migration).
+
+    Returns:
+        int: Number of rows copied.
+    """
+    new_table = f"{table}_rebuild"
+    # Generated columns are left out (PRAGMA table_info skips them): they
+    # cannot be written and `create_sql` recomputes them
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table});")]
+    column_list = ", ".join(columns)
+    converts = bool(select_columns) and select_columns != column_list
+    select_columns = select_columns or column_list
+
+    def begin():
+        if online:
+            conn.execute("BEGIN IMMEDIATE;")
+
+    def commit():
+        if online:
+            conn.commit()
+
+    if online and conn.in_transaction:
+        conn.commit()
+    # A rebuild interrupted after its swap left indexes under their copies' names
+    restore_index_names(conn, table)
+    indexes = {
+        name: sql for name, sql in conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL;", (table,)
+        )
+    }
+    triggers = [
+        sql for name, sql in conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?;", (table,)
+        )
+        if not name.startswith(f"{new_table}_")
+    ]
+
+    begin()
+    for suffix in ("insert", "update", "delete"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {new_table}_{suffix};")
+    conn.execute(f"DROP TABLE IF EXISTS {new_table};")
+    conn.execute(create_sql)
+    for name, sql in indexes.items():
+        conn.execute(index_sql(sql, f"{name}_rebuild", new_table))
+    # The row is read back from the old table, so `select_columns` applies to it
+    mirror = f"INSERT OR REPLACE INTO {new_table} ({column_list}) SELECT {select_columns} FROM {table} WHERE id = NEW.id;"
+    conn.execute(f"""
+        CREATE TRIGGER {new_table}_insert AFTER INSERT ON {table}
+        BEGIN
+            {mirror}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER {new_table}_update AFTER UPDATE ON {table}
+        BEGIN
+            DELETE FROM {new_table} WHERE id = OLD.id;
+            {mirror}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER {new_table}_delete AFTER DELETE ON {table}
+        BEGIN
+            DELETE FROM {new_table} WHERE id = OLD.id;
+        END
+    """)
+    # Rows inserted from here on are mirrored, so the copy stops at this id
+    # rather than chasing a steady stream of inserts
+    last_copied_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table};").fetchone()[0]
+    commit()
+
+    copied = 0
+    last_id = -1
+    while True:
+        begin()
+        ids = conn.execute(
+            f"SELECT MIN(id), MAX(id), COUNT(*) FROM "
+            f"(SELECT id FROM {table} WHERE id > ? AND id <= ? ORDER BY id LIMIT ?);",
+            (last_id, last_copied_id, batch_size),
+        ).fetchone()
+        if not ids[2]:
+            commit()
+            break
+        # Rows already mirrored by the triggers are newer than (or equal to) this copy
+        conn.execute(
+            f"INSERT OR IGNORE INTO {new_table} ({column_list}) "
+            f"SELECT {select_columns} FROM {table} WHERE id BETWEEN ? AND ?;",
+            (ids[0], ids[1]),
+        )
+        commit()
+        copied += ids[2]
+        last_id = ids[1]
+        if online and pause:
+            time.sleep(pause)
+
+    begin()
+    try:
+        # Keep AUTOINCREMENT from reusing ids of rows deleted before the rebuild
+        sequence = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?;", (table,)).fetchone()
+        logged = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'change_log';").fetchone()
+        if converts and logged and table in CHANGE_LOG_TABLES:
+            differs = " OR ".join(f"n.{column} IS NOT o.{column}" for column in columns)
+            conn.execute(
+                f"INSERT INTO change_log (table_name, row_id, operation) "
+                f"SELECT '{table}', n.id, 'update' FROM {new_table} n JOIN {table} o ON o.id = n.id "
+                f"WHERE {differs} ORDER BY n.id;"
+            )
+        conn.execute(f"DROP TABLE {table};")  # also drops its indexes and the mirroring triggers
+        # Triggers on other tables may mention `table`, which does not exist
+        # until the rename; the legacy rename does not re-check them.
+        conn.execute("PRAGMA legacy_alter_table = ON;")
+        conn.execute(f"ALTER TABLE {new_table} RENAME TO {table};")
+        conn.execute("PRAGMA legacy_alter_table = OFF;")
+        if sequence is not None:
+            conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?;", (sequence[0], table))
+        for statement in triggers:
+            conn.execute(statement)
+        if converts:
+            refresh_derived_state(conn, table)
+        commit()
+    except Exception:
+        if online:
+            conn.rollback()
+        conn.execute("PRAGMA legacy_alter_table = OFF;")
+        raise
+    restore_index_names(conn, table)
+    logging.info(f"Rebuilt table {table} ({copied} rows)")
+    return copied
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    path = sys.argv[1] if len(sys.argv) > 1 else DATABASE_PATH
+    conn = sqlite3.connect(path)
+    try:
+        before = schema_version(conn)
+        applied = migrate(conn, online=True)
+        print(f"{path}: version {before} -> {schema_version(conn)} ({len(applied)} migrations applied)")
+    finally:
+        conn.close()
@@ -0,0 +1,113 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+# SQLite VM instructions between two budget checks. Checking costs a Python
+# call, so this trades a little overshoot for negligible overhead.
+PROGRESS_INTERVAL = 10_000
+
+_active = threading.local()
+
+
+class BudgetExceeded(sqlite3.OperationalError):
+    """Raised when a call would change more rows than its budget allows."""
+
+
+class QueryBudget:
+    """Wall-time, VM-step and row limits for the SQL run by one tool call.
+
+    While a budget is active on a thread (see `use_budget`), every connection the
+    ConnectionManager hands out on that thread gets a progress handler that
+    aborts the running statement once the budget is spent or `cancel()` is
+    called, so SQLite raises `sqlite3.OperationalError: interrupted` and the
+    statement (and, inside a transaction, its changes) is rolled back.
+    Writes report how many rows they change through `charge_rows`.
+
+    Args:
+        seconds (float): Wall time allowed from `start()`; 0 means unlimited.
+        steps (int): SQLite VM instructions allowed; 0 means unlimited.
+        rows (int): Rows the call may change; 0 means unlimited.
+    """
+
+    def __init__(self, seconds: float = 0, steps: int = 0, rows: int = 0):
+        self.seconds = seconds
+        self.steps = steps
+        self.rows = rows
+        self.steps_used = 0
+        self.rows_used = 0
+        self.exceeded = ""
+        self._started = time.perf_counter()
+        self._cancelled = ""
+        self._watched = set()
+
+    def start(self):
+        self._started = time.perf_counter()
+
+    def cancel(self, reason: str = "call was cancelled"):
+        """Makes the next budget check abort, e.g. after the caller gave up waiting."""
+        self._cancelled = reason
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def _check(self) -> int:
+        self.steps_used += PROGRESS_INTERVAL
+        if self._cancelled:
+            self.exceeded = self._cancelled
+        elif self.seconds and self.elapsed() > self.seconds:
+            self.exceeded = f"time budget of {self.seconds:g}s exceeded"
+        elif self.steps and self.steps_used > self.steps:
+            self.exceeded = f"budget of {self.steps:,} SQLite steps exceeded"
+        return 1 if self.exceeded else 0
+
+    def charge_rows(self, count: int):
+        """Counts rows changed by the call, raising BudgetExceeded past the row budget."""
+        self.rows_used += count
+        if self.rows and self.rows_used > self.rows:
+            self.exceeded = f"row budget of {self.rows:,} exceeded"
+            raise BudgetExceeded(
+                f"the call would change {self.rows_used:,} rows, more than the budget of {self.rows:,}; "
+                "narrow the condition or split the change"
+            )
+
+    @contextmanager
+    def watching(self, conn: sqlite3.Connection):
+        """Enforces the budget on `conn` for the duration of the block."""
+        if id(conn) in self._watched:  # nested use of the same connection
+            yield conn
+            return
+        self._watched.add(id(conn))
+        conn.set_progress_handler(self._check, PROGRESS_INTERVAL)
+        try:
+            yield conn
+        finally:
+            conn.set_progress_handler(None, 0)
+            self._watched.discard(id(conn))
+
+    def report(self) -> dict:
+        """Limits and usage, for responses of calls that went over budget."""
+        return {
+            "reason": self.exceeded,
+            "elapsed_seconds": round(self.elapsed(), 3),
+            "steps_used": self.steps_used,
+            "rows_changed": self.rows_used,
+            "limits": {"seconds": self.seconds, "steps": self.steps, "rows": self.rows},
+        }
+
+
+def current_budget() -> QueryBudget | None:
+    """Returns the budget active on this thread, if any."""
+    return getattr(_active, "budget", None)
+
+
+@contextmanager
+def use_budget(budget: QueryBudget):
+    """Makes `budget` the one enforced on this thread's database connections."""
+    previous = current_budget()
+    _active.budget = budget
+    budget.start()
+    try:
+        yield budget
+    finally:
+        _active.budget = previous
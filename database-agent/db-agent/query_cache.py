@@ -0,0 +1,89 @@
+import threading
+from collections import OrderedDict, defaultdict
+
+QUERY_CACHE_MAX_ENTRIES = 512
+QUERY_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+
+class QueryCache:
+    """LRU cache of serialized tool responses, tagged with a data version.
+
+    An entry is only served while the version it was stored under is still
+    current; anything older is dropped on lookup. The cache is bounded both
+    by entry count and by the total size of the cached text.
+
+    Args:
+        max_entries (int): Maximum number of cached responses.
+        max_bytes (int): Maximum total length of the cached responses.
+    """
+
+    def __init__(self, max_entries: int = QUERY_CACHE_MAX_ENTRIES, max_bytes: int = QUERY_CACHE_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {"hits": 0, "misses": 0, "stale": 0})
+        self.evictions = 0
+
+    def _remove(self, key):
+        _, text = self._entries.pop(key)
+        self._bytes -= len(text)
+
+    def get(self, tool_name: str, key, version) -> str | None:
+        """Returns the cached text for `key` if it was stored under `version`."""
+        with self._lock:
+            entry = self._entries.get(key)
+            stats = self._stats[tool_name]
+            if entry is None:
+                stats["misses"] += 1
+                return None
+            if entry[0] != version:
+                self._remove(key)
+                stats["stale"] += 1
+                stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            stats["hits"] += 1
+            return entry[1]
+
+    def put(self, key, version, text: str):
+        """Stores `text` under `key`, evicting least recently used entries as needed."""
+        if len(text) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (version, text)
+            self._bytes += len(text)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        """Drops every cached entry."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """Returns hit/miss counts per tool and overall, plus current usage."""
+        with self._lock:
+            per_tool = {}
+            hits = misses = 0
+            for tool_name, stats in self._stats.items():
+                lookups = stats["hits"] + stats["misses"]
+                per_tool[tool_name] = {**stats, "hit_rate": round(stats["hits"] / lookups, 3) if lookups else 0.0}
+                hits += stats["hits"]
+                misses += stats["misses"]
+            return {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "tools": per_tool,
+            }
@@ -0,0 +1,85 @@
+class RelationError(ValueError):
+    """An included table that is not related to the queried table by a foreign key."""
+
+
+def find_relation(tables: dict, table_name: str, related: str) -> dict:
+    """Finds the foreign key linking `table_name` to `related`, in either direction.
+
+    Args:
+        tables (dict): Schema from `SchemaCatalog.tables()`.
+        table_name (str): The queried table.
+        related (str): The table to include with each of its rows.
+
+    Returns:
+        dict: 'table', 'kind' ("children" when `related` references
+              `table_name`, one-to-many, or "parent" when `table_name`
+              references `related`, many-to-one), and the join condition as
+              'column' (in `related`) and 'references' (in `table_name`).
+
+    Raises:
+        RelationError: If `related` does not exist or no foreign key links the two.
+    """
+    if related not in tables:
+        raise RelationError(f"table '{related}' not found in the database")
+    for key in tables[related]["foreign_keys"]:
+        if key["references_table"] == table_name:
+            return {"table": related, "kind": "children", "column": key["column"], "references": key["references_column"] or "id"}
+    for key in tables[table_name]["foreign_keys"]:
+        if key["references_table"] == related:
+            return {"table": related, "kind": "parent", "column": key["references_column"] or "id", "references": key["column"]}
+    linked = sorted(
+        name for name, table in tables.items()
+        if any(key["references_table"] == table_name for key in table["foreign_keys"])
+    ) + sorted(key["references_table"] for key in tables[table_name]["foreign_keys"])
+    raise RelationError(
+        f"no foreign key links '{table_name}' and '{related}'; "
+        f"related tables: {', '.join(linked) if linked else 'none'}"
+    )
+
+
+def related_match(relation: dict, table_name: str, conditions: list[str]) -> str:
+    """FROM and WHERE of the related rows matching one row of `table_name`."""
+    related = relation["table"]
+    where = [f"{related}.{relation['column']} = {table_name}.{relation['references']}", *conditions]
+    return f"FROM {related} WHERE {' AND '.join(where)}"
+
+
+def related_rows_sql(
+    relation: dict,
+    table_name: str,
+    columns: list[str],
+    conditions: list[str],
+    order_by: list[str],
+) -> str:
+    """Correlated subquery returning a row's related rows as one JSON value.
+
+    Children come back as a JSON array of objects in `order_by` order,
+    limited by a bound parameter (pass the limit plus one to detect more);
+    a parent comes back as a JSON object, or NULL when there is none. The
+    related rows are read through the index on the foreign key column.
+
+    Args:
+        relation (dict): From `find_relation`.
+        table_name (str): The queried table, referenced by the correlation.
+        columns (list[str]): Columns of the related table to include.
+        conditions (list[str]): Parameterized terms on the related rows, ANDed.
+        order_by (list[str]): ORDER BY terms for children.
+
+    Returns:
+        str: SQL expression for the select list.
+    """
+    fields = ", ".join(f"'{column}', {column}" for column in columns)
+    match = related_match(relation, table_name, conditions)
+    if relation["kind"] == "parent":
+        return f"(SELECT json_object({fields}) {match})"
+    # json() keeps each object as JSON rather than text once it has passed
+    # through the inner SELECT
+    return (
+        f"(SELECT json_group_array(json(item)) FROM "
+        f"(SELECT json_object({fields}) AS item {match} ORDER BY {', '.join(order_by)} LIMIT ?))"
+    )
+
+
+def related_exists_sql(relation: dict, table_name: str, conditions: list[str]) -> str:
+    """WHERE term keeping rows of `table_name` with at least one matching related row."""
+    return f"EXISTS (SELECT 1 {related_match(relation, table_name, conditions)})"
@@ -0,0 +1,36 @@
+import json
+
+try:
+    import orjson
+except ImportError:  # optional, `pip install orjson` for faster compact encoding
+    orjson = None
+
+
+def dumps_response(payload: dict, compact: bool = False) -> str:
+    """Serializes a tool response for the MCP client.
+
+    The default format is indented JSON. The compact format drops all
+    whitespace and uses orjson when it is installed.
+    """
+    if not compact:
+        return json.dumps(payload, indent=2)
+    if orjson is not None:
+        return orjson.dumps(payload).decode()
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+
+
+def shape_rows(columns: list[str], rows: list, compact: bool = False) -> dict:
+    """Builds the row part of a tool response.
+
+    Args:
+        columns (list[str]): Column names, in row order.
+        rows (list): Row tuples (or sqlite3.Row objects) matching `columns`.
+        compact (bool): Return a 'columns' header and 'rows' as arrays instead
+                        of one dict per row repeating every column name.
+
+    Returns:
+        dict: {'rows': [...]} or, when compact, {'columns': [...], 'rows': [[...], ...]}.
+    """
+    if compact:
+        return {"columns": columns, "rows": [list(row) for row in rows]}
+    return {"rows": [dict(zip(columns, row)) for row in rows]}
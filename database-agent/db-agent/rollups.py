@@ -0,0 +1,174 @@
+from date_ranges import add_months, epoch_day, from_epoch_day, parse_date_range
+from filters import FilterError, compile_filters
+
+
+# Source table -> its rollup table (see migration 4): the dimension columns
+# the rollup keeps and the summed measures, as source column -> total column.
+ROLLUP_SOURCES = {
+    "expenses": {
+        "rollup": "expense_rollups",
+        "dimensions": ("user_id", "category"),
+        "measures": {"amount": "amount_total"},
+    },
+    "workouts": {
+        "rollup": "workout_rollups",
+        "dimensions": ("user_id", "type"),
+        "measures": {"duration_minutes": "duration_minutes_total", "calories_burned": "calories_burned_total"},
+    },
+}
+
+# Source columns that are never NULL, so COUNT(column) equals COUNT(*)
+ROLLUP_COUNTABLE = {"*", "id", "date"}
+
+# time_bucket -> (group key, period label) over the rollup's `period` (an
+# epoch day). Day and week group on the integer, month and year on the label.
+ROLLUP_BUCKETS = {
+    "day": ("period", "date(period * 86400, 'unixepoch')"),
+    "week": (
+        "period - ((period + 3) % 7 + 7) % 7",
+        "date((period - ((period + 3) % 7 + 7) % 7) * 86400, 'unixepoch')",
+    ),
+    "month": ("strftime('%Y-%m', period * 86400, 'unixepoch')",) * 2,
+    "year": ("strftime('%Y', period * 86400, 'unixepoch')",) * 2,
+}
+
+
+class RollupMiss(ValueError):
+    """The request cannot be answered exactly from a rollup table."""
+
+
+# Coarsest rollup grain that fits each time_bucket ("" is no bucket)
+ROLLUP_GRAINS = {"": "month", "day": "day", "week": "week", "month": "month", "year": "month"}
+
+
+def period_start(day: int, grain: str) -> int:
+    """Epoch day on which the `grain` period containing `day` starts."""
+    if grain == "week":
+        return day - ((day + 3) % 7 + 7) % 7
+    if grain == "month":
+        return epoch_day(from_epoch_day(day).replace(day=1))
+    return day
+
+
+def range_segments(start: int | None, end: int | None, grain: str) -> list[tuple[str, int | None, int | None]]:
+    """Covers an inclusive epoch-day range with whole `grain` periods plus days at the edges.
+
+    "last 12 months" starts and ends mid-month, so it is read as the days
+    up to the first month boundary, the whole months in between, and the
+    days after the last one, instead of a year of day rows.
+
+    Returns:
+        list: (grain, first period, last period) segments; None is unbounded.
+    """
+    if grain == "day":
+        return [("day", start, end)]
+    first = start
+    if start is not None and period_start(start, grain) != start:
+        first = period_start(start, grain) + 7 if grain == "week" else epoch_day(add_months(from_epoch_day(start), 1))
+    after = period_start(end + 1, grain) if end is not None else None
+    if first is not None and after is not None and first >= after:
+        return [("day", start, end)]
+    segments = [(grain, first, None if after is None else after - 1)]
+    if start is not None and first > start:
+        segments.insert(0, ("day", start, first - 1))
+    if end is not None and after <= end:
+        segments.append(("day", after, end))
+    return segments
+
+
+def rollup_query(
+    table_name: str,
+    metrics: list[tuple[str, str]],
+    group_by: list[str],
+    time_bucket: str = "",
+    date_range: str = "",
+    filters: list[dict] | None = None,
+) -> tuple[str, list, str]:
+    """Translates an aggregate_table request into a query on the table's rollup.
+
+    The result has the same columns, names and order as aggregate_table
+    would return for the raw table, over rows with a valid date. SUM, COUNT
+    and AVG of the rolled-up measures are supported; MIN and MAX are not,
+    as rollups cannot maintain them under deletes.
+
+    Args:
+        table_name (str): Source table.
+        metrics (list[tuple[str, str]]): (function, column) pairs, e.g. ("SUM", "amount").
+        group_by (list[str]): Columns to group by.
+        time_bucket (str): "", "day", "week", "month" or "year".
+        date_range (str): Range of the `date` column, as for `parse_date_range`.
+        filters (list[dict]): Structured filters, as for `compile_filters`.
+
+    Returns:
+        tuple: (sql, params, grains read, e.g. "day+month") with the LIMIT left to the caller.
+
+    Raises:
+        RollupMiss: If any part of the request needs the raw rows.
+        ValueError: If `date_range` cannot be parsed.
+    """
+    source = ROLLUP_SOURCES.get(table_name)
+    if source is None:
+        raise RollupMiss(f"table '{table_name}' has no rollup")
+    dimensions, measures = source["dimensions"], source["measures"]
+
+    select = []
+    group_terms = []
+    if time_bucket:
+        if time_bucket not in ROLLUP_BUCKETS:
+            raise RollupMiss(f"unsupported time_bucket '{time_bucket}'")
+        bucket_key, bucket_label = ROLLUP_BUCKETS[time_bucket]
+        select.append(f"{bucket_label} AS period")
+        group_terms.append(bucket_key)
+    for column in group_by:
+        if column not in dimensions:
+            raise RollupMiss(f"group_by column '{column}' is not kept in the rollup")
+        select.append(column)
+        group_terms.append(column)
+
+    for function, column in metrics:
+        alias = f"{function.lower()}_{'all' if column == '*' else column}"
+        if function == "SUM" and column in measures:
+            select.append(f"SUM({measures[column]}) AS {alias}")
+        elif function == "AVG" and column in measures:
+            select.append(f"SUM({measures[column]}) * 1.0 / SUM(entry_count) AS {alias}")
+        elif function == "COUNT" and (column in ROLLUP_COUNTABLE or column in dimensions or column in measures):
+            select.append(f"COALESCE(SUM(entry_count), 0) AS {alias}")
+        else:
+            raise RollupMiss(f"{function}({column}) cannot be computed from the rollup")
+
+    start, end = parse_date_range(date_range) if date_range and date_range.strip() else (None, None)
+    segments = range_segments(start, end, ROLLUP_GRAINS[time_bucket])
+    filter_condition, filter_params = "", []
+    if filters:
+        try:
+            filter_condition, filter_params = compile_filters(filters, list(dimensions))
+        except FilterError as e:
+            raise RollupMiss(f"filters need the raw rows ({e})") from e
+
+    segment_conditions = []
+    params = []
+    for grain, first, last in segments:
+        where = ["grain = ?"]
+        params.append(grain)
+        if filter_condition:
+            where.append(filter_condition)
+            params.extend(filter_params)
+        if first is not None:
+            where.append("period >= ?")
+            params.append(first)
+        if last is not None:
+            where.append("period <= ?")
+            params.append(last)
+        segment_conditions.append(" AND ".join(where))
+
+    rollup = source["rollup"]
+    if len(segment_conditions) == 1:
+        query = f"SELECT {', '.join(select)} FROM {rollup} WHERE {segment_conditions[0]}"
+    else:
+        union = " UNION ALL ".join(f"SELECT * FROM {rollup} WHERE {condition}" for condition in segment_conditions)
+        query = f"SELECT {', '.join(select)} FROM ({union})"
+    if group_terms:
+        query += f" GROUP BY {', '.join(group_terms)} ORDER BY {', '.join(group_terms)}"
+    grains = "+".join(dict.fromkeys(grain for grain, _, _ in segments))
+    return query, params, grains
+
@@ -0,0 +1,130 @@
+import logging
+import threading
+
+from connection_manager import ConnectionManager
+
+
+# Tables the server maintains itself (rollups, change log, streak state; see
+# migrations 4, 5 and 8). Together with SQLite's own tables, the FTS tables of
+# migration 7 and their shadow tables, and tables being rebuilt, they are kept
+# out of the catalog: the tools neither show them to the agent nor write them.
+INTERNAL_TABLES = frozenset({
+    "expense_rollups",
+    "workout_rollups",
+    "change_log",
+    "habit_streaks",
+    "habit_streak_changes",
+})
+
+
+def is_internal_table(name: str, kind: str, table_names: set[str]) -> bool:
+    """Whether a table (with its `PRAGMA table_list` type) is internal, see INTERNAL_TABLES."""
+    return (
+        name in INTERNAL_TABLES
+        or name.startswith("sqlite_")
+        or kind in ("virtual", "shadow")
+        or (name.endswith("_rebuild") and name.removesuffix("_rebuild") in table_names)
+    )
+
+
+class SchemaCatalog:
+    """In-process cache of the database schema.
+
+    Holds the tables the agent works with (not the internal ones), their
+    columns, indexes and foreign keys, and reloads them only when SQLite's
+    `PRAGMA schema_version` changes, so repeated schema lookups cost a single
+    PRAGMA read instead of a round of `sqlite_master` and `PRAGMA table_xinfo`
+    queries.
+
+    Args:
+        db (ConnectionManager): Connection manager used to read the schema.
+    """
+
+    def __init__(self, db: ConnectionManager):
+        self.db = db
+        self._lock = threading.Lock()
+        self._schema_version = None
+        self._tables = {}
+
+    def _load(self, conn) -> dict:
+        tables = {}
+        kinds = {row["name"]: row["type"] for row in conn.execute("SELECT name, type FROM pragma_table_list WHERE schema = 'main';")}
+        table_names = [
+            row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' ORDER BY rowid;"
+            )
+            if not is_internal_table(row[0], kinds.get(row[0], "table"), set(kinds))
+        ]
+        for table_name in table_names:
+            columns = [
+                {
+                    "name": row["name"],
+                    "type": row["type"],
+                    "not_null": bool(row["notnull"]),
+                    "default": row["dflt_value"],
+                    "primary_key": bool(row["pk"]),
+                    "generated": row["hidden"] in (2, 3),
+                }
+                # table_xinfo also lists generated columns (hidden 2/3); 1 marks
+                # the hidden columns of virtual tables
+                for row in conn.execute("SELECT * FROM pragma_table_xinfo(?);", (table_name,))
+                if row["hidden"] != 1
+            ]
+            indexes = []
+            for row in conn.execute("SELECT * FROM pragma_index_list(?);", (table_name,)):
+                index_columns = [
+                    info["name"]
+                    for info in conn.execute("SELECT * FROM pragma_index_info(?) ORDER BY seqno;", (row["name"],))
+                ]
+                indexes.append({
+                    "name": row["name"],
+                    "unique": bool(row["unique"]),
+                    "columns": index_columns,
+                })
+            foreign_keys = [
+                {
+                    "column": row["from"],
+                    "references_table": row["table"],
+                    "references_column": row["to"],
+                }
+                for row in conn.execute("SELECT * FROM pragma_foreign_key_list(?);", (table_name,))
+            ]
+            tables[table_name] = {
+                "columns": columns,
+                "indexes": indexes,
+                "foreign_keys": foreign_keys,
+            }
+        return tables
+
+    def tables(self) -> dict:
+        """Returns the cached schema, reloading it first if it has changed.
+
+        Returns:
+            dict: Mapping of table name to a dict with 'columns', 'indexes'
+                  and 'foreign_keys'. Treat it as read-only.
+        """
+        with self.db.reader() as conn:
+            schema_version = conn.execute("PRAGMA schema_version;").fetchone()[0]
+            if schema_version == self._schema_version:
+                return self._tables
+
+            with self._lock:
+                if schema_version != self._schema_version:
+                    self._tables = self._load(conn)
+                    self._schema_version = schema_version
+                    logging.info(f"Schema catalog reloaded at schema_version {schema_version}")
+                return self._tables
+
+    def table(self, table_name: str) -> dict | None:
+        """Returns the cached schema of a single table, or None if it does not exist."""
+        return self.tables().get(table_name)
+
+    def column_names(self, table_name: str, writable: bool = False) -> list[str]:
+        """Returns the column names of a table, or an empty list if it does not exist.
+
+        With `writable`, generated columns (which cannot be inserted or updated) are left out.
+        """
+        table = self.table(table_name)
+        if table is None:
+            return []
+        return [column["name"] for column in table["columns"] if not (writable and column["generated"])]
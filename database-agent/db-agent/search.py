@@ -0,0 +1,128 @@
+import re
+
+from connection_manager import ConnectionManager
+
+
+# Searchable text per table: table -> (indexed columns, user id expression,
+# date expression, extra join). `t` is the source table.
+SEARCH_SOURCES = {
+    "expenses": (("description",), "t.user_id", "t.date", ""),
+    "workouts": (("notes",), "t.user_id", "t.date", ""),
+    "habits": (("name", "description"), "t.user_id", "date(t.created_at)", ""),
+    "habit_logs": (("notes",), "h.user_id", "t.date", "JOIN habits h ON h.id = t.habit_id"),
+}
+
+SEARCH_TOKEN_PATTERN = re.compile(r"\w+\*?")
+
+
+def search_schema(table: str) -> list[str]:
+    """External-content FTS5 table over `table`, kept in sync by triggers."""
+    columns = SEARCH_SOURCES[table][0]
+    fts = f"{table}_fts"
+    names = ", ".join(columns)
+    new_values = ", ".join(f"NEW.{column}" for column in columns)
+    old_values = ", ".join(f"OLD.{column}" for column in columns)
+    return [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {names}, content='{table}', content_rowid='id', tokenize='porter unicode61'
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO {fts} (rowid, {names}) VALUES (NEW.id, {new_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table}
+        BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', OLD.id, {old_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE OF id, {names} ON {table}
+        BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {names}) VALUES ('delete', OLD.id, {old_values});
+            INSERT INTO {fts} (rowid, {names}) VALUES (NEW.id, {new_values});
+        END
+        """,
+    ]
+
+
+def match_expression(text: str) -> str:
+    """Turns free text into an FTS5 query matching entries containing every word.
+
+    Each word is quoted so punctuation and FTS5 keywords in the input cannot
+    break the query; a trailing '*' keeps prefix matching ("coff*").
+    """
+    terms = []
+    for token in SEARCH_TOKEN_PATTERN.findall(text or ""):
+        word = token.rstrip("*")
+        terms.append(f'"{word}"*' if token.endswith("*") else f'"{word}"')
+    return " ".join(terms)
+
+
+class SearchIndex:
+    """Full-text search over the free-text columns of the tracker tables.
+
+    Each source table gets an external-content FTS5 table (the text is not
+    stored twice) that triggers keep in sync with inserts, updates and
+    deletes. The FTS tables are created, and filled from existing rows, by
+    migration 7.
+
+    Args:
+        db (ConnectionManager): Connection manager of the indexed database.
+    """
+
+    def __init__(self, db: ConnectionManager):
+        self.db = db
+
+    def search(self, conn, text: str, tables: list[str], user_id: int = 0, limit: int = 20) -> list[dict]:
+        """Returns the best matches for `text` across `tables`, best first.
+
+        Args:
+            conn: A read connection.
+            text (str): Words to search for; every word must match.
+            tables (list[str]): Source tables to search, from SEARCH_SOURCES.
+            user_id (int): Only return entries of this user when non-zero.
+            limit (int): Maximum number of matches.
+
+        Returns:
+            list[dict]: 'table', 'id', 'user_id', 'date', 'snippet' (matches in
+            [brackets]) and 'rank' (bm25, lower is better) per match.
+        """
+        expression = match_expression(text)
+        if not expression:
+            return []
+        parts = []
+        params = []
+        for table in tables:
+            _, user_expression, date_expression, join = SEARCH_SOURCES[table]
+            fts = f"{table}_fts"
+            # FTS5's hidden `rank` column (bm25 by default) lets it order
+            # matches internally instead of a separate bm25() sort
+            part = f"""
+                SELECT * FROM (
+                    SELECT '{table}' AS source, t.id AS id, {user_expression} AS user_id,
+                           {date_expression} AS date, snippet({fts}, -1, '[', ']', '...', 12) AS snippet,
+                           {fts}.rank AS rank
+                    FROM {fts} JOIN {table} t ON t.id = {fts}.rowid {join}
+                    WHERE {fts} MATCH ?{" AND " + user_expression + " = ?" if user_id else ""}
+                    ORDER BY {fts}.rank LIMIT ?
+                )
+            """
+            parts.append(part)
+            params.extend([expression, user_id, limit] if user_id else [expression, limit])
+        query = " UNION ALL ".join(parts) + " ORDER BY rank LIMIT ?;"
+        return [
+            {
+                "table": row["source"],
+                "id": row["id"],
+                "user_id": row["user_id"],
+                "date": row["date"],
+                "snippet": row["snippet"],
+                "rank": round(row["rank"], 3),
+            }
+            for row in conn.execute(query, [*params, limit])
+        ]
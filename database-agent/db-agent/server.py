@@ -1,36 +1,377 @@
+import argparse
 import asyncio 
+import base64
+import contextlib
+import functools
+import inspect
 import json 
 import logging 
 import os 
+import re
+import signal
 import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
 
 import mcp.server.stdio
 from dotenv import load_dotenv
 
-from google.adk.tools.function_tool import FunctionTool
-from google.adk.tools.mcp_tool.conversion_utils import adk_to_mcp_tool_type
 
 from mcp import types as mcp_types 
 from mcp.server.lowlevel import NotificationOptions, Server
 from mcp.server.models import InitializationOptions
 
+from change_feed import read_changes
+from connection_manager import ConnectionManager
+from date_ranges import date_range_condition
+from filters import FilterError, compile_filters
+from migrations import CHANGE_LOG_TABLES, migrate, schema_version
+from schema_catalog import SchemaCatalog
+from search import SEARCH_SOURCES, SearchIndex
+from server_logging import ToolLogSampler, configure_logging, parse_sample_rates, truncate_payload
+from server_metrics import ServerMetrics, count_rows
+from query_budget import QueryBudget, current_budget, use_budget
+from query_cache import QUERY_CACHE_MAX_BYTES, QUERY_CACHE_MAX_ENTRIES, QueryCache
+from relations import RelationError, find_relation, related_exists_sql, related_rows_sql
+from response_encoding import dumps_response, shape_rows
+from rollups import rollup_query
+from streaks import StreakEngine
+from tool_schemas import load_tool_schemas
+
 load_dotenv()
 
 LOG_FILE= os.path.join(os.path.dirname(__file__), "server.log")
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s",
-    handlers=[logging.FileHandler(LOG_FILE, mode="w"),]
+# Records are written to a size-rotated file by a background thread
+LOG_LISTENER = configure_logging(LOG_FILE)
+# Fraction of calls whose arguments and responses are logged, per tool,
+# e.g. DB_LOG_SAMPLE_RATES="query_db_table=0.1,default=1"
+LOG_SAMPLER = ToolLogSampler(parse_sample_rates(os.getenv("DB_LOG_SAMPLE_RATES", "")))
+
+# Per-tool latency/row/payload metrics, dumped to this file on shutdown
+METRICS = ServerMetrics()
+STATS_FILE = os.getenv("DB_STATS_FILE", os.path.join(os.path.dirname(__file__), "server_stats.json"))
+
+DATABASE_PATH = os.getenv(
+    "LIFE_TRACKER_DB_PATH",
+    os.path.join(os.path.dirname(__file__), "life_tracker.db"),
+)
+
+# Long-lived connections shared by every tool call
+DB = ConnectionManager(DATABASE_PATH)
+
+# Migrations that read whole tables (index builds, backfills) hold the write
+# lock until they finish, so at startup they only run while those tables are
+# smaller than this; bigger databases are migrated offline with
+# `python db-agent/migrations.py <database>`, and the tools that need the
+# pending migrations say so until then
+STARTUP_MIGRATION_MAX_ROWS = int(os.getenv("DB_STARTUP_MIGRATION_MAX_ROWS", "50000"))
+
+# Bring databases created by older versions up to the current schema
+with DB.writer() as conn:
+    migrate(conn, max_rows=STARTUP_MIGRATION_MAX_ROWS)
+
+
+def pending_migration(version: int, tool: str) -> str | None:
+    """Message for a tool whose tables come from a migration not applied yet, else None."""
+    with DB.reader() as conn:
+        if schema_version(conn) >= version:
+            return None
+    return (
+        f"'{tool}' needs schema migration {version}, which was too large to apply at server startup. "
+        f"Run `python db-agent/migrations.py` on the database to apply it."
+    )
+
+
+# Serialize every response in the compact format (columnar rows, no
+# whitespace) unless a call explicitly asks otherwise
+COMPACT_RESPONSES = os.getenv("DB_COMPACT_RESPONSES", "").lower() in ("1", "true", "yes")
+
+# Schema metadata, reloaded only when PRAGMA schema_version changes
+CATALOG = SchemaCatalog(DB)
+
+# Incrementally maintained habit streaks
+STREAKS = StreakEngine(DB)
+
+# Searches over the FTS5 indexes on descriptions and notes (built by migration 7)
+SEARCH = SearchIndex(DB)
+
+# MCP tool schemas generated from the tool signatures, reused across restarts
+# until a signature or docstring changes
+TOOL_SCHEMA_CACHE = os.getenv(
+    "DB_TOOL_SCHEMA_CACHE", os.path.join(os.path.dirname(__file__), "tool_schemas.json")
+)
+
+# Serialized responses of read tools, valid while DB.version() is unchanged
+QUERY_CACHE = QueryCache(
+    max_entries=int(os.getenv("DB_QUERY_CACHE_ENTRIES", QUERY_CACHE_MAX_ENTRIES)),
+    max_bytes=int(os.getenv("DB_QUERY_CACHE_BYTES", QUERY_CACHE_MAX_BYTES)),
 )
 
-DATABASE_PATH = os.path.join(os.path.dirname(__file__), "life_tracker.db")
+# Tools run off the event loop: reads share a pool sized to the read
+# connections, writes are serialized through a single worker thread.
+TOOL_TIMEOUT_SECONDS = float(os.getenv("DB_TOOL_TIMEOUT_SECONDS", "30"))
+READ_EXECUTOR = ThreadPoolExecutor(max_workers=DB.read_pool_size, thread_name_prefix="db-read")
+WRITE_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-write")
+
+# Budgets for the SQL of each MCP tool call (0 disables a limit). Over-budget
+# statements are interrupted and rolled back; see query_budget.py. The time
+# budget stays below the tool timeout so calls stop themselves first.
+CALL_TIME_BUDGET_SECONDS = float(os.getenv("DB_CALL_TIME_BUDGET_SECONDS", "10"))
+CALL_STEP_BUDGET = int(os.getenv("DB_CALL_STEP_BUDGET", "1000000000"))
+CALL_ROW_BUDGET = int(os.getenv("DB_CALL_ROW_BUDGET", "10000"))
+
+# Pagination for query_db_table
+QUERY_DEFAULT_LIMIT = 100
+QUERY_MAX_LIMIT = 1000
+
+# Supported keyset orderings: order_by -> (key columns, descending)
+QUERY_ORDERINGS = {
+    "id": (("rowid",), False),
+    "id desc": (("rowid",), True),
+    "date": (("date", "rowid"), False),
+    "date desc": (("date", "rowid"), True),
+}
+
+# Related rows listed per row and included table by query_with_related
+RELATED_DEFAULT_LIMIT = 20
+RELATED_MAX_LIMIT = 200
+
+# Aggregation for aggregate_table
+AGGREGATE_FUNCTIONS = ("SUM", "AVG", "COUNT", "MIN", "MAX")
+AGGREGATE_METRIC_PATTERN = re.compile(r"^\s*(\w+)\s*\(\s*(\*|\w+)\s*\)\s*$")
+AGGREGATE_MAX_GROUPS = 1000
+
+# Bulk inserts for insert_rows_into_table
+BULK_INSERT_MAX_ROWS = 10_000
+
+# Multi-operation batches for run_batch; "$N" refers to the row id inserted by step N
+BATCH_MAX_OPERATIONS = 100
+BATCH_OPERATIONS = ("insert", "update", "delete", "query")
+BATCH_REFERENCE_PATTERN = re.compile(r"\$(\d+)\b")
+
+# Full-text search for search_entries
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 200
+
+# Change log entries read per changes_since call
+CHANGES_DEFAULT_LIMIT = 1000
+CHANGES_MAX_LIMIT = 10_000
+
+# Time buckets over the `date` column; weeks start on Monday
+TIME_BUCKETS = {
+    "day": "date(date)",
+    "week": "date(date, 'weekday 0', '-6 days')",
+    "month": "strftime('%Y-%m', date)",
+    "year": "strftime('%Y', date)",
+}
+
+# Buckets computed from the integer `date_day` column where a table has it:
+# bucket -> (integer group key, period label). Grouping on the integer key
+# formats one label per group instead of parsing every row's date text.
+# Day 0 (1970-01-01) was a Thursday.
+DAY_BUCKETS = {
+    "day": ("date_day", "date(date_day * 86400, 'unixepoch')"),
+    "week": (
+        "date_day - ((date_day + 3) % 7 + 7) % 7",
+        "date((date_day - ((date_day + 3) % 7 + 7) % 7) * 86400, 'unixepoch')",
+    ),
+}
+
+
+# UTILITY FUNCTIONS
+def encode_query_cursor(table_name: str, order_by: str, key: list) -> str:
+    """Encodes the keyset position after the last returned row as an opaque string."""
+    payload = json.dumps({"t": table_name, "o": order_by, "k": key}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_query_cursor(cursor: str, table_name: str, order_by: str) -> list:
+    """Decodes a cursor from `encode_query_cursor`, checking it belongs to this query."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError as e:
+        raise ValueError(f"Invalid cursor: {e}") from e
+    if payload.get("t") != table_name or payload.get("o") != order_by:
+        raise ValueError("Cursor was issued for a different table or ordering.")
+    return payload["k"]
+
+
+def date_range_filter(table_name: str, date_range: str) -> tuple[str, list]:
+    """Turns a `date_range` tool argument into a parameterized condition on the table.
+
+    Tables with the integer `date_day` column get an index range scan on it;
+    other tables with a `date` column fall back to comparing the text.
+    """
+    table_columns = CATALOG.column_names(table_name)
+    if "date_day" in table_columns:
+        return date_range_condition(date_range)
+    if "date" in table_columns:
+        return date_range_condition(date_range, day_column=None)
+    raise ValueError(f"Table '{table_name}' has no 'date' column to filter by date_range.")
+
+
+def build_where(
+    table_name: str,
+    table_columns: list[str],
+    conditions: str = "",
+    filters: list[dict] | None = None,
+    date_range: str = "",
+) -> tuple[list[str], list]:
+    """Collects the WHERE terms and bound values of a row-selecting tool call.
+
+    Raw `conditions` are spliced in as given; `filters` and `date_range` are
+    compiled to parameterized SQL over columns checked against the catalog.
+
+    Returns:
+        tuple: (terms to AND together, parameters in order).
+    """
+    where = []
+    params = []
+    if conditions and conditions.strip():
+        where.append(f"({conditions})")
+    if filters:
+        filter_condition, filter_params = compile_filters(filters, table_columns)
+        where.append(filter_condition)
+        params.extend(filter_params)
+    if date_range and date_range.strip():
+        range_condition, range_params = date_range_filter(table_name, date_range)
+        where.append(range_condition)
+        params.extend(range_params)
+    return where, params
+
+
+def query_ordering(table_name: str, table_columns: list[str], order_by: str) -> tuple[tuple[str, ...], bool]:
+    """Resolves a keyset `order_by` (see QUERY_ORDERINGS) to the table's key columns.
+
+    Returns:
+        tuple: (key columns, descending).
+
+    Raises:
+        ValueError: If the ordering is unsupported or the table has no `date` to order by.
+    """
+    if order_by not in QUERY_ORDERINGS:
+        raise ValueError(f"Unsupported order_by '{order_by}'. Use one of: {', '.join(QUERY_ORDERINGS)}.")
+    key_columns, descending = QUERY_ORDERINGS[order_by]
+    if "date" in key_columns:
+        if "date" not in table_columns:
+            raise ValueError(f"Table '{table_name}' has no 'date' column to order by.")
+        # Order by day (then id) on the indexed integer column when there is one
+        if "date_day" in table_columns:
+            key_columns = tuple("date_day" if column == "date" else column for column in key_columns)
+    return key_columns, descending
+
+
+def keyset_condition(table_name: str, key_columns: tuple[str, ...], descending: bool, key: list) -> tuple[str, list]:
+    """WHERE term selecting the rows after `key` (a cursor's last row) in keyset order.
 
+    `date_day` is NULL for dates that are not ISO dates. SQLite sorts NULLs
+    first ascending and last descending, but row-value comparisons never
+    match them, so NULL-dated rows are matched explicitly: by rowid while the
+    cursor is among them, and after the last dated row when descending.
 
-# UTILITY FUNCTION
-def get_db_connection():
-    conn = sqlite3.connect(DATABASE_PATH)
-    conn.row_factory = sqlite3.Row 
-    return conn 
+    Returns:
+        tuple: (condition, parameters).
+    """
+    operator = "<" if descending else ">"
+    if key_columns[0] != "date_day":
+        return f"({', '.join(key_columns)}) {operator} ({', '.join('?' * len(key_columns))})", list(key)
+    day, row_id = key
+    if day is None:
+        if descending:
+            return "(date_day IS NULL AND rowid < ?)", [row_id]
+        return "(date_day IS NOT NULL OR rowid > ?)", [row_id]
+    condition = f"(date_day, rowid) {operator} (?, ?)"
+    if descending:
+        # The extra branch costs the range bound on date_day, so it is only
+        # added when the table has undated rows (an index lookup)
+        with DB.reader() as conn:
+            has_undated = conn.execute(f"SELECT 1 FROM {table_name} WHERE date_day IS NULL LIMIT 1;").fetchone()
+        if has_undated:
+            condition = f"({condition} OR date_day IS NULL)"
+    return condition, [day, row_id]
+
+
+def returning_clause(table_name: str, table_columns: list[str], returning: str) -> str:
+    """Builds the RETURNING clause for `returning` ("*" or comma-separated columns).
+
+    Raises:
+        ValueError: If a column does not exist in the table.
+    """
+    if not returning or not returning.strip():
+        return ""
+    if returning.strip() == "*":
+        return " RETURNING *"
+    names = [name.strip() for name in returning.split(",") if name.strip()]
+    unknown = [name for name in names if name not in table_columns]
+    if unknown:
+        raise ValueError(f"Unknown returning columns for table '{table_name}': {', '.join(unknown)}")
+    return " RETURNING " + ", ".join(names)
+
+
+def read_returned_rows(result: sqlite3.Cursor, limit: int) -> tuple[list[str], list, int]:
+    """Steps a write with a RETURNING clause to completion, keeping its first `limit` rows.
+
+    SQLite applies the whole change on the first step, but the statement only
+    finishes (and its row count is only known) once every returned row has
+    been read, so the rows past `limit` are read and dropped.
+
+    Returns:
+        tuple: (column names, kept rows, number of rows changed).
+    """
+    names = [description[0] for description in result.description]
+    rows = []
+    count = 0
+    for row in result:
+        if count < limit:
+            rows.append(row)
+        count += 1
+    return names, rows, count
+
+
+def charge_rows(count: int):
+    """Counts rows changed by the current tool call against its row budget, if any."""
+    budget = current_budget()
+    if budget is not None:
+        budget.charge_rows(count)
+
+
+def run_with_budget(func, arguments: dict, budget: QueryBudget) -> dict:
+    """Runs a tool on the calling (worker) thread with `budget` enforced on its SQL.
+
+    Responses of calls that went over budget get a 'budget_exceeded' entry
+    with the reason, the limits and what was used.
+    """
+    with use_budget(budget):
+        response = func(**arguments)
+    if budget.exceeded and isinstance(response, dict):
+        response["budget_exceeded"] = budget.report()
+        if "interrupted" in response.get("message", ""):
+            response["message"] += f" (stopped: {budget.exceeded})"
+    return response
+
+
+def normalize_tool_arguments(func, arguments: dict) -> str | None:
+    """Builds a cache key for a tool call, or None if the arguments do not bind.
+
+    Defaults are filled in and string arguments stripped, so calls that only
+    differ in omitted defaults or surrounding whitespace share an entry. A
+    `date_range` may be relative ("this week"), so today's date is part of
+    the key whenever one is given.
+    """
+    try:
+        bound = inspect.signature(func).bind(**arguments)
+    except TypeError:
+        return None
+    bound.apply_defaults()
+    normalized = {
+        name: value.strip() if isinstance(value, str) else value
+        for name, value in bound.arguments.items()
+    }
+    if normalized.get("date_range"):
+        normalized["_today"] = date.today().isoformat()
+    return json.dumps(normalized, sort_keys=True, default=str)
 
 
 # MCP TOOLS
@@ -45,10 +386,7 @@ def list_db_tables(dummy_param: str) -> dict:
               and 'tables' (list[str]) containing the table names if successful.
     """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = [row[0] for row in cursor.fetchall()]
+        tables = list(CATALOG.tables())
         logging.info(f"Successfully listed all tables in the database: {tables}")
 
         return {
@@ -62,27 +400,21 @@ def list_db_tables(dummy_param: str) -> dict:
     except Exception as e:
         logging.error(f"An unexpected error occurred while listing tables: {e}")
         return {"success": False, "message": f"An unexpected error occurred while listing tables: {e}", "tables": []}  
-    finally:
-        conn.close()
 
 
 def get_table_schema(table_name: str) -> dict:
     """Gets the schema (column names and types) of a specific table."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute(f"PRAGMA table_info('{table_name}');")
-        schema_info = cursor.fetchall()
-        logging.info(f"Successfully retrieved schema for table '{table_name}': {schema_info}")
-        if not schema_info:
+        table = CATALOG.table(table_name)
+        if table is None:
             return {
                 "success": False,
                 "message": f"Table '{table_name}' not found in the database.",
                 "schema": {}
             }
         
-        schema = [{"name": row["name"], "type": row["type"]} for row in schema_info]
-        logging.info(f"Successfully retrieved schema for table '{table_name}': {schema}")
+        schema = [{"name": column["name"], "type": column["type"]} for column in table["columns"]]
+        logging.info(f"Successfully retrieved schema for table '{table_name}' with {len(schema)} columns")
         return {
             "table_name": table_name,
             "columns": schema,
@@ -101,211 +433,1347 @@ def get_table_schema(table_name: str) -> dict:
             "message": f"An unexpected error occurred while retrieving schema for table '{table_name}': {e}",
             "schema": {}
         }
-    finally:
-        conn.close()
 
 
-def query_db_table(table_name: str, columns: str, conditions: str) -> list[dict]:
-    """Queries a table with an optional condition.
+def describe_database(dummy_param: str) -> dict:
+    """Describes the whole database schema in a single call.
+
+    Args:
+        dummy_param (str): This parameter is not used by the function
+                           but helps ensure schema generation. A non-empty string is expected.
+    Returns:
+        dict: A dictionary with keys 'success' (bool), 'message' (str), and 'tables'
+              mapping each table name to its 'columns' (name, type, not_null, default,
+              primary_key, generated), 'indexes' (name, unique, columns) and 'foreign_keys'
+              (column, references_table, references_column).
+    """
+    try:
+        tables = CATALOG.tables()
+        logging.info(f"Successfully described database with {len(tables)} tables")
+        return {
+            "success": True,
+            "message": f"Successfully described {len(tables)} tables.",
+            "tables": tables,
+        }
+    except sqlite3.Error as e:
+        logging.error(f"Error describing database: {e}")
+        return {"success": False, "message": f"Error describing database: {e}", "tables": {}}
+    except Exception as e:
+        logging.error(f"An unexpected error occurred while describing database: {e}")
+        return {"success": False, "message": f"An unexpected error occurred while describing database: {e}", "tables": {}}
+
+
+def build_page_query(
+    table_name: str,
+    table_columns: list[str],
+    columns: str,
+    order_by: str,
+    conditions: str = "",
+    filters: list[dict] | None = None,
+    date_range: str = "",
+    cursor: str = "",
+    limit: int = QUERY_DEFAULT_LIMIT,
+) -> tuple[str, list, list[str]]:
+    """Builds the SQL of one `query_db_table` page (also explained by `explain_query`).
+
+    Returns:
+        tuple: (query, parameters, aliases of the trailing key columns).
+
+    Raises:
+        ValueError: If `order_by` or `cursor` is invalid for the table.
+    """
+    key_columns, descending = query_ordering(table_name, table_columns, order_by)
+    # Key columns are selected under private aliases so the next cursor can
+    # be built whatever the caller asked for.
+    key_aliases = [f"_key_{i}" for i in range(len(key_columns))]
+    key_select = ", ".join(f"{column} AS {alias}" for column, alias in zip(key_columns, key_aliases))
+    query = f"SELECT {columns or '*'}, {key_select} FROM {table_name}"
+
+    where, params = build_where(table_name, table_columns, conditions, filters, date_range)
+    if cursor:
+        key = decode_query_cursor(cursor, table_name, order_by)
+        key_condition, key_params = keyset_condition(table_name, key_columns, descending, key)
+        where.append(key_condition)
+        params.extend(key_params)
+    if where:
+        query += " WHERE " + " AND ".join(where)
+
+    direction = " DESC" if descending else ""
+    query += " ORDER BY " + ", ".join(f"{column}{direction}" for column in key_columns)
+    # One extra row tells us whether another page exists
+    query += " LIMIT ?;"
+    params.append(limit + 1)
+    return query, params, key_aliases
+
+
+def query_db_table(
+    table_name: str,
+    columns: str,
+    conditions: str = "",
+    limit: int = QUERY_DEFAULT_LIMIT,
+    order_by: str = "id",
+    cursor: str = "",
+    compact: bool = False,
+    date_range: str = "",
+    filters: list[dict] | None = None,
+) -> dict:
+    """Queries a table with optional filters, one page at a time.
 
     Args:
         table_name: The name of the table to query.
         columns: Comma-separated list of columns to retrieve (e.g., "id, name"). Defaults to "*".
-        condition: Optional SQL WHERE clause condition (e.g., "id = 1" or "frequency = daily").
+        conditions: Optional raw SQL WHERE clause condition (e.g., "id = 1" or "frequency = 'daily'").
+                    Prefer `filters`.
+        limit: Maximum number of rows to return (1-1000). Defaults to 100.
+        order_by: Row order, one of "id", "id desc", "date" or "date desc". Defaults to "id".
+        cursor: The 'next_cursor' value from a previous call to fetch the next page.
+                Leave empty for the first page.
+        compact: Return a 'columns' list and 'rows' as arrays instead of one dict per row.
+        date_range: Optional range of the `date` column, e.g. "2025-03", "2025-01-01..2025-03-31",
+                    "this month", "last week" or "last 30 days" (both ends inclusive).
+                    Prefer it over date comparisons in `conditions`.
+        filters: Optional list of conditions that must all hold, each an object with 'column',
+                 'op' and 'value', e.g. [{"column": "user_id", "op": "=", "value": 1},
+                 {"column": "category", "op": "in", "value": ["food", "travel"]}].
+                 Ops: =, !=, <, <=, >, >=, like, not like, in, not in, between ([low, high]),
+                 is null, is not null. {"any": [filter, ...]} holds when one of its filters does.
     Returns:
-        A list of dictionaries, where each dictionary represents a row.
+        dict: A dictionary with keys 'success' (bool), 'message' (str), 'rows' (list[dict],
+              or 'columns' and list[list] when compact), 'has_more' (bool) and
+              'next_cursor' (str, empty when there are no more rows).
     """ 
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        query = f"SELECT {columns} FROM {table_name}"
-        if conditions:
-            query += f" WHERE {conditions}"
-        query += ";"
+        order_by = (order_by or "id").strip().lower()
+        table_columns = CATALOG.column_names(table_name)
+        if not table_columns:
+            return {"success": False, "message": f"Table '{table_name}' not found in the database.", "rows": []}
+        try:
+            query_ordering(table_name, table_columns, order_by)
+        except ValueError as e:
+            return {"success": False, "message": str(e), "rows": []}
+        if not 1 <= limit <= QUERY_MAX_LIMIT:
+            return {
+                "success": False,
+                "message": f"limit must be between 1 and {QUERY_MAX_LIMIT}.",
+                "rows": []
+            }
+
+        query, params, key_aliases = build_page_query(
+            table_name, table_columns, columns, order_by, conditions, filters, date_range, cursor, limit
+        )
+
+        rows = []
+        last_key = None
+        has_more = False
+        partial = False
+        with DB.reader() as conn:
+            result = conn.execute(query, params)
+            names = [description[0] for description in result.description]
+            value_count = len(names) - len(key_aliases)
+            names = names[:value_count]
+            # Rows are stepped one at a time (as fast as fetchmany), so an
+            # interruption keeps every row read before it
+            try:
+                for row in result:
+                    if len(rows) == limit:
+                        has_more = True
+                        break
+                    rows.append(row[:value_count])
+                    last_key = list(row[value_count:])
+            except sqlite3.OperationalError:
+                # Out of budget part way through the page: the rows so far are
+                # still a valid (shorter) page and the cursor resumes after them
+                budget = current_budget()
+                if budget is None or not budget.exceeded or not rows:
+                    raise
+                has_more = partial = True
 
-        cursor.execute(query)
-        rows = [dict(row) for row in cursor.fetchall()]
-        logging.info(f"Successfully queried table '{table_name}' with {len(rows)} rows")
-        return rows
+        next_cursor = encode_query_cursor(table_name, order_by, last_key) if has_more else ""
+        logging.info(f"Successfully queried table '{table_name}' with {len(rows)} rows (has_more={has_more})")
+        message = f"Returned {len(rows)} rows from table '{table_name}'."
+        if partial:
+            message = (
+                f"Returned {len(rows)} rows from table '{table_name}' before the call ran out of budget "
+                f"({current_budget().exceeded}); more rows may match, pass next_cursor to continue."
+            )
+        response = {
+            "success": True,
+            "message": message,
+            **shape_rows(names, rows, compact),
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+        }
+        if partial:
+            response["partial"] = True
+        return response
 
+    except FilterError as e:
+        return {"success": False, "message": f"Invalid filters: {e}", "rows": []}
     except sqlite3.Error as e:
-        return [{
+        return {
             "success": False,
             "message": f"Error querying table '{table_name}': {e}",
             "rows": []
-        }]
+        }
     except Exception as e:
-        return [{
+        return {
             "success": False,
             "message": f"An unexpected error occurred while querying table '{table_name}': {e}",
             "rows": []
-        }]
-    finally:
-        conn.close()
+        }
 
 
-def insert_data_into_table(table_name: str, data: dict) -> dict:
-    """Inserts a new row of data into the specified table.
+def query_with_related(
+    table_name: str,
+    include: str,
+    columns: str = "*",
+    filters: list[dict] | None = None,
+    date_range: str = "",
+    conditions: str = "",
+    related_filters: dict | None = None,
+    related_date_range: str = "",
+    only_with_related: bool = False,
+    related_limit: int = RELATED_DEFAULT_LIMIT,
+    limit: int = QUERY_DEFAULT_LIMIT,
+    order_by: str = "id",
+    cursor: str = "",
+    compact: bool = False,
+) -> dict:
+    """Queries a table together with the rows of related tables, in one call.
 
-    Args:
-        table_name (str): The name of the table to insert data into.
-        data (dict): A dictionary where keys are column names and values are the
-                     corresponding values for the new row.
+    Relations follow the foreign keys: users -> expenses, workouts and habits,
+    and habits -> habit_logs. Each returned row gets one extra field per
+    included table: a list of its related rows (e.g. a habit's logs, newest
+    first) or the single row it belongs to (e.g. an expense's user). Use it
+    instead of querying one table and then another for every row.
 
+    Args:
+        table_name: The table to page through, e.g. "habits".
+        include: Comma-separated related tables, e.g. "habit_logs" or "expenses, workouts".
+        columns: Comma-separated columns of `table_name` to retrieve. Defaults to "*".
+        filters: Optional structured filters on `table_name`, as in `query_db_table`.
+        date_range: Optional range of the `date` column of `table_name`, as in `query_db_table`.
+        conditions: Optional raw SQL WHERE clause condition on `table_name`. Prefer `filters`.
+        related_filters: Optional structured filters per included table, e.g.
+                         {"habit_logs": [{"column": "status", "op": "=", "value": 0}]}.
+        related_date_range: Optional range of the `date` column of the included tables that have one,
+                            e.g. "this week" or "last 30 days".
+        only_with_related: Return only rows that have at least one matching row in every included table.
+        related_limit: Maximum related rows listed per row and table (1-200). Defaults to 20.
+        limit: Maximum number of rows of `table_name` to return (1-1000). Defaults to 100.
+        order_by: Row order, one of "id", "id desc", "date" or "date desc". Defaults to "id".
+        cursor: The 'next_cursor' value from a previous call to fetch the next page.
+        compact: Return a 'columns' list and 'rows' as arrays instead of one dict per row.
     Returns:
-        dict: A dictionary with keys 'success' (bool) and 'message' (str).
-              If successful, 'message' includes the ID of the newly inserted row.
+        dict: A dictionary with keys 'success' (bool), 'message' (str), 'rows' (list[dict],
+              or 'columns' and list[list] when compact), 'has_more' (bool), 'next_cursor' (str)
+              and, when some rows have more than `related_limit` related rows, 'related_truncated'
+              (included table -> ids of those rows).
     """
-    if not data:
-        return {"success": False, "message": "No data provided to insert."}
-    
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    columns = ", ".join(data.keys())
-    placeholders = ", ".join("?" * len(data))
-    values = tuple(data.values())
+    try:
+        order_by = (order_by or "id").strip().lower()
+        tables = CATALOG.tables()
+        if table_name not in tables:
+            return {"success": False, "message": f"Table '{table_name}' not found in the database.", "rows": []}
+        table_columns = CATALOG.column_names(table_name)
+        try:
+            key_columns, descending = query_ordering(table_name, table_columns, order_by)
+        except ValueError as e:
+            return {"success": False, "message": str(e), "rows": []}
+        if not 1 <= limit <= QUERY_MAX_LIMIT:
+            return {"success": False, "message": f"limit must be between 1 and {QUERY_MAX_LIMIT}.", "rows": []}
+        if not 1 <= related_limit <= RELATED_MAX_LIMIT:
+            return {"success": False, "message": f"related_limit must be between 1 and {RELATED_MAX_LIMIT}.", "rows": []}
 
-    query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
+        included = list(dict.fromkeys(name.strip() for name in (include or "").split(",") if name.strip()))
+        if not included:
+            return {"success": False, "message": "include must name at least one related table.", "rows": []}
+        try:
+            relations = [find_relation(tables, table_name, related) for related in included]
+        except RelationError as e:
+            return {"success": False, "message": f"Cannot include {e}.", "rows": []}
+        related_filters = related_filters or {}
+        unknown = [name for name in related_filters if name not in included]
+        if unknown:
+            return {
+                "success": False,
+                "message": f"related_filters names tables that are not included: {', '.join(unknown)}.",
+                "rows": []
+            }
+        if related_date_range and related_date_range.strip() and not any(
+            "date" in CATALOG.column_names(related) for related in included
+        ):
+            return {"success": False, "message": "None of the included tables has a 'date' column for related_date_range.", "rows": []}
 
-    try:
-        cursor.execute(query, values)
-        conn.commit()
-        row_id = cursor.lastrowid
-        return {
+        # Terms on each included table's rows, shared by its subquery and EXISTS
+        related_where = {}
+        for relation in relations:
+            related = relation["table"]
+            related_columns = CATALOG.column_names(related)
+            range_arg = related_date_range if "date" in related_columns else ""
+            related_where[related] = build_where(related, related_columns, "", related_filters.get(related), range_arg)
+
+        select = [columns or "*"]
+        select_params = []
+        for relation in relations:
+            related = relation["table"]
+            terms, params = related_where[related]
+            related_order = ["rowid DESC"]
+            if "date_day" in CATALOG.column_names(related):
+                related_order.insert(0, "date_day DESC")
+            subquery = related_rows_sql(relation, table_name, CATALOG.column_names(related), terms, related_order)
+            select.append(f"{subquery} AS {related}")
+            select_params.extend(params)
+            if relation["kind"] == "children":
+                # One extra related row tells us whether the list was cut short
+                select_params.append(related_limit + 1)
+        key_aliases = [f"_key_{i}" for i in range(len(key_columns))]
+        select.extend(f"{table_name}.{column} AS {alias}" for column, alias in zip(key_columns, key_aliases))
+        query = f"SELECT {', '.join(select)} FROM {table_name}"
+
+        where, params = build_where(table_name, table_columns, conditions, filters, date_range)
+        if only_with_related:
+            for relation in relations:
+                terms, related_params = related_where[relation["table"]]
+                where.append(related_exists_sql(relation, table_name, terms))
+                params.extend(related_params)
+        if cursor:
+            key = decode_query_cursor(cursor, table_name, order_by)
+            key_condition, key_params = keyset_condition(table_name, key_columns, descending, key)
+            where.append(key_condition)
+            params.extend(key_params)
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        direction = " DESC" if descending else ""
+        query += " ORDER BY " + ", ".join(f"{table_name}.{column}{direction}" for column in key_columns)
+        query += " LIMIT ?;"
+        params.append(limit + 1)
+
+        rows = []
+        last_key = None
+        has_more = False
+        partial = False
+        truncated = {}
+        with DB.reader() as conn:
+            result = conn.execute(query, select_params + params)
+            names = [description[0] for description in result.description]
+            value_count = len(names) - len(key_aliases)
+            names = names[:value_count]
+            related_positions = {
+                relation["table"]: value_count - len(relations) + index for index, relation in enumerate(relations)
+            }
+            try:
+                for row in result:
+                    if len(rows) == limit:
+                        has_more = True
+                        break
+                    values = list(row[:value_count])
+                    for relation in relations:
+                        position = related_positions[relation["table"]]
+                        related_rows = json.loads(values[position]) if values[position] is not None else None
+                        if relation["kind"] == "children" and len(related_rows) > related_limit:
+                            related_rows = related_rows[:related_limit]
+                            truncated.setdefault(relation["table"], []).append(row[-1])
+                        values[position] = related_rows
+                    rows.append(values)
+                    last_key = list(row[value_count:])
+            except sqlite3.OperationalError:
+                # Out of budget part way through the page, as in query_db_table
+                budget = current_budget()
+                if budget is None or not budget.exceeded or not rows:
+                    raise
+                has_more = partial = True
+
+        next_cursor = encode_query_cursor(table_name, order_by, last_key) if has_more else ""
+        logging.info(
+            f"Successfully queried table '{table_name}' with {', '.join(included)}: {len(rows)} rows (has_more={has_more})"
+        )
+        message = f"Returned {len(rows)} rows from table '{table_name}' with their {', '.join(included)}."
+        if truncated:
+            message += (
+                f" Some rows have more than {related_limit} related rows; see 'related_truncated' and "
+                "narrow related_filters or raise related_limit."
+            )
+        if partial:
+            message += f" The call ran out of budget ({current_budget().exceeded}); pass next_cursor to continue."
+        response = {
             "success": True,
-            "message": f"Successfully inserted data into table '{table_name}', ROW_ID: {row_id}",
-            "row_id": row_id,
+            "message": message,
+            **shape_rows(names, rows, compact),
+            "has_more": has_more,
+            "next_cursor": next_cursor,
         }
+        if truncated:
+            response["related_truncated"] = truncated
+        if partial:
+            response["partial"] = True
+        return response
+
+    except FilterError as e:
+        return {"success": False, "message": f"Invalid filters: {e}", "rows": []}
     except sqlite3.Error as e:
-        conn.rollback()
-        logging.error(f"Error inserting data into table '{table_name}': {e}")
+        logging.error(f"Error querying table '{table_name}' with related rows: {e}")
+        return {"success": False, "message": f"Error querying table '{table_name}' with related rows: {e}", "rows": []}
+    except Exception as e:
+        logging.error(f"An unexpected error occurred while querying table '{table_name}' with related rows: {e}")
         return {
             "success": False,
-            "message": f"Error inserting data into table '{table_name}': {e}",
+            "message": f"An unexpected error occurred while querying table '{table_name}' with related rows: {e}",
+            "rows": []
         }
+
+
+def aggregate_table(
+    table_name: str,
+    metrics: str,
+    group_by: str = "",
+    time_bucket: str = "",
+    conditions: str = "",
+    compact: bool = False,
+    date_range: str = "",
+    filters: list[dict] | None = None,
+) -> dict:
+    """Computes summaries (SUM/AVG/COUNT/MIN/MAX) inside SQLite, optionally grouped.
+
+    Args:
+        table_name: The name of the table to aggregate (e.g., "expenses").
+        metrics: Comma-separated aggregates over columns of the table
+                 (e.g., "SUM(amount), COUNT(*)" or "AVG(duration_minutes)").
+        group_by: Optional comma-separated columns to group by (e.g., "category" or "user_id, type").
+        time_bucket: Optional bucketing of the `date` column: "day", "week", "month" or "year".
+        conditions: Optional raw SQL WHERE clause condition (e.g., "user_id = 1"). Prefer `filters`.
+        compact: Return a 'columns' list and 'rows' as arrays instead of one dict per row.
+        date_range: Optional range of the `date` column, e.g. "2025-03", "2025-01-01..2025-03-31",
+                    "this month", "last week" or "last 30 days" (both ends inclusive).
+        filters: Optional list of {'column', 'op', 'value'} conditions that must all hold,
+                 as in `query_db_table`.
+    Returns:
+        dict: A dictionary with keys 'success' (bool), 'message' (str) and 'rows' (list[dict],
+              or 'columns' and list[list] when compact). Each row holds 'period' (when
+              time_bucket is set), the group_by columns and one value per metric named like
+              'sum_amount' or 'count_all'.
+    """
+    try:
+        table_columns = CATALOG.column_names(table_name)
+        if not table_columns:
+            return {"success": False, "message": f"Table '{table_name}' not found in the database.", "rows": []}
+
+        select = []
+        group_terms = []
+        time_bucket = (time_bucket or "").strip().lower()
+        if time_bucket:
+            if time_bucket not in TIME_BUCKETS:
+                return {
+                    "success": False,
+                    "message": f"Unsupported time_bucket '{time_bucket}'. Use one of: {', '.join(TIME_BUCKETS)}.",
+                    "rows": []
+                }
+            if "date" not in table_columns:
+                return {"success": False, "message": f"Table '{table_name}' has no 'date' column to bucket.", "rows": []}
+            if "date_day" in table_columns and time_bucket in DAY_BUCKETS:
+                bucket_key, bucket_label = DAY_BUCKETS[time_bucket]
+                select.append(f"{bucket_label} AS period")
+                group_terms.append(bucket_key)
+            else:
+                select.append(f"{TIME_BUCKETS[time_bucket]} AS period")
+                group_terms.append("period")
+
+        for column in (c.strip() for c in (group_by or "").split(",")):
+            if not column:
+                continue
+            if column not in table_columns:
+                return {"success": False, "message": f"Unknown group_by column '{column}' in table '{table_name}'.", "rows": []}
+            select.append(column)
+            group_terms.append(column)
+
+        metric_count = 0
+        for metric in (m for m in (metrics or "").split(",") if m.strip()):
+            match = AGGREGATE_METRIC_PATTERN.match(metric)
+            function, column = (match.group(1).upper(), match.group(2)) if match else (None, None)
+            if function not in AGGREGATE_FUNCTIONS:
+                return {
+                    "success": False,
+                    "message": f"Invalid metric '{metric.strip()}'. Use {'/'.join(AGGREGATE_FUNCTIONS)} over a column, e.g. SUM(amount).",
+                    "rows": []
+                }
+            if column == "*" and function != "COUNT":
+                return {"success": False, "message": f"Only COUNT accepts '*', got '{metric.strip()}'.", "rows": []}
+            if column != "*" and column not in table_columns:
+                return {"success": False, "message": f"Unknown metric column '{column}' in table '{table_name}'.", "rows": []}
+            alias = f"{function.lower()}_{'all' if column == '*' else column}"
+            select.append(f"{function}({column}) AS {alias}")
+            metric_count += 1
+        if not metric_count:
+            return {"success": False, "message": "At least one metric is required, e.g. SUM(amount).", "rows": []}
+
+        where, params = build_where(table_name, table_columns, conditions, filters, date_range)
+
+        query = f"SELECT {', '.join(select)} FROM {table_name}"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        if group_terms:
+            query += f" GROUP BY {', '.join(group_terms)} ORDER BY {', '.join(group_terms)}"
+        query += " LIMIT ?;"
+        params.append(AGGREGATE_MAX_GROUPS + 1)
+
+        with DB.reader() as conn:
+            result = conn.execute(query, params)
+            names = [description[0] for description in result.description]
+            rows = result.fetchall()
+
+        truncated = len(rows) > AGGREGATE_MAX_GROUPS
+        rows = rows[:AGGREGATE_MAX_GROUPS]
+        logging.info(f"Successfully aggregated table '{table_name}' into {len(rows)} groups")
+        message = f"Computed {len(rows)} groups from table '{table_name}'."
+        if truncated:
+            message += f" Only the first {AGGREGATE_MAX_GROUPS} groups are returned; narrow the conditions or use a coarser time_bucket."
+        return {"success": True, "message": message, **shape_rows(names, rows, compact)}
+
+    except FilterError as e:
+        return {"success": False, "message": f"Invalid filters: {e}", "rows": []}
+    except sqlite3.Error as e:
+        logging.error(f"Error aggregating table '{table_name}': {e}")
+        return {"success": False, "message": f"Error aggregating table '{table_name}': {e}", "rows": []}
+    except Exception as e:
+        logging.error(f"An unexpected error occurred while aggregating table '{table_name}': {e}")
+        return {"success": False, "message": f"An unexpected error occurred while aggregating table '{table_name}': {e}", "rows": []}
+
+
+def summarize_totals(
+    table_name: str,
+    metrics: str,
+    group_by: str = "",
+    time_bucket: str = "",
+    date_range: str = "",
+    filters: list[dict] | None = None,
+    conditions: str = "",
+    compact: bool = False,
+) -> dict:
+    """Dashboard totals (spend per category, workout minutes and calories) from pre-computed rollups.
+
+    Takes the same arguments and returns the same rows as `aggregate_table`.
+    Expense and workout totals per user, category/type and day, week, month or
+    year are read from rollup tables kept up to date on every write, so they
+    cost the same however many rows the user has. Anything the rollups do not
+    hold (MIN/MAX, other columns, raw `conditions`) is computed from the raw
+    table instead.
+
+    Args:
+        table_name: "expenses" or "workouts" use the rollups; other tables are aggregated directly.
+        metrics: Comma-separated aggregates, e.g. "SUM(amount), COUNT(*)" or
+                 "SUM(duration_minutes), SUM(calories_burned)". SUM, COUNT and AVG use the rollups.
+        group_by: Optional comma-separated columns: "user_id" and "category" (expenses) or
+                  "type" (workouts) use the rollups.
+        time_bucket: Optional bucketing of the `date` column: "day", "week", "month" or "year".
+        date_range: Optional range of the `date` column, as in `aggregate_table`.
+        filters: Optional {'column', 'op', 'value'} conditions, as in `aggregate_table`;
+                 filters on user_id and category/type use the rollups.
+        conditions: Optional raw SQL WHERE clause condition; always aggregates the raw table.
+        compact: Return a 'columns' list and 'rows' as arrays instead of one dict per row.
+    Returns:
+        dict: The `aggregate_table` response plus 'source': "rollup" or "raw".
+    """
+    time_bucket = (time_bucket or "").strip().lower()
+    try:
+        if conditions and conditions.strip():
+            raise ValueError("raw conditions need the raw rows")
+        if pending_migration(4, "summarize_totals"):
+            raise ValueError("the rollup tables are not built yet")
+        parsed_metrics = []
+        for metric in (m for m in (metrics or "").split(",") if m.strip()):
+            match = AGGREGATE_METRIC_PATTERN.match(metric)
+            if not match:
+                raise ValueError(f"invalid metric '{metric.strip()}'")
+            parsed_metrics.append((match.group(1).upper(), match.group(2)))
+        if not parsed_metrics:
+            raise ValueError("no metrics")
+        group_columns = [column.strip() for column in (group_by or "").split(",") if column.strip()]
+        query, params, grain = rollup_query(table_name, parsed_metrics, group_columns, time_bucket, date_range, filters)
+        query += " LIMIT ?;"
+        params.append(AGGREGATE_MAX_GROUPS + 1)
+
+        with DB.reader() as conn:
+            # Rollups only count rows with a valid date, which is all a
+            # date_range selects; without one, undated rows must be included
+            if not (date_range and date_range.strip()) and conn.execute(
+                f"SELECT 1 FROM {table_name} WHERE date_day IS NULL LIMIT 1;"
+            ).fetchone():
+                raise ValueError(f"'{table_name}' has rows without a valid date")
+            result = conn.execute(query, params)
+            names = [description[0] for description in result.description]
+            rows = result.fetchall()
+    except ValueError as e:
+        # RollupMiss, or arguments aggregate_table reports errors for
+        logging.info(f"Totals for '{table_name}' computed from the raw table: {e}")
+        response = aggregate_table(table_name, metrics, group_by, time_bucket, conditions, compact, date_range, filters)
+        if response.get("success"):
+            response["source"] = "raw"
+        return response
+    except sqlite3.Error as e:
+        logging.error(f"Error reading rollups for table '{table_name}': {e}")
+        return {"success": False, "message": f"Error reading rollups for table '{table_name}': {e}", "rows": []}
     except Exception as e:
-        logging.error(f"An unexpected error occurred while inserting data into table '{table_name}': {e}")
+        logging.error(f"An unexpected error occurred while reading rollups for table '{table_name}': {e}")
         return {
             "success": False,
-            "message": f"An unexpected error occurred while inserting data into table '{table_name}': {e}",
+            "message": f"An unexpected error occurred while reading rollups for table '{table_name}': {e}",
+            "rows": []
         }
-    finally:
-        conn.close()
+
+    truncated = len(rows) > AGGREGATE_MAX_GROUPS
+    rows = rows[:AGGREGATE_MAX_GROUPS]
+    logging.info(f"Answered totals for '{table_name}' from {grain} rollups in {len(rows)} groups")
+    message = f"Computed {len(rows)} groups from the {grain} rollups of table '{table_name}'."
+    if truncated:
+        message += f" Only the first {AGGREGATE_MAX_GROUPS} groups are returned; narrow the filters or use a coarser time_bucket."
+    return {"success": True, "message": message, **shape_rows(names, rows, compact), "source": "rollup"}
 
 
-def delete_data_from_table(table_name: str, condition: str) -> dict:
-    """Deletes rows from a table based on a given SQL WHERE clause condition.
+def explain_query(
+    table_name: str,
+    columns: str,
+    conditions: str = "",
+    order_by: str = "id",
+    filters: list[dict] | None = None,
+    date_range: str = "",
+) -> dict:
+    """Shows how SQLite would run a query and flags full table scans.
+
+    The plan is for the first page `query_db_table` reads with the same arguments.
 
     Args:
-        table_name (str): The name of the table to delete data from.
-        condition (str): The SQL WHERE clause condition to specify which rows to delete.
-                         This condition MUST NOT be empty to prevent accidental mass deletion.
+        table_name: The name of the table the query reads.
+        columns: Comma-separated list of columns, as passed to `query_db_table`. Defaults to "*".
+        conditions: Optional SQL WHERE clause condition, as passed to `query_db_table`.
+        order_by: Row order, one of "id", "id desc", "date" or "date desc". Defaults to "id".
+        filters: Optional structured filters, as passed to `query_db_table`.
+        date_range: Optional range of the `date` column, as passed to `query_db_table`.
+    Returns:
+        dict: A dictionary with keys 'success' (bool), 'message' (str), 'plan' (list[str])
+              with one line per plan step, 'full_scan' (bool) and 'warnings' (list[str]).
+    """
+    try:
+        table_columns = CATALOG.column_names(table_name)
+        if not table_columns:
+            return {"success": False, "message": f"Table '{table_name}' not found in the database.", "plan": []}
+        order_by = (order_by or "id").strip().lower()
+        query, params, _ = build_page_query(table_name, table_columns, columns, order_by, conditions, filters, date_range)
+
+        with DB.reader() as conn:
+            steps = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+
+        plan = [step["detail"] for step in steps]
+        warnings = []
+        for detail in plan:
+            if detail.startswith("SCAN ") and " USING " not in detail:
+                warnings.append(f"Full table scan: '{detail}'. Filter on indexed columns such as user_id, habit_id or date.")
+            elif detail.startswith("SCAN "):
+                warnings.append(f"Full index scan: '{detail}'. Add an equality or range filter on the leading index column.")
+            elif "USE TEMP B-TREE" in detail:
+                warnings.append(f"Sorting without an index: '{detail}'.")
+
+        full_scan = any(detail.startswith("SCAN ") for detail in plan)
+        logging.info(f"Explained query on table '{table_name}': {plan}")
+        return {
+            "success": True,
+            "message": "Query plan contains full scans." if full_scan else "Query plan uses indexes.",
+            "plan": plan,
+            "full_scan": full_scan,
+            "warnings": warnings,
+        }
+    except FilterError as e:
+        return {"success": False, "message": f"Invalid filters: {e}", "plan": []}
+    except ValueError as e:
+        # Unsupported order_by or unparseable date_range
+        return {"success": False, "message": str(e), "plan": []}
+    except sqlite3.Error as e:
+        logging.error(f"Error explaining query on table '{table_name}': {e}")
+        return {"success": False, "message": f"Error explaining query on table '{table_name}': {e}", "plan": []}
+    except Exception as e:
+        logging.error(f"An unexpected error occurred while explaining query on table '{table_name}': {e}")
+        return {"success": False, "message": f"An unexpected error occurred while explaining query on table '{table_name}': {e}", "plan": []}
+
+
+def get_habit_streaks(user_id: int = 0, habit_id: int = 0) -> dict:
+    """Gets current streak, longest streak and completion rate for habits.
+
+    Streaks are counted in periods of the habit's frequency (days for "daily",
+    Monday-based weeks for "weekly", months for "monthly"). A period counts as
+    completed when it has at least one habit_logs entry with status 1.
+
+    Args:
+        user_id (int): Only include habits of this user. Use 0 for all users.
+        habit_id (int): Only include this habit. Use 0 for all habits.
 
     Returns:
-        dict: A dictionary with keys 'success' (bool) and 'message' (str).
-              If successful, 'message' includes the count of deleted rows.
+        dict: A dictionary with keys 'success' (bool), 'message' (str) and 'streaks'
+              (list[dict]) with 'habit_id', 'user_id', 'name', 'frequency',
+              'current_streak', 'longest_streak', 'completed_periods', 'total_periods',
+              'completion_rate' and 'last_completed_date' per habit.
     """
-    if not condition or not condition.strip():
+    pending = pending_migration(8, "get_habit_streaks")
+    if pending:
+        return {"success": False, "message": pending, "streaks": []}
+    try:
+        with DB.writer() as conn:
+            streaks = STREAKS.streaks(conn, user_id=user_id, habit_id=habit_id)
+        logging.info(f"Successfully computed streaks for {len(streaks)} habits")
         return {
-            "success": False,
-            "message": "No condition provided for deletion. Please provide a valid WHERE clause condition."
+            "success": True,
+            "message": f"Computed streaks for {len(streaks)} habits.",
+            "streaks": streaks,
         }
-    
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    except sqlite3.Error as e:
+        logging.error(f"Error computing habit streaks: {e}")
+        return {"success": False, "message": f"Error computing habit streaks: {e}", "streaks": []}
+    except Exception as e:
+        logging.error(f"An unexpected error occurred while computing habit streaks: {e}")
+        return {"success": False, "message": f"An unexpected error occurred while computing habit streaks: {e}", "streaks": []}
+
 
-    query = f"DELETE FROM {table_name} WHERE {condition}"
+def search_entries(query: str, tables: str = "", user_id: int = 0, limit: int = SEARCH_DEFAULT_LIMIT) -> dict:
+    """Full-text search over expense descriptions, workout notes, habit names and
+    descriptions, and habit log notes, ranked by relevance.
 
+    Args:
+        query: Words to look for (e.g., "coffee" or "knee pain"). Every word must match;
+               end a word with * to match prefixes (e.g., "run*").
+        tables: Optional comma-separated tables to search: "expenses", "workouts",
+                "habits", "habit_logs". Defaults to all of them.
+        user_id: Only return entries of this user. Use 0 for all users.
+        limit: Maximum number of matches (1-200). Defaults to 20.
+    Returns:
+        dict: A dictionary with keys 'success' (bool), 'message' (str) and 'rows' (list[dict])
+              with 'table', 'id', 'user_id', 'date', 'snippet' (matched words in [brackets])
+              and 'rank' (lower is more relevant), best matches first.
+    """
     try:
-        cursor.execute(query)
-        rows_deleted = cursor.rowcount
-        conn.commit()
-        logging.info(f"Successfully deleted {rows_deleted} rows from table '{table_name}'")
+        selected = [table.strip() for table in (tables or "").split(",") if table.strip()] or list(SEARCH_SOURCES)
+        unknown = [table for table in selected if table not in SEARCH_SOURCES]
+        if unknown:
+            return {
+                "success": False,
+                "message": f"Cannot search {', '.join(unknown)}. Use any of: {', '.join(SEARCH_SOURCES)}.",
+                "rows": []
+            }
+        if not 1 <= limit <= SEARCH_MAX_LIMIT:
+            return {"success": False, "message": f"limit must be between 1 and {SEARCH_MAX_LIMIT}.", "rows": []}
+        pending = pending_migration(7, "search_entries")
+        if pending:
+            return {"success": False, "message": pending, "rows": []}
+
+        with DB.reader() as conn:
+            rows = SEARCH.search(conn, query, selected, user_id=user_id, limit=limit)
+        logging.info(f"Full-text search for '{query}' returned {len(rows)} matches")
         return {
             "success": True,
-            "message": f"Successfully deleted {rows_deleted} rows from table '{table_name}'",
-            "rows_deleted": rows_deleted
+            "message": f"Found {len(rows)} matching entries.",
+            "rows": rows,
         }
     except sqlite3.Error as e:
-        conn.rollback()
-        logging.error(f"Error deleting data from table '{table_name}': {e}")
+        logging.error(f"Error searching entries for '{query}': {e}")
+        return {"success": False, "message": f"Error searching entries: {e}", "rows": []}
+    except Exception as e:
+        logging.error(f"An unexpected error occurred while searching entries for '{query}': {e}")
+        return {"success": False, "message": f"An unexpected error occurred while searching entries: {e}", "rows": []}
+
+
+def changes_since(version: int, tables: str = "", limit: int = CHANGES_DEFAULT_LIMIT) -> dict:
+    """Returns the rows inserted, updated or deleted after a change-log version.
+
+    Every write to users, expenses, workouts, habits and habit_logs is logged
+    with an ever-increasing version. A client that keeps a copy of the data
+    calls this with the last version it applied and gets each changed row
+    once, with its current values, instead of re-reading whole tables. To
+    start, call it with version 0: the response asks for a resync and gives
+    the current version; read the tables, then sync from that version.
+
+    Args:
+        version (int): The 'version' returned by the previous call, 0 to start.
+        tables (str): Optional comma-separated tables to report (default: all).
+        limit (int): Maximum log entries read per call (1-10000). Defaults to 1000.
+
+    Returns:
+        dict: A dictionary with keys 'success' (bool), 'message' (str), 'changes' (list of
+              {'version', 'table', 'id', 'operation', 'row'}, where operation is "insert",
+              "update" or "delete" and 'row' holds the current values, None for deletes),
+              'version' (pass it to the next call), 'latest_version', 'has_more' and
+              'resync_required' (true when the log no longer covers `version`: re-read
+              the tables, then continue from 'version').
+    """
+    selected = [table.strip() for table in (tables or "").split(",") if table.strip()] or list(CHANGE_LOG_TABLES)
+    unknown = [table for table in selected if table not in CHANGE_LOG_TABLES]
+    if unknown:
         return {
             "success": False,
-            "message": f"Error deleting data from table '{table_name}': {e}",
-            "rows_deleted": 0
+            "message": f"No change feed for: {', '.join(unknown)}. Use any of: {', '.join(CHANGE_LOG_TABLES)}.",
+            "changes": []
         }
+    if not 1 <= limit <= CHANGES_MAX_LIMIT:
+        return {"success": False, "message": f"limit must be between 1 and {CHANGES_MAX_LIMIT}.", "changes": []}
+    if version < 0:
+        return {"success": False, "message": "version must be 0 or a version returned by a previous call.", "changes": []}
+    pending = pending_migration(5, "changes_since")
+    if pending:
+        return {"success": False, "message": pending, "changes": []}
+    try:
+        with DB.reader() as conn:
+            feed = read_changes(conn, version, selected, limit)
+        logging.info(f"Read {len(feed['changes'])} changed rows after version {version} (up to {feed['version']})")
+        if feed["resync_required"]:
+            message = (
+                f"The change log does not reach back to version {version}; re-read the tables, "
+                f"then continue from version {feed['version']}."
+            )
+        else:
+            message = f"{len(feed['changes'])} rows changed between versions {version} and {feed['version']}."
+        return {"success": True, "message": message, **feed}
+    except sqlite3.Error as e:
+        logging.error(f"Error reading changes since version {version}: {e}")
+        return {"success": False, "message": f"Error reading changes since version {version}: {e}", "changes": []}
     except Exception as e:
-        conn.rollback()
-        logging.error(f"An unexpected error occurred while deleting data from table '{table_name}': {e}")
+        logging.error(f"An unexpected error occurred while reading changes since version {version}: {e}")
         return {
             "success": False,
-            "message": f"An unexpected error occurred while deleting data from table '{table_name}': {e}",
-            "rows_deleted": 0
+            "message": f"An unexpected error occurred while reading changes since version {version}: {e}",
+            "changes": []
         }
-    finally:
-        conn.close()
 
 
-def update_data_in_table(table_name: str, data: dict, condition: str) -> dict:
-    """Updates rows in a table based on a given SQL WHERE clause condition.
+def get_query_cache_stats(dummy_param: str) -> dict:
+    """Reports hit rates and usage of the server's query result cache.
 
     Args:
-        table_name (str): The name of the table to update data in.
+        dummy_param (str): This parameter is not used by the function
+                           but helps ensure schema generation. A non-empty string is expected.
+    Returns:
+        dict: A dictionary with keys 'success' (bool), 'message' (str) and 'stats' with overall
+              and per-tool 'hits', 'misses' and 'hit_rate', plus 'entries', 'bytes' and 'evictions'.
+    """
+    stats = QUERY_CACHE.stats()
+    return {
+        "success": True,
+        "message": f"Query cache hit rate is {stats['hit_rate']:.1%} over {stats['hits'] + stats['misses']} lookups.",
+        "stats": stats,
+    }
+
+
+def server_stats(dummy_param: str) -> dict:
+    """Reports per-tool latency, throughput, row counts, payload sizes and errors.
+
+    Args:
+        dummy_param (str): This parameter is not used by the function
+                           but helps ensure schema generation. A non-empty string is expected.
+    Returns:
+        dict: A dictionary with keys 'success' (bool), 'message' (str), 'uptime_seconds',
+              'max_rss_kb' (peak server memory) and 'tools' mapping each tool name to 'calls',
+              'calls_per_minute', 'errors', 'statuses', 'latency_ms' (p50/p95/p99/max), 'rows'
+              and 'payload_bytes',
+              plus 'query_cache' with the result cache hit rates.
+    """
+    snapshot = METRICS.snapshot()
+    return {
+        "success": True,
+        "message": f"Metrics for {len(snapshot['tools'])} tools over {snapshot['uptime_seconds']} seconds.",
+        **snapshot,
+        "query_cache": QUERY_CACHE.stats(),
+    }
+
+
+def insert_data_into_table(table_name: str, data: dict) -> dict:
+    """Inserts a new row of data into the specified table.
+
+    Args:
+        table_name (str): The name of the table to insert data into.
         data (dict): A dictionary where keys are column names and values are the
-                     corresponding new values for the update.
-        condition (str): The SQL WHERE clause condition to specify which rows to update.
-                         This condition MUST NOT be empty to prevent accidental mass updates.
+                     corresponding values for the new row.
 
     Returns:
         dict: A dictionary with keys 'success' (bool) and 'message' (str).
-              If successful, 'message' includes the count of updated rows.
+              If successful, 'message' includes the ID of the newly inserted row.
     """
     if not data:
-        return {"success": False, "message": "No data provided to update."}
-    
-    if not condition or not condition.strip():
+        return {"success": False, "message": "No data provided to insert."}
+    if CATALOG.table(table_name) is None:
+        return {"success": False, "message": f"Table '{table_name}' not found in the database."}
+
+    columns = ", ".join(data.keys())
+    placeholders = ", ".join("?" * len(data))
+    values = tuple(data.values())
+
+    query = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
+
+    with DB.writer() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, values)
+            charge_rows(1)
+            conn.commit()
+            row_id = cursor.lastrowid
+            return {
+                "success": True,
+                "message": f"Successfully inserted data into table '{table_name}', ROW_ID: {row_id}",
+                "row_id": row_id,
+            }
+        except sqlite3.Error as e:
+            conn.rollback()
+            logging.error(f"Error inserting data into table '{table_name}': {e}")
+            return {
+                "success": False,
+                "message": f"Error inserting data into table '{table_name}': {e}",
+            }
+        except Exception as e:
+            logging.error(f"An unexpected error occurred while inserting data into table '{table_name}': {e}")
+            return {
+                "success": False,
+                "message": f"An unexpected error occurred while inserting data into table '{table_name}': {e}",
+            }
+
+
+def insert_rows_into_table(table_name: str, rows: list[dict]) -> dict:
+    """Inserts many rows into a table at once, all or nothing.
+
+    Args:
+        table_name (str): The name of the table to insert data into.
+        rows (list[dict]): The rows to insert, each a dictionary of column names to values.
+                           Every row must use the same columns (at most 10000 rows per call).
+
+    Returns:
+        dict: A dictionary with keys 'success' (bool), 'message' (str), 'rows_inserted' (int)
+              and 'ids' (list[int]) with the ROW_ID of each inserted row, in input order.
+              On any error nothing is inserted.
+    """
+    if not rows:
+        return {"success": False, "message": "No rows provided to insert.", "rows_inserted": 0}
+    if len(rows) > BULK_INSERT_MAX_ROWS:
         return {
             "success": False,
-            "message": "No condition provided for update. Please provide a valid WHERE clause condition."
+            "message": f"Too many rows ({len(rows)}); insert at most {BULK_INSERT_MAX_ROWS} per call.",
+            "rows_inserted": 0
         }
-    
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Build the SET clause for the UPDATE statement
-    set_clause = ", ".join([f"{column} = ?" for column in data.keys()])
-    values = tuple(data.values())
-    
-    query = f"UPDATE {table_name} SET {set_clause} WHERE {condition}"
 
+    table = CATALOG.table(table_name)
+    if table is None:
+        return {"success": False, "message": f"Table '{table_name}' not found in the database.", "rows_inserted": 0}
+
+    # Validate the column set once, then only check that every row matches it
+    if not isinstance(rows[0], dict) or not rows[0]:
+        return {"success": False, "message": "Row 0 must be a non-empty dictionary.", "rows_inserted": 0}
+    columns = list(rows[0])
+    unknown = [column for column in columns if column not in CATALOG.column_names(table_name, writable=True)]
+    if unknown:
+        return {
+            "success": False,
+            "message": f"Unknown or generated columns for table '{table_name}': {', '.join(unknown)}",
+            "rows_inserted": 0
+        }
+    column_set = set(columns)
+    values = []
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict) or row.keys() != column_set:
+            return {
+                "success": False,
+                "message": f"Row {index} must have exactly the columns of row 0: {', '.join(columns)}",
+                "rows_inserted": 0
+            }
+        values.append(tuple(row[column] for column in columns))
+
+    query = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+
+    with DB.writer() as conn:
+        cursor = conn.cursor()
+        try:
+            charge_rows(len(values))
+            # Ids come from each row's own insert: explicit ids may be NULL, unordered or non-contiguous
+            row_ids = []
+            for row_values in values:
+                cursor.execute(query, row_values)
+                row_ids.append(cursor.lastrowid)
+            conn.commit()
+            logging.info(f"Successfully inserted {len(values)} rows into table '{table_name}'")
+            return {
+                "success": True,
+                "message": f"Successfully inserted {len(values)} rows into table '{table_name}'",
+                "rows_inserted": len(values),
+                "ids": row_ids,
+            }
+        except sqlite3.Error as e:
+            conn.rollback()
+            logging.error(f"Error inserting rows into table '{table_name}': {e}")
+            return {
+                "success": False,
+                "message": f"Error inserting rows into table '{table_name}', nothing was inserted: {e}",
+                "rows_inserted": 0
+            }
+        except Exception as e:
+            conn.rollback()
+            logging.error(f"An unexpected error occurred while inserting rows into table '{table_name}': {e}")
+            return {
+                "success": False,
+                "message": f"An unexpected error occurred while inserting rows into table '{table_name}': {e}",
+                "rows_inserted": 0
+            }
+
+
+def delete_data_from_table(
+    table_name: str,
+    condition: str = "",
+    filters: list[dict] | None = None,
+    returning: str = "",
+    limit: int = QUERY_DEFAULT_LIMIT,
+    compact: bool = False,
+) -> dict:
+    """Deletes rows from a table that match a condition or structured filters.
+
+    Args:
+        table_name (str): The name of the table to delete data from.
+        condition (str): Raw SQL WHERE clause condition selecting the rows to delete.
+        filters (list[dict]): Structured conditions that must all hold, as in `query_db_table`,
+                              e.g. [{"column": "id", "op": "in", "value": [4, 7]}]. Preferred
+                              over `condition`. A condition or filters MUST be given to
+                              prevent accidental mass deletion.
+        returning (str): Optional columns of the deleted rows to send back, "*" for all or
+                         e.g. "id, amount". Saves a query before the delete.
+        limit (int): Maximum number of returned rows (1-1000). Defaults to 100.
+        compact (bool): Return a 'columns' list and 'rows' as arrays instead of one dict per row.
+
+    Returns:
+        dict: A dictionary with keys 'success' (bool), 'message' (str) and 'rows_deleted' (int).
+              With `returning`, also 'rows' (the deleted rows, at most `limit`) and
+              'rows_truncated' (bool, true when more rows were deleted than returned).
+    """
+    if not (condition and condition.strip()) and not filters:
+        return {
+            "success": False,
+            "message": "No condition provided for deletion. Please provide filters or a valid WHERE clause condition."
+        }
+    table_columns = CATALOG.column_names(table_name)
+    if not table_columns:
+        return {"success": False, "message": f"Table '{table_name}' not found in the database.", "rows_deleted": 0}
+    if not 1 <= limit <= QUERY_MAX_LIMIT:
+        return {"success": False, "message": f"limit must be between 1 and {QUERY_MAX_LIMIT}.", "rows_deleted": 0}
     try:
-        cursor.execute(query, values)
-        rows_updated = cursor.rowcount
-        conn.commit()
-        logging.info(f"Successfully updated {rows_updated} rows in table '{table_name}'")
+        where, params = build_where(table_name, table_columns, condition, filters)
+        returning_sql = returning_clause(table_name, table_columns, returning)
+    except FilterError as e:
+        return {"success": False, "message": f"Invalid filters: {e}", "rows_deleted": 0}
+    except ValueError as e:
+        return {"success": False, "message": str(e), "rows_deleted": 0}
+
+    query = f"DELETE FROM {table_name} WHERE {' AND '.join(where)}{returning_sql}"
+
+    with DB.writer() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, params)
+            if returning_sql:
+                names, rows, rows_deleted = read_returned_rows(cursor, limit)
+            else:
+                rows_deleted = cursor.rowcount
+            charge_rows(rows_deleted)
+            conn.commit()
+            logging.info(f"Successfully deleted {rows_deleted} rows from table '{table_name}'")
+            response = {
+                "success": True,
+                "message": f"Successfully deleted {rows_deleted} rows from table '{table_name}'",
+                "rows_deleted": rows_deleted
+            }
+            if returning_sql:
+                response.update(shape_rows(names, rows, compact))
+                response["rows_truncated"] = rows_deleted > len(rows)
+            return response
+        except sqlite3.Error as e:
+            conn.rollback()
+            logging.error(f"Error deleting data from table '{table_name}': {e}")
+            return {
+                "success": False,
+                "message": f"Error deleting data from table '{table_name}': {e}",
+                "rows_deleted": 0
+            }
+        except Exception as e:
+            conn.rollback()
+            logging.error(f"An unexpected error occurred while deleting data from table '{table_name}': {e}")
+            return {
+                "success": False,
+                "message": f"An unexpected error occurred while deleting data from table '{table_name}': {e}",
+                "rows_deleted": 0
+            }
+
+
+def update_data_in_table(
+    table_name: str,
+    data: dict,
+    condition: str = "",
+    filters: list[dict] | None = None,
+    returning: str = "",
+    limit: int = QUERY_DEFAULT_LIMIT,
+    compact: bool = False,
+) -> dict:
+    """Updates rows in a table that match a condition or structured filters.
+
+    Args:
+        table_name (str): The name of the table to update data in.
+        data (dict): A dictionary where keys are column names and values are the
+                     corresponding new values for the update.
+        condition (str): Raw SQL WHERE clause condition selecting the rows to update.
+        filters (list[dict]): Structured conditions that must all hold, as in `query_db_table`,
+                              e.g. [{"column": "id", "op": "=", "value": 12}]. Preferred over
+                              `condition`. A condition or filters MUST be given to prevent
+                              accidental mass updates.
+        returning (str): Optional columns of the updated rows to send back with their new
+                         values, "*" for all or e.g. "id, amount". Saves a query after the update.
+        limit (int): Maximum number of returned rows (1-1000). Defaults to 100.
+        compact (bool): Return a 'columns' list and 'rows' as arrays instead of one dict per row.
+
+    Returns:
+        dict: A dictionary with keys 'success' (bool), 'message' (str) and 'rows_updated' (int).
+              With `returning`, also 'rows' (the updated rows, at most `limit`) and
+              'rows_truncated' (bool, true when more rows were updated than returned).
+    """
+    if not data:
+        return {"success": False, "message": "No data provided to update."}
+    
+    if not (condition and condition.strip()) and not filters:
         return {
-            "success": True,
-            "message": f"Successfully updated {rows_updated} rows in table '{table_name}'",
-            "rows_updated": rows_updated
+            "success": False,
+            "message": "No condition provided for update. Please provide filters or a valid WHERE clause condition."
         }
-    except sqlite3.Error as e:
-        conn.rollback()
-        logging.error(f"Error updating data in table '{table_name}': {e}")
+    table_columns = CATALOG.column_names(table_name)
+    if not table_columns:
+        return {"success": False, "message": f"Table '{table_name}' not found in the database.", "rows_updated": 0}
+    writable_columns = CATALOG.column_names(table_name, writable=True)
+    unknown = [column for column in data if column not in writable_columns]
+    if unknown:
         return {
             "success": False,
-            "message": f"Error updating data in table '{table_name}': {e}",
+            "message": f"Unknown or generated columns for table '{table_name}': {', '.join(unknown)}",
             "rows_updated": 0
         }
-    except Exception as e:
-        conn.rollback()
-        logging.error(f"An unexpected error occurred while updating data in table '{table_name}': {e}")
+    if not 1 <= limit <= QUERY_MAX_LIMIT:
+        return {"success": False, "message": f"limit must be between 1 and {QUERY_MAX_LIMIT}.", "rows_updated": 0}
+    try:
+        where, params = build_where(table_name, table_columns, condition, filters)
+        returning_sql = returning_clause(table_name, table_columns, returning)
+    except FilterError as e:
+        return {"success": False, "message": f"Invalid filters: {e}", "rows_updated": 0}
+    except ValueError as e:
+        return {"success": False, "message": str(e), "rows_updated": 0}
+
+    # Build the SET clause for the UPDATE statement
+    set_clause = ", ".join([f"{column} = ?" for column in data.keys()])
+    values = (*data.values(), *params)
+
+    query = f"UPDATE {table_name} SET {set_clause} WHERE {' AND '.join(where)}{returning_sql}"
+
+    with DB.writer() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, values)
+            if returning_sql:
+                names, rows, rows_updated = read_returned_rows(cursor, limit)
+            else:
+                rows_updated = cursor.rowcount
+            charge_rows(rows_updated)
+            conn.commit()
+            logging.info(f"Successfully updated {rows_updated} rows in table '{table_name}'")
+            response = {
+                "success": True,
+                "message": f"Successfully updated {rows_updated} rows in table '{table_name}'",
+                "rows_updated": rows_updated
+            }
+            if returning_sql:
+                response.update(shape_rows(names, rows, compact))
+                response["rows_truncated"] = rows_updated > len(rows)
+            return response
+        except sqlite3.Error as e:
+            conn.rollback()
+            logging.error(f"Error updating data in table '{table_name}': {e}")
+            return {
+                "success": False,
+                "message": f"Error updating data in table '{table_name}': {e}",
+                "rows_updated": 0
+            }
+        except Exception as e:
+            conn.rollback()
+            logging.error(f"An unexpected error occurred while updating data in table '{table_name}': {e}")
+            return {
+                "success": False,
+                "message": f"An unexpected error occurred while updating data in table '{table_name}': {e}",
+                "rows_updated": 0
+            }
+
+
+def resolve_batch_references(value, row_ids: dict, step: int, embedded: bool = False):
+    """Replaces "$N" references with the row id inserted by earlier step N.
+
+    A value that is exactly "$N" becomes the integer id. References inside a
+    longer string (a condition such as "habit_id = $0") are only replaced when
+    `embedded` is set, so data text like "$5 coffee" is left alone.
+    """
+    if not isinstance(value, str):
+        return value
+
+    def row_id_of(match):
+        referenced = int(match.group(1))
+        if referenced >= step or referenced not in row_ids:
+            raise ValueError(f"'{match.group(0)}' does not refer to an earlier insert step")
+        return row_ids[referenced]
+
+    full = BATCH_REFERENCE_PATTERN.fullmatch(value.strip())
+    if full:
+        return row_id_of(full)
+    if embedded:
+        return BATCH_REFERENCE_PATTERN.sub(lambda match: str(row_id_of(match)), value)
+    return value
+
+
+def resolve_filter_references(item, row_ids: dict, step: int):
+    """Replaces exact "$N" values inside structured filters (including lists and 'any' groups)."""
+    if isinstance(item, list):
+        return [resolve_filter_references(element, row_ids, step) for element in item]
+    if isinstance(item, dict):
+        return {
+            key: resolve_filter_references(value, row_ids, step) if key in ("value", "any") else value
+            for key, value in item.items()
+        }
+    return resolve_batch_references(item, row_ids, step)
+
+
+def run_batch_operation(cursor: sqlite3.Cursor, operation: dict, row_ids: dict, step: int) -> dict:
+    """Runs one run_batch step on the writer's cursor and returns its result."""
+    if not isinstance(operation, dict):
+        raise ValueError("each operation must be a dictionary")
+    op = str(operation.get("op", "")).strip().lower()
+    if op not in BATCH_OPERATIONS:
+        raise ValueError(f"unsupported op '{operation.get('op')}'. Use one of: {', '.join(BATCH_OPERATIONS)}")
+    table_name = operation.get("table", "")
+    table_columns = CATALOG.column_names(table_name)
+    if not table_columns:
+        raise ValueError(f"table '{table_name}' not found in the database")
+
+    data = {
+        column: resolve_batch_references(value, row_ids, step)
+        for column, value in (operation.get("data") or {}).items()
+    }
+    writable_columns = CATALOG.column_names(table_name, writable=True)
+    unknown = [column for column in data if column not in writable_columns]
+    if unknown:
+        raise ValueError(f"unknown or generated columns for table '{table_name}': {', '.join(unknown)}")
+    condition = str(resolve_batch_references(operation.get("condition") or "", row_ids, step, embedded=True)).strip()
+    filters = resolve_filter_references(operation.get("filters") or [], row_ids, step)
+    if op in ("update", "delete") and not condition and not filters:
+        raise ValueError(f"{op} requires a condition or filters")
+    where, params = build_where(table_name, table_columns, condition, filters)
+    where_clause = " WHERE " + " AND ".join(where) if where else ""
+
+    if op == "insert":
+        if not data:
+            raise ValueError("insert requires data")
+        cursor.execute(
+            f"INSERT INTO {table_name} ({', '.join(data)}) VALUES ({', '.join('?' * len(data))})",
+            tuple(data.values()),
+        )
+        row_ids[step] = cursor.lastrowid
+        charge_rows(1)
+        return {"op": op, "table": table_name, "row_id": cursor.lastrowid}
+    limit = int(operation.get("limit") or QUERY_DEFAULT_LIMIT)
+    if not 1 <= limit <= QUERY_MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {QUERY_MAX_LIMIT}")
+    if op in ("update", "delete"):
+        returning_sql = returning_clause(table_name, table_columns, operation.get("returning") or "")
+        if op == "update":
+            if not data:
+                raise ValueError("update requires data")
+            set_clause = ", ".join(f"{column} = ?" for column in data)
+            cursor.execute(
+                f"UPDATE {table_name} SET {set_clause}{where_clause}{returning_sql}", (*data.values(), *params)
+            )
+        else:
+            cursor.execute(f"DELETE FROM {table_name}{where_clause}{returning_sql}", params)
+        if returning_sql:
+            names, rows, count = read_returned_rows(cursor, limit)
+        else:
+            count = cursor.rowcount
+        charge_rows(count)
+        result = {"op": op, "table": table_name, "rows_updated" if op == "update" else "rows_deleted": count}
+        if returning_sql:
+            result["rows"] = [dict(zip(names, row)) for row in rows]
+            result["rows_truncated"] = count > len(rows)
+        return result
+
+    query = f"SELECT {operation.get('columns') or '*'} FROM {table_name}{where_clause}"
+    result = cursor.execute(query + " ORDER BY rowid LIMIT ?;", (*params, limit))
+    names = [description[0] for description in result.description]
+    return {"op": op, "table": table_name, "rows": [dict(zip(names, row)) for row in result.fetchall()]}
+
+
+def run_batch(operations: list[dict]) -> dict:
+    """Runs several insert/update/delete/query operations in one transaction.
+
+    Either every operation is applied or, if any fails, none is. Later operations
+    can use "$N" in a data value or condition to refer to the row id inserted by
+    operation N (counting from 0), e.g. insert a habit, then insert habit_logs
+    with {"habit_id": "$0"}.
+
+    Args:
+        operations (list[dict]): Ordered operations (at most 100), each a dictionary with:
+            'op': "insert", "update", "delete" or "query".
+            'table': The table name.
+            'data': Column values, for insert and update.
+            'condition': SQL WHERE clause; update and delete need a condition or filters.
+            'filters': Structured conditions, as in `query_db_table` (preferred over 'condition').
+            'columns': Comma-separated columns for query (defaults to "*").
+            'returning': Columns of the changed rows to return for update and delete ("*" for all).
+            'limit': Maximum rows for query or returning (1-1000, defaults to 100).
+
+    Returns:
+        dict: A dictionary with keys 'success' (bool), 'message' (str) and 'results', one
+              entry per operation with 'row_id' (insert), 'rows_updated', 'rows_deleted' or
+              'rows' (query, and update/delete with 'returning'). On failure 'failed_step' gives the index of the failing
+              operation and nothing is written.
+    """
+    if not operations:
+        return {"success": False, "message": "No operations provided.", "results": []}
+    if len(operations) > BATCH_MAX_OPERATIONS:
         return {
             "success": False,
-            "message": f"An unexpected error occurred while updating data in table '{table_name}': {e}",
-            "rows_updated": 0
+            "message": f"Too many operations ({len(operations)}); send at most {BATCH_MAX_OPERATIONS} per batch.",
+            "results": []
         }
-    finally:
-        conn.close()
+
+    results = []
+    row_ids = {}
+    with DB.writer() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE;")
+            for step, operation in enumerate(operations):
+                results.append(run_batch_operation(cursor, operation, row_ids, step))
+            conn.commit()
+            logging.info(f"Successfully ran batch of {len(results)} operations")
+            return {
+                "success": True,
+                "message": f"Successfully ran {len(results)} operations in one transaction.",
+                "results": results,
+            }
+        except (sqlite3.Error, ValueError) as e:
+            conn.rollback()
+            logging.error(f"Error in batch step {len(results)}: {e}")
+            return {
+                "success": False,
+                "message": f"Error in step {len(results)}, nothing was written: {e}",
+                "failed_step": len(results),
+                "results": []
+            }
+        except Exception as e:
+            conn.rollback()
+            logging.error(f"An unexpected error occurred in batch step {len(results)}: {e}")
+            return {
+                "success": False,
+                "message": f"An unexpected error occurred in step {len(results)}, nothing was written: {e}",
+                "failed_step": len(results),
+                "results": []
+            }
 
 
 logging.info(
@@ -314,51 +1782,156 @@ logging.info(
 # MCP Server instance
 app = Server("life-tracker-db-mcp-server")
 
-# Wrap as ADK function tools
+# Tool functions exposed over MCP; their schemas come from tool_schemas.py
 DB_TOOLS = {
-    "list_db_tables": FunctionTool(func=list_db_tables),
-    "get_table_schema": FunctionTool(func=get_table_schema),
-    "query_db_table": FunctionTool(func=query_db_table),
-    "insert_data_into_table": FunctionTool(func=insert_data_into_table),
-    "delete_data_from_table": FunctionTool(func=delete_data_from_table),
-    "update_data_in_table": FunctionTool(func=update_data_in_table),
+    "list_db_tables": list_db_tables,
+    "get_table_schema": get_table_schema,
+    "describe_database": describe_database,
+    "query_db_table": query_db_table,
+    "query_with_related": query_with_related,
+    "aggregate_table": aggregate_table,
+    "summarize_totals": summarize_totals,
+    "explain_query": explain_query,
+    "get_habit_streaks": get_habit_streaks,
+    "search_entries": search_entries,
+    "changes_since": changes_since,
+    "get_query_cache_stats": get_query_cache_stats,
+    "server_stats": server_stats,
+    "insert_data_into_table": insert_data_into_table,
+    "insert_rows_into_table": insert_rows_into_table,
+    "delete_data_from_table": delete_data_from_table,
+    "update_data_in_table": update_data_in_table,
+    "run_batch": run_batch,
+}
+
+# Tools that modify the database and must go through the writer thread
+WRITE_TOOLS = {
+    "insert_data_into_table",
+    "insert_rows_into_table",
+    "delete_data_from_table",
+    "update_data_in_table",
+    "run_batch",
+    # Folds queued habit_logs changes into the habit_streaks side table
+    "get_habit_streaks",
+}
+
+# Read-only tools whose responses can be served from QUERY_CACHE
+CACHEABLE_TOOLS = {
+    "list_db_tables",
+    "get_table_schema",
+    "describe_database",
+    "query_db_table",
+    "query_with_related",
+    "aggregate_table",
+    "summarize_totals",
+    "explain_query",
+    "search_entries",
+    "changes_since",
+}
+
+# Tools that accept `compact` and return columnar rows with it
+COMPACT_TOOLS = {
+    "query_db_table",
+    "query_with_related",
+    "aggregate_table",
+    "summarize_totals",
+    "delete_data_from_table",
+    "update_data_in_table",
 }
 
 
+@functools.cache
+def mcp_tool_definitions() -> list[mcp_types.Tool]:
+    """MCP definitions of DB_TOOLS, built once per process from the on-disk schema cache."""
+    return [mcp_types.Tool.model_validate(schema) for schema in load_tool_schemas(DB_TOOLS, TOOL_SCHEMA_CACHE)]
+
+
 @app.list_tools()
 async def list_mcp_tools() -> list[mcp_types.Tool]:
     """MCP handler to list tools this server exposes."""
     logging.info("MCP Server: Received list_tools request")
-    mcp_tools_list = []
-
-    for tool_name, tool_instance in DB_TOOLS.items():
-        if not tool_instance.name:
-            tool_instance.name = tool_name
-
-        mcp_tool_schema = adk_to_mcp_tool_type(tool_instance)
-        logging.info(
-            f"MCP Server: Exposing tool: {mcp_tool_schema.name} InputSchema: {mcp_tool_schema.inputSchema}"
-        )
-        mcp_tools_list.append(mcp_tool_schema)
+    mcp_tools_list = mcp_tool_definitions()
+    logging.info(f"MCP Server: Exposing tools: {', '.join(tool.name for tool in mcp_tools_list)}")
     return mcp_tools_list
 
 
 @app.call_tool()
 async def call_mcp_tool(tool_name: str, arguments: dict) -> list[mcp_types.TextContent]:
     """MCP handler to execute a tool call requested by an MCP client."""
-    logging.info(f"MCP Server: Received call_tool request for '{tool_name}' with arguments: {arguments}")
+    started = time.perf_counter()
+    log_payloads = LOG_SAMPLER.should_log(tool_name)
+    if log_payloads:
+        logging.info(
+            f"MCP Server: Received call_tool request for '{tool_name}' with arguments: {truncate_payload(arguments)}"
+        )
 
     if tool_name in DB_TOOLS:
-        tool_instance = DB_TOOLS[tool_name]
+        func = DB_TOOLS[tool_name]
         try:
-            # Call the function directly since these are synchronous functions
-            func = tool_instance.func
-            tool_response = func(**arguments)
-            logging.info(f"MCP Server: Tool '{tool_name}' executed. Response: {tool_response}")
-            response_text = json.dumps(tool_response, indent=2)
+            # The tools are synchronous, so run them on a worker thread to keep
+            # the stdio loop free for other requests.
+            if COMPACT_RESPONSES and tool_name in COMPACT_TOOLS:
+                arguments = {"compact": True, **arguments}
+            compact = bool(arguments["compact"]) if "compact" in arguments else COMPACT_RESPONSES
+
+            # Take the version before running the tool, so a write that lands
+            # while it runs leaves the stored entry already stale.
+            cache_key = None
+            if tool_name in CACHEABLE_TOOLS and QUERY_CACHE.max_entries > 0:
+                normalized = normalize_tool_arguments(func, arguments)
+                if normalized is not None:
+                    cache_key = (tool_name, normalized, compact)
+                    version = DB.version()
+                    cached_text = QUERY_CACHE.get(tool_name, cache_key, version)
+                    if cached_text is not None:
+                        if log_payloads:
+                            logging.info(f"MCP Server: Tool '{tool_name}' served from query cache")
+                        METRICS.record(
+                            tool_name, (time.perf_counter() - started) * 1000, "cached",
+                            payload_bytes=len(cached_text),
+                        )
+                        return [mcp_types.TextContent(type="text", text=cached_text)]
+
+            budget = QueryBudget(CALL_TIME_BUDGET_SECONDS, CALL_STEP_BUDGET, CALL_ROW_BUDGET)
+            executor = WRITE_EXECUTOR if tool_name in WRITE_TOOLS else READ_EXECUTOR
+            loop = asyncio.get_running_loop()
+            try:
+                tool_response = await asyncio.wait_for(
+                    loop.run_in_executor(executor, functools.partial(run_with_budget, func, arguments, budget)),
+                    timeout=TOOL_TIMEOUT_SECONDS,
+                )
+            except asyncio.TimeoutError:
+                # The worker thread cannot be killed, but its SQL stops at the
+                # next budget check (or as soon as it starts), which releases
+                # its connection and keeps a queued write from landing late
+                budget.cancel(f"tool timed out after {TOOL_TIMEOUT_SECONDS:g}s")
+                raise
+            if log_payloads:
+                logging.info(f"MCP Server: Tool '{tool_name}' executed. Response: {truncate_payload(tool_response)}")
+            response_text = dumps_response(tool_response, compact)
+            succeeded = tool_response.get("success", True)
+            if cache_key is not None and succeeded and not budget.exceeded:
+                QUERY_CACHE.put(cache_key, version, response_text)
+            if budget.exceeded:
+                logging.warning(f"MCP Server: Tool '{tool_name}' ran out of budget: {budget.exceeded}")
+            METRICS.record(
+                tool_name, (time.perf_counter() - started) * 1000,
+                "over_budget" if budget.exceeded else "ok" if succeeded else "error",
+                rows=count_rows(tool_response), payload_bytes=len(response_text),
+            )
 
             return [mcp_types.TextContent(type="text", text=response_text)]
         
+        except asyncio.TimeoutError:
+            logging.error(f"MCP Server: Tool '{tool_name}' timed out after {TOOL_TIMEOUT_SECONDS}s")
+            error_payload = {
+                "success": False,
+                "message": f"Tool '{tool_name}' timed out after {TOOL_TIMEOUT_SECONDS} seconds.",
+            }
+            error_text = json.dumps(error_payload, indent=2)
+            METRICS.record(tool_name, (time.perf_counter() - started) * 1000, "timeout", payload_bytes=len(error_text))
+            return [mcp_types.TextContent(type="text", text=error_text)]
+
         except Exception as e:
             logging.error(f"MCP Server: Error executing tool '{tool_name}': {e}", exc_info=True)
             error_payload = {
@@ -366,6 +1939,7 @@ async def call_mcp_tool(tool_name: str, arguments: dict) -> list[mcp_types.TextC
                 "message": f"Failed to execute tool '{tool_name}': {str(e)}",
             }
             error_text = json.dumps(error_payload, indent=2)
+            METRICS.record(tool_name, (time.perf_counter() - started) * 1000, "error", payload_bytes=len(error_text))
             return [mcp_types.TextContent(type="text", text=error_text)]
     else:
         logging.warning(
@@ -380,41 +1954,114 @@ async def call_mcp_tool(tool_name: str, arguments: dict) -> list[mcp_types.TextC
 
 
 # SERVER RUNNER
+# Transport used when started as a script: "stdio" (one client, spawned per
+# session) or "http" (one long-running process shared by many clients, with
+# streamable HTTP at /mcp and SSE at /sse)
+MCP_TRANSPORT = os.getenv("DB_MCP_TRANSPORT", "stdio")
+MCP_HOST = os.getenv("DB_MCP_HOST", "127.0.0.1")
+MCP_PORT = int(os.getenv("DB_MCP_PORT", "8765"))
+
+
+def initialization_options() -> InitializationOptions:
+    return InitializationOptions(
+        server_name=app.name,
+        server_version="0.1.0",
+        capabilities=app.get_capabilities(
+            notification_options=NotificationOptions(),
+            experimental_capabilities={},
+        ),
+    )
+
+
 async def run_mcp_server():
     """Runs the MCP server, listening for connections over standard input/output."""
     async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
         logging.info(
             "MCP Stdio Server: Starting handshake with client..."
         )
-        await app.run(
-            read_stream,
-            write_stream,
-            InitializationOptions(
-                server_name=app.name,
-                server_version="0.1.0",
-                capabilities=app.get_capabilities(
-                    notification_options=NotificationOptions(),
-                    experimental_capabilities={},
-                ),
-            ),
-        )
+        await app.run(read_stream, write_stream, initialization_options())
         logging.info("MCP Stdio Server: Run loop finished or client disconnected.")
 
 
+async def run_http_server(host: str, port: int):
+    """Runs the MCP server over streamable HTTP (/mcp) and SSE (/sse) for many clients.
+
+    Every client session shares this process's connections, caches and
+    worker threads.
+    """
+    # Only needed for this transport, so stdio servers do not pay for them
+    import uvicorn
+    from mcp.server.sse import SseServerTransport
+    from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+    from starlette.applications import Starlette
+    from starlette.responses import Response
+    from starlette.routing import Mount, Route
+
+    # Plain JSON responses instead of a per-request SSE stream; tools send no
+    # progress notifications, and this roughly halves per-call latency
+    session_manager = StreamableHTTPSessionManager(app=app, json_response=True)
+    sse = SseServerTransport("/messages/")
+
+    async def handle_streamable_http(scope, receive, send):
+        await session_manager.handle_request(scope, receive, send)
+
+    async def handle_sse(request):
+        async with sse.connect_sse(request.scope, request.receive, request._send) as (read_stream, write_stream):
+            await app.run(read_stream, write_stream, initialization_options())
+        return Response()
+
+    @contextlib.asynccontextmanager
+    async def lifespan(_):
+        async with session_manager.run():
+            logging.info(f"MCP HTTP Server: Listening on http://{host}:{port}/mcp and http://{host}:{port}/sse")
+            yield
+
+    starlette_app = Starlette(
+        routes=[
+            Mount("/mcp", app=handle_streamable_http),
+            Route("/sse", endpoint=handle_sse, methods=["GET"]),
+            Mount("/messages/", app=sse.handle_post_message),
+        ],
+        lifespan=lifespan,
+    )
+    config = uvicorn.Config(starlette_app, host=host, port=port, log_level="warning")
+    await uvicorn.Server(config).serve()
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Life tracker SQLite MCP server")
+    parser.add_argument("--transport", choices=("stdio", "http"), default=MCP_TRANSPORT)
+    parser.add_argument("--host", default=MCP_HOST)
+    parser.add_argument("--port", type=int, default=MCP_PORT)
+    args = parser.parse_args()
+    # Exit through the cleanup below (metrics dump, log flush) when terminated
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
     logging.info(
-        "Launching SQLite DB MCP Server via stdio..."
+        f"Launching SQLite DB MCP Server via {args.transport}..."
     )
     try:
-        asyncio.run(run_mcp_server())
+        if args.transport == "http":
+            asyncio.run(run_http_server(args.host, args.port))
+        else:
+            asyncio.run(run_mcp_server())
     except KeyboardInterrupt:
         logging.info(
-            "\nMCP Server (stdio) stopped by user."
+            f"\nMCP Server ({args.transport}) stopped by user."
         )
     except Exception as e:
         logging.critical("MCP Server: Unexpected error occurred", exc_info=True)
     finally:
-        logging.info("MCP Server (stdio) shutting down...")
+        logging.info(f"MCP Server ({args.transport}) shutting down...")
+        READ_EXECUTOR.shutdown(wait=False, cancel_futures=True)
+        WRITE_EXECUTOR.shutdown(wait=True)
+        DB.close()
+        try:
+            METRICS.dump(STATS_FILE)
+            logging.info(f"MCP Server: Wrote tool metrics to {STATS_FILE}")
+        except OSError as e:
+            logging.error(f"MCP Server: Could not write tool metrics to {STATS_FILE}: {e}")
+        LOG_LISTENER.stop()
 
     
     
@@ -0,0 +1,97 @@
+import logging
+import logging.handlers
+import os
+import queue
+import random
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s"
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 3
+LOG_PAYLOAD_MAX_CHARS = 1000
+LOG_PAYLOAD_MAX_ITEMS = 3
+
+
+def configure_logging(log_file: str, level: int = logging.INFO) -> logging.handlers.QueueListener:
+    """Routes all logging through a queue to a background size-rotated file writer.
+
+    Callers only pay for building the record and putting it on the queue;
+    formatting and disk writes happen on the listener thread.
+
+    Args:
+        log_file (str): Path of the log file.
+        level (int): Root logger level.
+
+    Returns:
+        logging.handlers.QueueListener: The started listener; call `stop()` on
+        shutdown to flush pending records.
+    """
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file,
+        maxBytes=int(os.getenv("DB_LOG_MAX_BYTES", LOG_MAX_BYTES)),
+        backupCount=int(os.getenv("DB_LOG_BACKUP_COUNT", LOG_BACKUP_COUNT)),
+        encoding="utf-8",
+    )
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def truncate_payload(value, max_chars: int = LOG_PAYLOAD_MAX_CHARS) -> str:
+    """Returns a bounded-size repr of a tool argument or response for logging.
+
+    Long lists (such as 'rows') are cut to their first few items before
+    anything is formatted, so the cost does not grow with the result size.
+    """
+    text = _summarize(value)
+    if len(text) > max_chars:
+        text = f"{text[:max_chars]}... ({len(text) - max_chars} more chars)"
+    return text
+
+
+def _summarize(value) -> str:
+    if isinstance(value, dict):
+        return "{" + ", ".join(f"{key!r}: {_summarize(item)}" for key, item in value.items()) + "}"
+    if isinstance(value, (list, tuple)) and len(value) > LOG_PAYLOAD_MAX_ITEMS:
+        head = ", ".join(repr(item) for item in value[:LOG_PAYLOAD_MAX_ITEMS])
+        return f"[{head}, ... ({len(value) - LOG_PAYLOAD_MAX_ITEMS} more)]"
+    return repr(value)
+
+
+def parse_sample_rates(spec: str) -> dict[str, float]:
+    """Parses "tool=rate,..." (e.g. "query_db_table=0.1,default=1") into a dict."""
+    rates = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        name, rate = item.split("=", 1)
+        try:
+            rates[name.strip()] = min(max(float(rate), 0.0), 1.0)
+        except ValueError:
+            logging.warning(f"Ignoring invalid log sample rate '{item}'")
+    return rates
+
+
+class ToolLogSampler:
+    """Decides which tool calls get their arguments and responses logged.
+
+    Args:
+        rates (dict[str, float]): Fraction of calls to log per tool name; the
+                                  'default' key applies to every other tool.
+    """
+
+    def __init__(self, rates: dict[str, float] | None = None):
+        self.rates = rates or {}
+        self.default_rate = self.rates.get("default", 1.0)
+
+    def should_log(self, tool_name: str) -> bool:
+        rate = self.rates.get(tool_name, self.default_rate)
+        return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
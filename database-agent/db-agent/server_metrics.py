@@ -0,0 +1,134 @@
+import bisect
+import json
+import math
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Latency histogram buckets: upper bounds growing by 10% from 10us to ~10 min
+LATENCY_BUCKETS_MS = [0.01 * 1.1 ** i for i in range(int(math.log(600_000 / 0.01, 1.1)) + 2)]
+
+
+def count_rows(response) -> int:
+    """Number of rows a tool response returned or affected."""
+    if not isinstance(response, dict):
+        return 0
+    # Writes may return a capped sample of their rows, so their counts come first
+    for key in ("rows_inserted", "rows_deleted", "rows_updated"):
+        if isinstance(response.get(key), int):
+            return response[key]
+    for key in ("rows", "streaks", "tables", "results", "changes"):
+        value = response.get(key)
+        if isinstance(value, (list, dict)):
+            return len(value)
+    return 1 if response.get("row_id") is not None else 0
+
+
+def max_rss_kb() -> int | None:
+    """Peak resident set size of this process in KiB, where the platform reports it."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with roughly 5% percentile resolution."""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.total = 0
+        self.max_ms = 0.0
+
+    def record(self, milliseconds: float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, milliseconds)] += 1
+        self.total += 1
+        self.max_ms = max(self.max_ms, milliseconds)
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the bucket holding the given fraction of samples."""
+        if not self.total:
+            return 0.0
+        target = math.ceil(self.total * fraction)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                bound = LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else self.max_ms
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+
+class ServerMetrics:
+    """Per-tool call counts, latency percentiles, row counts and payload sizes."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._tools = {}
+
+    def record(self, tool_name: str, milliseconds: float, status: str, rows: int = 0, payload_bytes: int = 0):
+        """Records one tool call.
+
+        Args:
+            tool_name (str): Name of the tool.
+            milliseconds (float): Wall time of the call.
+            status (str): 'ok', 'cached', 'error', 'timeout' or 'over_budget'.
+            rows (int): Rows returned or affected.
+            payload_bytes (int): Size of the serialized response.
+        """
+        with self._lock:
+            tool = self._tools.get(tool_name)
+            if tool is None:
+                tool = self._tools[tool_name] = {
+                    "calls": 0,
+                    "statuses": {},
+                    "rows": 0,
+                    "max_rows": 0,
+                    "payload_bytes": 0,
+                    "max_payload_bytes": 0,
+                    "latency": LatencyHistogram(),
+                }
+            tool["calls"] += 1
+            tool["statuses"][status] = tool["statuses"].get(status, 0) + 1
+            tool["rows"] += rows
+            tool["max_rows"] = max(tool["max_rows"], rows)
+            tool["payload_bytes"] += payload_bytes
+            tool["max_payload_bytes"] = max(tool["max_payload_bytes"], payload_bytes)
+            tool["latency"].record(milliseconds)
+
+    def snapshot(self) -> dict:
+        """Returns all metrics as a JSON-serializable dict."""
+        with self._lock:
+            uptime = time.time() - self.started_at
+            tools = {}
+            for tool_name, tool in sorted(self._tools.items()):
+                latency = tool["latency"]
+                calls = tool["calls"]
+                tools[tool_name] = {
+                    "calls": calls,
+                    "calls_per_minute": round(calls / uptime * 60, 2) if uptime else 0.0,
+                    "errors": tool["statuses"].get("error", 0) + tool["statuses"].get("timeout", 0),
+                    "statuses": dict(tool["statuses"]),
+                    "latency_ms": {
+                        "p50": round(latency.percentile(0.50), 3),
+                        "p95": round(latency.percentile(0.95), 3),
+                        "p99": round(latency.percentile(0.99), 3),
+                        "max": round(latency.max_ms, 3),
+                    },
+                    "rows": {"total": tool["rows"], "avg": round(tool["rows"] / calls, 1), "max": tool["max_rows"]},
+                    "payload_bytes": {
+                        "total": tool["payload_bytes"],
+                        "avg": round(tool["payload_bytes"] / calls),
+                        "max": tool["max_payload_bytes"],
+                    },
+                }
+            return {"uptime_seconds": round(uptime, 1), "max_rss_kb": max_rss_kb(), "tools": tools}
+
+    def dump(self, path: str):
+        """Writes the snapshot to `path` as JSON."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
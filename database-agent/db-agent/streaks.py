@@ -0,0 +1,277 @@
+import logging
+from datetime import date, datetime
+
+from connection_manager import ConnectionManager
+
+
+# Side table holding per-habit streak state, plus the queue of habit_logs
+# changes (filled by triggers) that has not been folded into it yet.
+STREAK_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS habit_streaks (
+        habit_id INTEGER PRIMARY KEY,
+        first_period INTEGER,
+        last_completed_period INTEGER,
+        last_completed_date DATE,
+        run_length INTEGER NOT NULL DEFAULT 0,
+        longest_streak INTEGER NOT NULL DEFAULT 0,
+        completed_periods INTEGER NOT NULL DEFAULT 0,
+        updated_at DATETIME NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS habit_streak_changes (
+        id INTEGER PRIMARY KEY,
+        habit_id INTEGER NOT NULL,
+        date DATE,
+        status INTEGER,
+        kind TEXT NOT NULL  -- 'insert' or 'rebuild'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS habit_logs_streak_insert AFTER INSERT ON habit_logs
+    BEGIN
+        INSERT INTO habit_streak_changes (habit_id, date, status, kind)
+        VALUES (NEW.habit_id, NEW.date, NEW.status, 'insert');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS habit_logs_streak_update AFTER UPDATE OF habit_id, date, status ON habit_logs
+    BEGIN
+        INSERT INTO habit_streak_changes (habit_id, kind) VALUES (OLD.habit_id, 'rebuild');
+        INSERT INTO habit_streak_changes (habit_id, kind)
+        SELECT NEW.habit_id, 'rebuild' WHERE NEW.habit_id <> OLD.habit_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS habit_logs_streak_delete AFTER DELETE ON habit_logs
+    BEGIN
+        INSERT INTO habit_streak_changes (habit_id, kind) VALUES (OLD.habit_id, 'rebuild');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS habits_streak_frequency AFTER UPDATE OF frequency ON habits
+    BEGIN
+        INSERT INTO habit_streak_changes (habit_id, kind) VALUES (NEW.id, 'rebuild');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS habits_streak_delete AFTER DELETE ON habits
+    BEGIN
+        DELETE FROM habit_streaks WHERE habit_id = OLD.id;
+        DELETE FROM habit_streak_changes WHERE habit_id = OLD.id;
+    END
+    """,
+]
+
+
+def backfill_streaks(conn):
+    """Computes the streak state of every habit from its logs (see migration 8)."""
+    now = datetime.now().isoformat(sep=" ", timespec="seconds")
+    for habit_id, frequency in conn.execute("SELECT id, frequency FROM habits;").fetchall():
+        StreakEngine._rebuild(conn, habit_id, frequency, now)
+
+
+def period_of(day: date, frequency: str) -> int:
+    """Maps a date to a consecutive integer period for the habit's frequency.
+
+    Weeks start on Monday. Unknown frequencies are treated as daily.
+    """
+    frequency = (frequency or "").strip().lower()
+    if frequency == "weekly":
+        return (day.toordinal() - 1) // 7
+    if frequency == "monthly":
+        return day.year * 12 + day.month - 1
+    if frequency == "yearly":
+        return day.year
+    return day.toordinal()
+
+
+def parse_log_date(value) -> date | None:
+    """Parses a habit_logs.date value, returning None if it is not a date."""
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except (TypeError, ValueError):
+        return None
+
+
+class StreakEngine:
+    """Maintains current streak, longest streak and completion rate per habit.
+
+    State lives in the `habit_streaks` side table. Triggers on `habit_logs`
+    and `habits` queue every change in `habit_streak_changes`; `refresh()`
+    folds the queue into the side table. Logs appended after the latest
+    completed period are applied in O(1); anything else (back-dated inserts,
+    updates, deletes, frequency changes) rebuilds only the affected habit.
+    A period counts as completed when it has at least one log with status 1.
+    The tables and triggers, and the initial state of every habit, come from
+    migration 8.
+
+    Args:
+        db (ConnectionManager): Connection manager used to read and write state.
+    """
+
+    def __init__(self, db: ConnectionManager):
+        self.db = db
+
+    @staticmethod
+    def _rebuild(conn, habit_id: int, frequency: str, now: str):
+        state = {
+            "first_period": None,
+            "last_completed_period": None,
+            "last_completed_date": None,
+            "run_length": 0,
+            "longest_streak": 0,
+            "completed_periods": 0,
+        }
+        for log_date, status in conn.execute(
+            "SELECT date, status FROM habit_logs WHERE habit_id = ? ORDER BY date;", (habit_id,)
+        ):
+            day = parse_log_date(log_date)
+            if day is None:
+                continue
+            period = period_of(day, frequency)
+            if state["first_period"] is None:
+                state["first_period"] = period
+            if status == 1:
+                StreakEngine._apply_completion(state, period, day)
+        StreakEngine._save(conn, habit_id, state, now)
+
+    @staticmethod
+    def _apply_completion(state: dict, period: int, day: date) -> bool:
+        """Folds a completed log into the state; returns False if it is back-dated."""
+        last = state["last_completed_period"]
+        if last is not None and period < last:
+            return False
+        if last is None or period > last:
+            state["run_length"] = state["run_length"] + 1 if last is not None and period == last + 1 else 1
+            state["completed_periods"] += 1
+            state["longest_streak"] = max(state["longest_streak"], state["run_length"])
+            state["last_completed_period"] = period
+        state["last_completed_date"] = max(day.isoformat(), state["last_completed_date"] or "")
+        return True
+
+    @staticmethod
+    def _save(conn, habit_id: int, state: dict, now: str):
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO habit_streaks (
+                habit_id, first_period, last_completed_period, last_completed_date,
+                run_length, longest_streak, completed_periods, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?);
+            """,
+            (
+                habit_id, state["first_period"], state["last_completed_period"], state["last_completed_date"],
+                state["run_length"], state["longest_streak"], state["completed_periods"], now,
+            ),
+        )
+
+    def refresh(self, conn) -> int:
+        """Folds queued habit_logs changes into `habit_streaks`.
+
+        Must be called on the writer connection. Habits without a state row
+        yet are rebuilt from their logs.
+
+        Returns:
+            int: Number of habits that had to be rebuilt.
+        """
+        now = datetime.now().isoformat(sep=" ", timespec="seconds")
+        # Hold the write lock so no change can slip in between reading the
+        # queue and clearing it.
+        conn.execute("BEGIN IMMEDIATE;")
+        try:
+            frequencies = {row["id"]: row["frequency"] for row in conn.execute("SELECT id, frequency FROM habits;")}
+            states = {
+                row["habit_id"]: dict(row)
+                for row in conn.execute("SELECT * FROM habit_streaks;")
+            }
+            changes = conn.execute(
+                "SELECT id, habit_id, date, status, kind FROM habit_streak_changes ORDER BY id;"
+            ).fetchall()
+
+            rebuild = {habit_id for habit_id in frequencies if habit_id not in states}
+            rebuild.update(change["habit_id"] for change in changes if change["kind"] == "rebuild")
+            touched = set()
+            for change in changes:
+                habit_id = change["habit_id"]
+                if change["kind"] != "insert" or habit_id in rebuild or habit_id not in frequencies:
+                    continue
+                day = parse_log_date(change["date"])
+                if day is None:
+                    continue
+                state = states[habit_id]
+                period = period_of(day, frequencies[habit_id])
+                if state["first_period"] is None or period < state["first_period"]:
+                    state["first_period"] = period
+                if change["status"] == 1 and not self._apply_completion(state, period, day):
+                    rebuild.add(habit_id)
+                    continue
+                touched.add(habit_id)
+
+            for habit_id in touched - rebuild:
+                self._save(conn, habit_id, states[habit_id], now)
+            for habit_id in rebuild:
+                if habit_id in frequencies:
+                    self._rebuild(conn, habit_id, frequencies[habit_id], now)
+            if changes:
+                conn.execute("DELETE FROM habit_streak_changes WHERE id <= ?;", (changes[-1]["id"],))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        if changes or rebuild:
+            logging.info(
+                f"Streak engine applied {len(changes)} queued changes "
+                f"({len(touched - rebuild)} incremental, {len(rebuild)} rebuilt habits)"
+            )
+        return len(rebuild)
+
+    def streaks(self, conn, user_id: int = 0, habit_id: int = 0, today: date | None = None) -> list[dict]:
+        """Returns streak statistics per habit, refreshing the side table first.
+
+        Args:
+            conn: The writer connection.
+            user_id (int): Only return habits of this user when non-zero.
+            habit_id (int): Only return this habit when non-zero.
+            today (date): Reference day for current streaks; defaults to today.
+        """
+        self.refresh(conn)
+        today = today or date.today()
+        query = """
+            SELECT h.id AS habit_id, h.user_id, h.name, h.frequency, s.*
+            FROM habits h JOIN habit_streaks s ON s.habit_id = h.id
+        """
+        where = []
+        params = []
+        if user_id:
+            where.append("h.user_id = ?")
+            params.append(user_id)
+        if habit_id:
+            where.append("h.id = ?")
+            params.append(habit_id)
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY h.id;"
+
+        results = []
+        for row in conn.execute(query, params):
+            current_period = period_of(today, row["frequency"])
+            last = row["last_completed_period"]
+            current_streak = row["run_length"] if last is not None and last >= current_period - 1 else 0
+            total_periods = 0
+            if row["first_period"] is not None:
+                total_periods = max(current_period, last or current_period) - row["first_period"] + 1
+            results.append({
+                "habit_id": row["habit_id"],
+                "user_id": row["user_id"],
+                "name": row["name"],
+                "frequency": row["frequency"],
+                "current_streak": current_streak,
+                "longest_streak": row["longest_streak"],
+                "completed_periods": row["completed_periods"],
+                "total_periods": total_periods,
+                "completion_rate": round(row["completed_periods"] / total_periods, 3) if total_periods else 0.0,
+                "last_completed_date": row["last_completed_date"],
+            })
+        return results
@@ -0,0 +1,71 @@
+import hashlib
+import importlib.metadata
+import inspect
+import json
+import logging
+import os
+
+
+def signature_hash(tools: dict) -> str:
+    """Hashes everything the generated schemas depend on.
+
+    That is each tool's name, signature (including defaults) and docstring,
+    plus the installed google-adk version that does the conversion.
+    """
+    digest = hashlib.sha256()
+    try:
+        digest.update(importlib.metadata.version("google-adk").encode())
+    except importlib.metadata.PackageNotFoundError:
+        pass
+    for name, func in tools.items():
+        digest.update(f"{name}{inspect.signature(func)}{func.__doc__}".encode())
+    return digest.hexdigest()
+
+
+def build_tool_schemas(tools: dict) -> list[dict]:
+    """Converts the tool functions to MCP tool definitions with google-adk."""
+    # Deferred: google.adk takes about a second to import and is only needed
+    # when the cached schemas are missing or out of date.
+    from google.adk.tools.function_tool import FunctionTool
+    from google.adk.tools.mcp_tool.conversion_utils import adk_to_mcp_tool_type
+
+    schemas = []
+    for name, func in tools.items():
+        tool = FunctionTool(func=func)
+        tool.name = name
+        schemas.append(adk_to_mcp_tool_type(tool).model_dump(mode="json", exclude_none=True))
+    return schemas
+
+
+def load_tool_schemas(tools: dict, cache_path: str) -> list[dict]:
+    """Returns MCP tool definitions, from `cache_path` when it matches `tools`.
+
+    On a miss the schemas are rebuilt and the cache file is rewritten
+    atomically, so concurrently starting servers never read a partial file.
+
+    Args:
+        tools (dict): Tool name -> function.
+        cache_path (str): JSON file holding the schemas and their signature hash.
+
+    Returns:
+        list[dict]: One MCP tool definition per tool, in `tools` order.
+    """
+    expected = signature_hash(tools)
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("signature_hash") == expected:
+            return cached["tools"]
+        logging.info(f"Tool schema cache {cache_path} is out of date, rebuilding")
+    except (OSError, ValueError, KeyError, AttributeError):
+        logging.info(f"No usable tool schema cache at {cache_path}, building it")
+
+    schemas = build_tool_schemas(tools)
+    temp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"signature_hash": expected, "tools": schemas}, f, indent=2)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        logging.warning(f"Could not write tool schema cache {cache_path}: {e}")
+    return schemas
@@ -0,0 +1,50 @@
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+DB_AGENT_DIR = Path(__file__).resolve().parent.parent / "db-agent"
+sys.path.insert(0, str(DB_AGENT_DIR))
+
+from migrations import migrate  # noqa: E402
+
+CREATED_AT = "2026-01-01 00:00:00"
+
+
+def connect(path) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=5, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL;")
+    return conn
+
+
+@pytest.fixture
+def database(tmp_path):
+    """Path of a new, fully migrated database with users 1 and 2."""
+    path = tmp_path / "life_tracker.db"
+    conn = connect(path)
+    migrate(conn)
+    conn.executemany(
+        "INSERT INTO users (id, username, email, created_at) VALUES (?, ?, ?, ?);",
+        [(1, "alice", "alice@example.com", CREATED_AT), (2, "bob", "bob@example.com", CREATED_AT)],
+    )
+    conn.close()
+    return path
+
+
+@pytest.fixture(scope="session")
+def server(tmp_path_factory):
+    """`server.py` imported against a database of its own, with users 1 and 2."""
+    path = tmp_path_factory.mktemp("server") / "life_tracker.db"
+    os.environ["LIFE_TRACKER_DB_PATH"] = str(path)
+    import server
+
+    with server.DB.writer() as conn:
+        conn.executemany(
+            "INSERT INTO users (id, username, email, created_at) VALUES (?, ?, ?, ?);",
+            [(1, "alice", "alice@example.com", CREATED_AT), (2, "bob", "bob@example.com", CREATED_AT)],
+        )
+        conn.commit()
+    yield server
+    server.DB.close()
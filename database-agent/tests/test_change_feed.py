@@ -0,0 +1,27 @@
+from conftest import connect
+from change_feed import read_changes
+
+TABLES = ["users"]
+
+
+def test_version_zero_predates_the_baseline(database):
+    conn = connect(database)
+    feed = read_changes(conn, 0, TABLES, 100)
+    assert feed["resync_required"]
+    assert feed["version"] == feed["latest_version"] == 3  # baseline, then users 1 and 2
+
+    feed = read_changes(conn, 1, TABLES, 100)
+    assert not feed["resync_required"]
+    assert [change["id"] for change in feed["changes"]] == [1, 2]
+
+
+def test_cursor_just_below_the_oldest_pruned_entry_keeps_syncing(database):
+    conn = connect(database)
+    conn.execute("DELETE FROM change_log WHERE version <= 2;")  # as the prune trigger would
+
+    feed = read_changes(conn, 2, TABLES, 100)
+    assert not feed["resync_required"]
+    assert [(change["id"], change["operation"]) for change in feed["changes"]] == [(2, "insert")]
+    assert feed["version"] == 3
+
+    assert read_changes(conn, 1, TABLES, 100)["resync_required"]
@@ -0,0 +1,112 @@
+import threading
+import time
+
+import pytest
+
+from conftest import CREATED_AT, connect
+from migrations import STORED_DATE_DAY_TABLES, migrate, rebuild_table, schema_version
+
+EXPENSE_COLUMNS = "id, user_id, amount, category, description, date, created_at, updated_at"
+ISO_DATES = EXPENSE_COLUMNS.replace(" date,", " replace(date, '/', '-'),")
+
+
+def insert_expenses(conn, count: int, start: int = 0) -> list[int]:
+    ids = []
+    for n in range(start, start + count):
+        ids.append(conn.execute(
+            "INSERT INTO expenses (user_id, amount, category, description, date, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?);",
+            (1 + n % 2, n % 50, ("food", "rent", "fun")[n % 3], f"coffee {n}", f"2026/01/{1 + n % 28:02d}", CREATED_AT, CREATED_AT),
+        ).lastrowid)
+    return ids
+
+
+def index_names(conn, table: str) -> set[str]:
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?;", (table,))}
+
+
+def test_rebuild_converts_rows_written_during_the_copy(database):
+    conn = connect(database)
+    insert_expenses(conn, 2_000)
+    indexes = index_names(conn, "expenses")
+    stop = threading.Event()
+    written = {"inserted": [], "deleted": []}
+
+    def write_while_copying():
+        # Writes until the swap: rows written after it are not the rebuild's to convert
+        writer = connect(database)
+        n = 10_000
+        copying = False
+        while not stop.is_set():
+            writer.execute("BEGIN IMMEDIATE;")
+            shadow = writer.execute("SELECT 1 FROM sqlite_master WHERE name = 'expenses_rebuild';").fetchone()
+            if shadow:
+                copying = True
+                written["inserted"] += insert_expenses(writer, 5, start=n)
+                writer.execute("UPDATE expenses SET amount = amount + 1, date = '2026/02/01' WHERE id = ?;", (n % 2_000 + 1,))
+                deleted = n % 1_000 + 1_001
+                if writer.execute("DELETE FROM expenses WHERE id = ?;", (deleted,)).rowcount:
+                    written["deleted"].append(deleted)
+                n += 5
+            writer.commit()
+            if copying and not shadow:
+                break
+            time.sleep(0.001)
+        writer.close()
+
+    thread = threading.Thread(target=write_while_copying)
+    thread.start()
+    try:
+        rebuild_table(
+            conn, "expenses", STORED_DATE_DAY_TABLES["expenses"], select_columns=ISO_DATES, batch_size=100, pause=0.01
+        )
+    finally:
+        stop.set()
+        thread.join()
+
+    assert written["inserted"] and written["deleted"]
+    ids = {row[0] for row in conn.execute("SELECT id FROM expenses;")}
+    assert ids == (set(range(1, 2_001)) | set(written["inserted"])) - set(written["deleted"])
+    assert conn.execute("SELECT COUNT(*) FROM expenses WHERE date LIKE '%/%' OR date_day IS NULL;").fetchone()[0] == 0
+    assert index_names(conn, "expenses") == indexes
+    assert conn.execute("PRAGMA integrity_check;").fetchone()[0] == "ok"
+
+    # Derived state matches the converted rows
+    raw = conn.execute(
+        "SELECT user_id, category, SUM(amount), COUNT(*) FROM expenses GROUP BY 1, 2 ORDER BY 1, 2;"
+    ).fetchall()
+    rolled = conn.execute(
+        "SELECT user_id, category, SUM(amount_total), SUM(entry_count) FROM expense_rollups "
+        "WHERE grain = 'month' GROUP BY 1, 2 ORDER BY 1, 2;"
+    ).fetchall()
+    assert rolled == raw
+    assert conn.execute("INSERT INTO expenses_fts (expenses_fts) VALUES ('integrity-check');").rowcount == 1
+    matched = conn.execute("SELECT COUNT(*) FROM expenses_fts WHERE expenses_fts MATCH 'coffee';").fetchone()[0]
+    assert matched == len(ids)
+    # Every converted row is reported to change feed clients
+    updated = {row[0] for row in conn.execute("SELECT row_id FROM change_log WHERE table_name = 'expenses' AND operation = 'update';")}
+    assert ids <= updated
+    conn.close()
+
+
+@pytest.mark.parametrize("online", [True, False])
+def test_rebuild_migration_stores_date_day(tmp_path, online):
+    conn = connect(tmp_path / "life_tracker.db")
+    migrate(conn, target=8)
+    conn.execute("INSERT INTO users (id, username, email, created_at) VALUES (1, 'alice', 'a@example.com', ?);", (CREATED_AT,))
+    conn.execute("INSERT INTO users (id, username, email, created_at) VALUES (2, 'bob', 'b@example.com', ?);", (CREATED_AT,))
+    insert_expenses(conn, 300)
+    before = conn.execute(f"SELECT {EXPENSE_COLUMNS}, date_day FROM expenses ORDER BY id;").fetchall()
+    indexes = index_names(conn, "expenses")
+    triggers = conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' ORDER BY name;").fetchall()
+
+    assert migrate(conn, online=online) == [9]
+    assert schema_version(conn) == 9
+    for table in STORED_DATE_DAY_TABLES:
+        hidden = {row[1]: row[6] for row in conn.execute(f"PRAGMA table_xinfo({table});")}
+        assert hidden["date_day"] == 3  # STORED generated column
+    assert conn.execute(f"SELECT {EXPENSE_COLUMNS}, date_day FROM expenses ORDER BY id;").fetchall() == before
+    assert index_names(conn, "expenses") == indexes
+    assert conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' ORDER BY name;").fetchall() == triggers
+    assert conn.execute("PRAGMA integrity_check;").fetchone()[0] == "ok"
+    conn.close()
@@ -0,0 +1,113 @@
+import asyncio
+import json
+
+from conftest import CREATED_AT
+
+
+def call_tool_text(server, tool: str, arguments: dict) -> str:
+    return asyncio.run(server.call_mcp_tool(tool, arguments))[0].text
+
+
+def call_tool(server, tool: str, arguments: dict) -> dict:
+    return json.loads(call_tool_text(server, tool, arguments))
+
+
+def add_expenses(server, user_id: int, dates: list[str]) -> list[int]:
+    rows = [
+        {"user_id": user_id, "amount": 10 + n, "category": ("food", "rent")[n % 2], "description": f"item {n}",
+         "date": day, "created_at": CREATED_AT, "updated_at": CREATED_AT}
+        for n, day in enumerate(dates)
+    ]
+    response = server.insert_rows_into_table("expenses", rows)
+    assert response["success"], response["message"]
+    return response["ids"]
+
+
+def test_explicit_compact_false_overrides_compact_default(server, monkeypatch):
+    add_expenses(server, 1, ["2026-01-01", "2026-01-02"])
+    monkeypatch.setattr(server, "COMPACT_RESPONSES", True)
+    arguments = {"table_name": "expenses", "columns": "id, amount", "limit": 2}
+
+    compact = call_tool_text(server, "query_db_table", arguments)
+    assert "\n" not in compact and "columns" in json.loads(compact)
+    verbose = call_tool_text(server, "query_db_table", {**arguments, "compact": False})
+    assert verbose == json.dumps(json.loads(verbose), indent=2)
+    assert set(json.loads(verbose)["rows"][0]) == {"id", "amount"}
+
+
+def test_streak_reads_keep_cached_reads(server):
+    add_expenses(server, 2, ["2026-02-01"])
+    arguments = {"table_name": "expenses", "columns": "id", "filters": [{"column": "user_id", "op": "=", "value": 2}]}
+    assert server.get_habit_streaks()["success"]  # folds anything already queued
+    call_tool(server, "query_db_table", arguments)
+    hits = server.QUERY_CACHE.stats()["hits"]
+
+    assert call_tool(server, "get_habit_streaks", {})["success"]
+    call_tool(server, "query_db_table", arguments)
+    assert server.QUERY_CACHE.stats()["hits"] == hits + 1
+
+
+def test_bulk_insert_returns_each_row_id(server):
+    ids = add_expenses(server, 1, ["2026-03-01", "2026-03-02"])
+    assert ids[1] == ids[0] + 1
+
+    row = {"user_id": 1, "amount": 5, "category": "food", "date": "2026-03-03",
+           "created_at": CREATED_AT, "updated_at": CREATED_AT}
+    explicit = [{**row, "id": None}, {**row, "id": ids[1] + 50}, {**row, "id": None}]
+    response = server.insert_rows_into_table("expenses", explicit)
+    assert response["success"], response["message"]
+    assert response["ids"] == [ids[1] + 1, ids[1] + 50, ids[1] + 51]
+
+
+def test_rollup_totals_match_raw_aggregates_after_writes(server):
+    ids = add_expenses(server, 2, [f"2025-{month:02d}-{day:02d}" for month in (1, 2, 3) for day in (3, 17, 28)])
+    assert server.update_data_in_table(
+        "expenses", {"amount": 99, "date": "2025-02-11"}, filters=[{"column": "id", "op": "=", "value": ids[0]}]
+    )["success"]
+    assert server.delete_data_from_table("expenses", filters=[{"column": "id", "op": "=", "value": ids[4]}])["success"]
+
+    arguments = {
+        "table_name": "expenses", "metrics": "SUM(amount), COUNT(*), AVG(amount)", "group_by": "category",
+        "time_bucket": "month", "date_range": "2025-01-01..2025-12-31",
+        "filters": [{"column": "user_id", "op": "=", "value": 2}],
+    }
+    rollup = server.summarize_totals(**arguments)
+    raw = server.aggregate_table(**arguments)
+    assert rollup["success"] and raw["success"]
+    assert rollup["source"] == "rollup"
+    assert rollup["rows"] == raw["rows"] and len(raw["rows"]) == 6
+
+
+def test_date_cursor_pages_through_rows_without_a_date_day(server):
+    dates = ["2026-05-02", "not a date", "2026-05-01", "", "2026-05-02", "someday", "2026-05-03"]
+    rows = [
+        {"user_id": 2, "amount": 1, "category": "paging", "date": day, "created_at": CREATED_AT, "updated_at": CREATED_AT}
+        for day in dates
+    ]
+    assert server.insert_rows_into_table("expenses", rows)["success"]
+    filters = [{"column": "category", "op": "=", "value": "paging"}]
+
+    for order_by in ("date", "date desc"):
+        everything = server.query_db_table("expenses", "id, date", order_by=order_by, filters=filters)
+        paged, cursor = [], ""
+        while True:
+            page = server.query_db_table("expenses", "id, date", limit=2, order_by=order_by, cursor=cursor, filters=filters)
+            assert page["success"], page["message"]
+            paged += page["rows"]
+            cursor = page["next_cursor"]
+            if not page["has_more"]:
+                break
+        assert len(everything["rows"]) == len(dates)
+        assert paged == everything["rows"]
+
+
+def test_changes_since_asks_a_new_client_to_resync(server):
+    start = call_tool(server, "changes_since", {"version": 0})
+    assert start["success"] and start["resync_required"]
+    assert start["version"] == start["latest_version"]
+
+    [row_id] = add_expenses(server, 1, ["2026-06-01"])
+    feed = call_tool(server, "changes_since", {"version": start["version"], "tables": "expenses"})
+    assert not feed["resync_required"]
+    assert [(change["id"], change["operation"]) for change in feed["changes"]] == [(row_id, "insert")]
+    assert feed["version"] == feed["latest_version"] > start["version"]